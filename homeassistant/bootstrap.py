@@ -15,7 +15,11 @@ from homeassistant import (
     core, config as conf_util, config_entries, components as core_components)
 from homeassistant.components import persistent_notification
 from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
-from homeassistant.setup import async_setup_component
+from homeassistant.setup import (
+    PHASE_IMPORT, PHASE_SETUP, async_get_setup_timeline,
+    async_setup_components)
+# pylint: disable=unused-import
+from homeassistant.setup import async_setup_component  # NOQA
 from homeassistant.util.logging import AsyncHandler
 from homeassistant.util.package import async_get_user_site, get_user_site
 from homeassistant.util.yaml import clear_secret_cache
@@ -134,25 +138,27 @@ async def async_from_config_dict(config: Dict[str, Any],
 
     _LOGGER.info("Home Assistant core initialized")
 
-    # stage 1
-    for component in components:
-        if component not in FIRST_INIT_COMPONENT:
-            continue
-        hass.async_add_job(async_setup_component(hass, component, config))
-
-    await hass.async_block_till_done()
+    # stage 1, the other components only wait for these to be set up and
+    # not for their platforms
+    await async_setup_components(
+        hass, components & FIRST_INIT_COMPONENT, config)
 
     # stage 2
-    for component in components:
-        if component in FIRST_INIT_COMPONENT:
-            continue
-        hass.async_add_job(async_setup_component(hass, component, config))
+    await async_setup_components(
+        hass, components - FIRST_INIT_COMPONENT, config)
 
     await hass.async_block_till_done()
 
     stop = time()
     _LOGGER.info("Home Assistant initialized in %.2fs", stop-start)
 
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        timeline = async_get_setup_timeline(hass)
+        for phase in (PHASE_IMPORT, PHASE_SETUP):
+            _LOGGER.debug("Slowest %s: %s", phase, ', '.join(
+                '{} {:.2f}s'.format(name, duration)
+                for name, duration in timeline.slowest(phase)))
+
     async_register_signal_handling(hass)
     return hass
 
@@ -204,7 +210,8 @@ async def async_from_config_file(config_path: str,
 
     try:
         config_dict = await hass.async_add_job(
-            conf_util.load_yaml_config_file, config_path)
+            conf_util.load_yaml_config_file, config_path,
+            os.path.join(config_dir, conf_util.CONFIG_CACHE_FILE))
     except HomeAssistantError as err:
         _LOGGER.error("Error loading %s: %s", config_path, err)
         return None
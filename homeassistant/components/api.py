@@ -12,7 +12,6 @@ from aiohttp import web
 import async_timeout
 
 import homeassistant.core as ha
-import homeassistant.remote as rem
 from homeassistant.bootstrap import DATA_LOGGING
 from homeassistant.const import (
     EVENT_HOMEASSISTANT_STOP, EVENT_TIME_CHANGED,
@@ -100,7 +99,7 @@ class APIEventStream(HomeAssistantView):
             if event.event_type == EVENT_HOMEASSISTANT_STOP:
                 data = stop_obj
             else:
-                data = json.dumps(event, cls=rem.JSONEncoder)
+                data = event.as_json()
 
             await to_write.put(data)
 
@@ -181,7 +180,9 @@ class APIStatesView(HomeAssistantView):
     @ha.callback
     def get(self, request):
         """Get current states."""
-        return self.json(request.app['hass'].states.async_all())
+        return self.json_encoded('[{}]'.format(','.join(
+            state.as_json() for state
+            in request.app['hass'].states.async_all())))
 
 
 class APIEntityStateView(HomeAssistantView):
@@ -19,7 +19,7 @@ from aiohttp import web
 import async_timeout
 import voluptuous as vol
 
-from homeassistant.core import callback
+from homeassistant.core import EXECUTOR_POLLING, callback
 from homeassistant.const import ATTR_ENTITY_ID
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.loader import bind_hass
@@ -265,7 +265,8 @@ class Camera(Entity):
 
         This method must be run in the event loop and returns a coroutine.
         """
-        return self.hass.async_add_job(self.camera_image)
+        return self.hass.async_add_executor_job(
+            EXECUTOR_POLLING, self.camera_image)
 
     async def handle_async_still_stream(self, request, interval):
         """Generate an HTTP MJPEG stream from camera images.
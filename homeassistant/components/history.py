@@ -7,19 +7,25 @@ https://home-assistant.io/components/history/
 from collections import defaultdict
 from datetime import timedelta
 from itertools import groupby
+import json
 import logging
 import time
 
+from aiohttp import web
 import voluptuous as vol
 
 from homeassistant.const import (
-    HTTP_BAD_REQUEST, CONF_DOMAINS, CONF_ENTITIES, CONF_EXCLUDE, CONF_INCLUDE)
+    HTTP_BAD_REQUEST, CONF_DOMAINS, CONF_ENTITIES, CONF_EXCLUDE, CONF_INCLUDE,
+    CONTENT_TYPE_JSON)
+import homeassistant.core as ha
+import homeassistant.remote as rem
 import homeassistant.util.dt as dt_util
 from homeassistant.components import recorder, script
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.const import ATTR_HIDDEN
 from homeassistant.components.recorder.util import session_scope, execute
 import homeassistant.helpers.config_validation as cv
+from homeassistant.util.async_ import run_coroutine_threadsafe
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,6 +43,17 @@ CONFIG_SCHEMA = vol.Schema({
 SIGNIFICANT_DOMAINS = ('thermostat', 'climate')
 IGNORE_DOMAINS = ('zone', 'scene',)
 
+# Number of states read from the database and written per streamed chunk
+STREAM_CHUNK_SIZE = 1000
+
+# Aggregates numeric states can be downsampled to
+AGGREGATES = {
+    'mean': lambda values: sum(values) / len(values),
+    'min': min,
+    'max': max,
+    'last': lambda values: values[-1],
+}
+
 
 def last_recorder_run(hass):
     """Retrieve the last closed recorder run from the database."""
@@ -65,18 +82,9 @@ def get_significant_states(hass, start_time, end_time=None, entity_ids=None,
     from homeassistant.components.recorder.models import States
 
     with session_scope(hass=hass) as session:
-        query = session.query(States).filter(
-            (States.domain.in_(SIGNIFICANT_DOMAINS) |
-             (States.last_changed == States.last_updated)) &
-            (States.last_updated > start_time))
-
-        if filters:
-            query = filters.apply(query, entity_ids)
-
-        if end_time is not None:
-            query = query.filter(States.last_updated < end_time)
-
-        query = query.order_by(States.last_updated)
+        query = _significant_states_query(
+            session, start_time, end_time, entity_ids, filters) \
+            .order_by(States.last_updated)
 
         states = (
             state for state in execute(query)
@@ -93,6 +101,126 @@ def get_significant_states(hass, start_time, end_time=None, entity_ids=None,
         include_start_time_state)
 
 
+def stream_significant_states(hass, start_time, end_time=None,
+                              entity_ids=None, filters=None,
+                              include_start_time_state=True,
+                              entity_order=None):
+    """Yield the significant states during a period as chunks of JSON.
+
+    Produces the same list of state lists per entity as
+    get_significant_states, but reads the states from the cursor one
+    entity at a time so memory does not grow with the length of the
+    period. Entities in entity_order are put first in that order.
+    """
+    from homeassistant.components.recorder.models import States
+    from sqlalchemy import case
+
+    entity_order = {entity_id: idx for idx, entity_id
+                    in enumerate(entity_order or ())}
+
+    def sort_key(entity_id):
+        """Return position of the states of entity_id in the result."""
+        return entity_order.get(entity_id, len(entity_order)), entity_id
+
+    start_states = {}
+
+    if include_start_time_state:
+        for state in get_states(hass, start_time, entity_ids, filters=filters):
+            state.last_changed = start_time
+            state.last_updated = start_time
+            start_states[state.entity_id] = state
+
+    # Entities that only have a start state are written in between
+    start_only = sorted(start_states, key=sort_key, reverse=True)
+
+    def encode(state):
+        """Encode a state."""
+        return json.dumps(state, sort_keys=True, cls=rem.JSONEncoder)
+
+    with session_scope(hass=hass) as session:
+        query = _significant_states_query(
+            session, start_time, end_time, entity_ids, filters)
+
+        order = [States.entity_id, States.last_updated]
+
+        if entity_order:
+            order.insert(0, case(entity_order, value=States.entity_id,
+                                 else_=len(entity_order)))
+
+        query = query.order_by(*order).yield_per(STREAM_CHUNK_SIZE)
+
+        chunk = ['[']
+        entity_id = None
+
+        for row in query:
+            state = row.to_native()
+
+            if (state is None or not _is_significant(state) or
+                    state.attributes.get(ATTR_HIDDEN, False)):
+                continue
+
+            if state.entity_id != entity_id:
+                if entity_id is not None:
+                    chunk.append('],')
+
+                entity_id = state.entity_id
+
+                while start_only and \
+                        sort_key(start_only[-1]) < sort_key(entity_id):
+                    start_entity_id = start_only.pop()
+
+                    if start_entity_id in start_states:
+                        chunk.append('[{}],'.format(encode(
+                            start_states.pop(start_entity_id))))
+
+                chunk.append('[')
+
+                if entity_id in start_states:
+                    chunk.append(encode(start_states.pop(entity_id)))
+                    chunk.append(',')
+            else:
+                chunk.append(',')
+
+            chunk.append(encode(state))
+
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                yield ''.join(chunk)
+                chunk = []
+
+    if entity_id is not None:
+        chunk.append(']')
+
+    for start_entity_id in reversed(start_only):
+        if start_entity_id in start_states:
+            if entity_id is not None:
+                chunk.append(',')
+            entity_id = start_entity_id
+            chunk.append('[{}]'.format(encode(
+                start_states.pop(start_entity_id))))
+
+    chunk.append(']')
+    yield ''.join(chunk)
+
+
+def _significant_states_query(session, start_time, end_time, entity_ids,
+                              filters):
+    """Return query for the significant states during a period."""
+    from homeassistant.components.recorder.models import States
+
+    query = session.query(States).filter(
+        (States.domain.in_(SIGNIFICANT_DOMAINS) |
+         (States.last_changed == States.last_updated)) &
+        (States.last_updated > start_time))
+
+    if filters:
+        query = filters.apply(query, entity_ids)
+
+    if end_time is not None:
+        query = query.filter(States.last_updated < end_time)
+
+    return query
+
+
 def state_changes_during_period(hass, start_time, end_time=None,
                                 entity_id=None):
     """Return states changes during UTC period start_time - end_time."""
@@ -252,6 +380,48 @@ def states_to_json(
     return result
 
 
+def downsample_states(states, start_time, bucket, aggregate='mean'):
+    """Reduce the states of one entity to a few states per time bucket.
+
+    When all states are numeric, every bucket gets a single state with the
+    aggregate of its values at the time of its first state. Otherwise the
+    first and last state of a bucket are kept when they differ from the
+    state before them, so no transition to another state gets lost.
+    """
+    def bucket_index(state):
+        """Return the index of the bucket of state."""
+        return int((state.last_updated - start_time) / bucket)
+
+    try:
+        values = [float(state.state) for state in states]
+    except ValueError:
+        values = None
+
+    result = []
+
+    if values is not None:
+        values = iter(values)
+        aggregate = AGGREGATES[aggregate]
+
+        for _, group in groupby(states, bucket_index):
+            group = list(group)
+            value = aggregate([next(values) for _ in group])
+            result.append(ha.State(
+                group[0].entity_id, round(value, 3), group[-1].attributes,
+                group[0].last_updated, group[0].last_updated))
+
+        return result
+
+    for _, group in groupby(states, bucket_index):
+        group = list(group)
+
+        for state in (group[0], group[-1]):
+            if not result or result[-1].state != state.state:
+                result.append(state)
+
+    return result
+
+
 def get_state(hass, utc_point_in_time, entity_id, run=None):
     """Return a state at a specific point in time."""
     states = list(get_states(hass, utc_point_in_time, (entity_id,), run))
@@ -273,6 +443,7 @@ async def async_setup(hass, config):
     use_include_order = conf.get(CONF_ORDER)
 
     hass.http.register_view(HistoryPeriodView(filters, use_include_order))
+    hass.http.register_view(HistoryStatisticsView())
     await hass.components.frontend.async_register_built_in_panel(
         'history', 'history', 'mdi:poll-box')
 
@@ -325,11 +496,36 @@ class HistoryPeriodView(HomeAssistantView):
             entity_ids = entity_ids.lower().split(',')
         include_start_time_state = 'skip_initial_state' not in request.query
 
+        bucket = None
+        try:
+            if 'bucket' in request.query:
+                bucket = timedelta(seconds=float(request.query['bucket']))
+            elif 'max_points' in request.query:
+                bucket = (end_time - start_time) / \
+                    int(request.query['max_points'])
+        except (ValueError, ZeroDivisionError):
+            return self.json_message(
+                'Invalid bucket or max_points', HTTP_BAD_REQUEST)
+
+        if bucket is not None and bucket <= timedelta(0):
+            return self.json_message(
+                'Invalid bucket or max_points', HTTP_BAD_REQUEST)
+
+        aggregate = request.query.get('aggregate', 'mean')
+        if aggregate not in AGGREGATES:
+            return self.json_message('Invalid aggregate', HTTP_BAD_REQUEST)
+
         hass = request.app['hass']
 
-        result = await hass.async_add_job(
-            get_significant_states, hass, start_time, end_time,
-            entity_ids, self.filters, include_start_time_state)
+        # Downsampled results are small, they are not streamed
+        if 'stream' in request.query and bucket is None:
+            return await self._async_stream(
+                request, start_time, end_time, entity_ids,
+                include_start_time_state)
+
+        result = await hass.async_add_executor_job(
+            ha.EXECUTOR_DATABASE, get_significant_states, hass, start_time,
+            end_time, entity_ids, self.filters, include_start_time_state)
         result = list(result.values())
         if _LOGGER.isEnabledFor(logging.DEBUG):
             elapsed = time.perf_counter() - timer_start
@@ -350,7 +546,89 @@ class HistoryPeriodView(HomeAssistantView):
             sorted_result.extend(result)
             result = sorted_result
 
-        return await hass.async_add_job(self.json, result)
+        if bucket is not None:
+            result = await hass.async_add_executor_job(
+                ha.EXECUTOR_CPU, _downsample_result, result, start_time,
+                bucket, aggregate)
+
+        return await hass.async_add_executor_job(
+            ha.EXECUTOR_CPU, self.json, result)
+
+    async def _async_stream(self, request, start_time, end_time, entity_ids,
+                            include_start_time_state):
+        """Write the history while it is read from the database."""
+        hass = request.app['hass']
+        response = web.StreamResponse()
+        response.content_type = CONTENT_TYPE_JSON
+        await response.prepare(request)
+
+        chunks = stream_significant_states(
+            hass, start_time, end_time, entity_ids, self.filters,
+            include_start_time_state,
+            self.filters.included_entities if self.use_include_order
+            else None)
+
+        def write_chunks():
+            """Write the chunks, waiting for each write to finish."""
+            for chunk in chunks:
+                run_coroutine_threadsafe(
+                    response.write(chunk.encode('UTF-8')), hass.loop).result()
+
+        await hass.async_add_executor_job(ha.EXECUTOR_DATABASE, write_chunks)
+        await response.write_eof()
+        return response
+
+
+class HistoryStatisticsView(HomeAssistantView):
+    """Handle long-term statistics requests."""
+
+    url = '/api/history/statistics'
+    name = 'api:history:view-statistics'
+    extra_urls = ['/api/history/statistics/{datetime}']
+
+    async def get(self, request, datetime=None):
+        """Return the hourly or daily statistics over a period of time."""
+        from homeassistant.components.recorder.statistics import (
+            PERIOD_DAY, PERIOD_HOUR, statistics_during_period)
+
+        if datetime:
+            datetime = dt_util.parse_datetime(datetime)
+
+            if datetime is None:
+                return self.json_message('Invalid datetime', HTTP_BAD_REQUEST)
+
+            start_time = dt_util.as_utc(datetime)
+        else:
+            start_time = dt_util.utcnow() - timedelta(days=30)
+
+        end_time = request.query.get('end_time')
+        if end_time:
+            end_time = dt_util.parse_datetime(end_time)
+            if end_time is None:
+                return self.json_message('Invalid end_time', HTTP_BAD_REQUEST)
+            end_time = dt_util.as_utc(end_time)
+
+        period = request.query.get('period', PERIOD_HOUR)
+        if period not in (PERIOD_HOUR, PERIOD_DAY):
+            return self.json_message('Invalid period', HTTP_BAD_REQUEST)
+
+        entity_ids = request.query.get('filter_entity_id')
+        if entity_ids:
+            entity_ids = entity_ids.lower().split(',')
+
+        hass = request.app['hass']
+        result = await hass.async_add_executor_job(
+            ha.EXECUTOR_DATABASE, statistics_during_period, hass, start_time,
+            end_time, entity_ids, period)
+
+        return await hass.async_add_executor_job(
+            ha.EXECUTOR_CPU, self.json, result)
+
+
+def _downsample_result(result, start_time, bucket, aggregate):
+    """Downsample the lists of states of a history result."""
+    return [downsample_states(states, start_time, bucket, aggregate)
+            for states in result]
 
 
 class Filters(object):
@@ -37,6 +37,13 @@ class HomeAssistantView(object):
         except TypeError as err:
             _LOGGER.error('Unable to serialize to JSON: %s\n%s', err, result)
             raise HTTPInternalServerError
+        return self.json_encoded(msg, status_code, headers)
+
+    # pylint: disable=no-self-use
+    def json_encoded(self, msg, status_code=200, headers=None):
+        """Return a response of already encoded JSON."""
+        if isinstance(msg, str):
+            msg = msg.encode('UTF-8')
         response = web.Response(
             body=msg, content_type=CONTENT_TYPE_JSON, status=status_code,
             headers=headers)
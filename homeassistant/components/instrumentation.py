@@ -0,0 +1,323 @@
+"""
+Instrument the event loop and the executor of Home Assistant.
+
+Records how long event listeners, service handlers and entity updates take,
+how long jobs wait in the executor, how far the event loop lags behind and
+how many MQTT messages arrive per topic.
+Nothing is recorded unless this component is set up.
+
+Once Home Assistant has started, the timeline of the setup of components
+and platforms is written in the Chrome trace format to
+startup_timeline.json in the configuration directory. Open it with
+chrome://tracing to see which components slow down the startup.
+"""
+import asyncio
+from datetime import timedelta
+import logging
+from time import monotonic
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.components.mqtt import DATA_MQTT
+from homeassistant.const import (
+    CONF_SCAN_INTERVAL, EVENT_HOMEASSISTANT_START, EVENT_HOMEASSISTANT_STOP)
+from homeassistant.core import callback, is_callback
+from homeassistant.helpers.poll_scheduler import DATA_POLL_SCHEDULER
+import homeassistant.helpers.config_validation as cv
+from homeassistant.setup import async_get_setup_timeline
+from homeassistant.util.json import save_json
+
+_LOGGER = logging.getLogger(__name__)
+
+DOMAIN = 'instrumentation'
+DEPENDENCIES = ['http']
+
+ENTITY_ID = 'instrumentation.event_loop'
+
+ATTR_EXECUTOR_QUEUE = 'executor_queue'
+ATTR_EXECUTOR_WAIT = 'executor_wait'
+ATTR_MAX_LOOP_LAG = 'max_loop_lag'
+
+KIND_LISTENER = 'listener'
+KIND_SERVICE = 'service'
+KIND_ENTITY_UPDATE = 'entity_update'
+KIND_EXECUTOR_WAIT = 'executor_wait'
+
+# Upper bounds in seconds of the histogram buckets, the last one is open
+BUCKETS = (0.001, 0.01, 0.1, 1, 10)
+
+DEFAULT_SCAN_INTERVAL = timedelta(seconds=5)
+
+URL_API_INSTRUMENTATION = '/api/instrumentation'
+URL_API_STARTUP_TIMELINE = '/api/instrumentation/startup_timeline'
+
+STARTUP_TIMELINE_FILE = 'startup_timeline.json'
+
+WS_TYPE_INSTRUMENTATION = 'instrumentation'
+SCHEMA_WS_INSTRUMENTATION = \
+    websocket_api.BASE_COMMAND_MESSAGE_SCHEMA.extend({
+        'type': WS_TYPE_INSTRUMENTATION,
+    })
+
+CONFIG_SCHEMA = vol.Schema({
+    DOMAIN: vol.Any(None, vol.Schema({
+        vol.Optional(CONF_SCAN_INTERVAL): cv.time_period,
+    })),
+}, extra=vol.ALLOW_EXTRA)
+
+
+async def async_setup(hass, config):
+    """Set up the instrumentation of the event loop and executor."""
+    interval = (config.get(DOMAIN) or {}).get(
+        CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+    instrumentation = hass.instrumentation = Instrumentation(hass)
+    instrumentation.instrument_executor(hass.executor)
+
+    seconds = interval.total_seconds()
+    timer = None
+
+    @callback
+    def sample_loop(expected):
+        """Measure the loop lag and update the entity."""
+        nonlocal timer
+        current = hass.loop.time()
+        instrumentation.record_loop_lag(max(current - expected, 0))
+        timer = hass.loop.call_at(
+            current + seconds, sample_loop, current + seconds)
+
+        snapshot = instrumentation.snapshot()
+        hass.states.async_set(
+            ENTITY_ID, round(snapshot['loop_lag'] * 1000, 1), {
+                ATTR_MAX_LOOP_LAG: round(snapshot['max_loop_lag'] * 1000, 1),
+                ATTR_EXECUTOR_QUEUE: snapshot['executor_queue'],
+                ATTR_EXECUTOR_WAIT: snapshot[KIND_EXECUTOR_WAIT]['mean'],
+                'unit_of_measurement': 'ms',
+            })
+
+    start = hass.loop.time() + seconds
+    timer = hass.loop.call_at(start, sample_loop, start)
+
+    @callback
+    def stop_instrumentation(event):
+        """Stop recording."""
+        timer.cancel()
+        hass.instrumentation = None
+
+    hass.bus.async_listen_once(
+        EVENT_HOMEASSISTANT_STOP, stop_instrumentation)
+
+    @callback
+    def write_startup_timeline(event):
+        """Write the timeline of the setup of the components."""
+        hass.async_add_job(
+            save_json, hass.config.path(STARTUP_TIMELINE_FILE),
+            async_get_setup_timeline(hass).as_chrome_trace())
+
+    hass.bus.async_listen_once(
+        EVENT_HOMEASSISTANT_START, write_startup_timeline)
+
+    hass.http.register_view(InstrumentationView(instrumentation))
+    hass.http.register_view(StartupTimelineView)
+    hass.components.websocket_api.async_register_command(
+        WS_TYPE_INSTRUMENTATION, websocket_instrumentation,
+        SCHEMA_WS_INSTRUMENTATION)
+
+    return True
+
+
+class Histogram(object):
+    """Histogram of durations."""
+
+    __slots__ = ['count', 'total', 'max', 'buckets']
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, duration):
+        """Add a duration to the histogram."""
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+        for idx, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                break
+        else:
+            idx = len(BUCKETS)
+
+        self.buckets[idx] += 1
+
+    def as_dict(self):
+        """Return the histogram as a dictionary."""
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'max': self.max,
+            'buckets': dict(zip(
+                [str(bound) for bound in BUCKETS] + ['+Inf'],
+                self.buckets)),
+        }
+
+
+class Instrumentation(object):
+    """Record the durations of the jobs of Home Assistant."""
+
+    def __init__(self, hass):
+        """Initialize the instrumentation."""
+        self.hass = hass
+        self.executor = None
+        self.loop_lag = 0.0
+        self.max_loop_lag = 0.0
+        self.executor_wait = Histogram()
+        self.histograms = {
+            KIND_LISTENER: {},
+            KIND_SERVICE: {},
+            KIND_ENTITY_UPDATE: {},
+        }
+
+    @callback
+    def record(self, kind, name, duration):
+        """Record the duration of a job of a kind."""
+        histograms = self.histograms[kind]
+        histogram = histograms.get(name)
+
+        if histogram is None:
+            histogram = histograms[name] = Histogram()
+
+        histogram.add(duration)
+
+    @callback
+    def record_loop_lag(self, lag):
+        """Record how late the event loop ran a timer."""
+        self.loop_lag = lag
+        self.max_loop_lag = max(self.max_loop_lag, lag)
+
+    def wrap_listener(self, func):
+        """Return the listener wrapped to record its duration."""
+        name = getattr(func, '__qualname__', None) or repr(func)
+        name = '{}.{}'.format(getattr(func, '__module__', None), name)
+
+        if is_callback(func):
+            @callback
+            def timed_callback(*args):
+                """Run and time the callback."""
+                start = monotonic()
+                try:
+                    func(*args)
+                finally:
+                    self.record(KIND_LISTENER, name, monotonic() - start)
+
+            return timed_callback
+
+        if asyncio.iscoroutinefunction(func):
+            async def timed_coroutine(*args):
+                """Run and time the coroutine."""
+                start = monotonic()
+                try:
+                    await func(*args)
+                finally:
+                    self.record(KIND_LISTENER, name, monotonic() - start)
+
+            return timed_coroutine
+
+        def timed_job(*args):
+            """Run and time the job in the executor."""
+            start = monotonic()
+            try:
+                func(*args)
+            finally:
+                self.hass.loop.call_soon_threadsafe(
+                    self.record, KIND_LISTENER, name, monotonic() - start)
+
+        return timed_job
+
+    def instrument_executor(self, executor):
+        """Record how long jobs wait in the executor before they run."""
+        self.executor = executor
+        submit = executor.submit
+        loop = self.hass.loop
+
+        def timed_submit(func, *args, **kwargs):
+            """Submit a job that records its waiting time."""
+            queued = monotonic()
+
+            def timed_job():
+                """Record the waiting time and run the job."""
+                loop.call_soon_threadsafe(
+                    self.executor_wait.add, monotonic() - queued)
+                return func(*args, **kwargs)
+
+            return submit(timed_job)
+
+        executor.submit = timed_submit
+
+    @callback
+    def snapshot(self):
+        """Return all recorded values."""
+        # pylint: disable=protected-access
+        snapshot = {
+            'loop_lag': self.loop_lag,
+            'max_loop_lag': self.max_loop_lag,
+            'executor_queue': self.executor._work_queue.qsize()
+                              if self.executor is not None else None,
+            KIND_EXECUTOR_WAIT: self.executor_wait.as_dict(),
+        }
+
+        for kind, histograms in self.histograms.items():
+            snapshot[kind] = {name: histogram.as_dict()
+                              for name, histogram in histograms.items()}
+
+        scheduler = self.hass.data.get(DATA_POLL_SCHEDULER)
+        if scheduler is not None:
+            snapshot['polls'] = scheduler.async_get_stats()
+
+        mqtt = self.hass.data.get(DATA_MQTT)
+        if mqtt is not None:
+            snapshot['mqtt_topics'] = mqtt.async_get_message_stats()
+
+        return snapshot
+
+
+class InstrumentationView(HomeAssistantView):
+    """View to get the recorded instrumentation."""
+
+    url = URL_API_INSTRUMENTATION
+    name = 'api:instrumentation'
+
+    def __init__(self, instrumentation):
+        """Initialize the instrumentation view."""
+        self.instrumentation = instrumentation
+
+    @callback
+    def get(self, request):
+        """Return the recorded instrumentation."""
+        return self.json(self.instrumentation.snapshot())
+
+
+class StartupTimelineView(HomeAssistantView):
+    """View to get the timeline of the startup."""
+
+    url = URL_API_STARTUP_TIMELINE
+    name = 'api:instrumentation:startup_timeline'
+
+    @callback
+    def get(self, request):
+        """Return the timeline in the Chrome trace format."""
+        hass = request.app['hass']
+        return self.json(async_get_setup_timeline(hass).as_chrome_trace())
+
+
+@callback
+def websocket_instrumentation(hass, connection, msg):
+    """Handle the get instrumentation websocket command.
+
+    Async friendly.
+    """
+    connection.to_write.put_nowait(websocket_api.result_message(
+        msg['id'], hass.instrumentation.snapshot()))
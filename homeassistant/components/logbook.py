@@ -10,7 +10,7 @@ from itertools import groupby
 
 import voluptuous as vol
 
-from homeassistant.core import callback
+from homeassistant.core import EXECUTOR_DATABASE, callback
 import homeassistant.helpers.config_validation as cv
 import homeassistant.util.dt as dt_util
 from homeassistant.components import sun
@@ -20,6 +20,7 @@ from homeassistant.const import (
     STATE_NOT_HOME, STATE_OFF, STATE_ON, ATTR_HIDDEN, HTTP_BAD_REQUEST,
     EVENT_LOGBOOK_ENTRY)
 from homeassistant.core import State, split_entity_id, DOMAIN as HA_DOMAIN
+from homeassistant.loader import bind_hass
 
 DOMAIN = 'logbook'
 DEPENDENCIES = ['recorder', 'frontend']
@@ -68,11 +69,13 @@ LOG_MESSAGE_SCHEMA = vol.Schema({
 })
 
 
+@bind_hass
 def log_entry(hass, name, message, domain=None, entity_id=None):
     """Add an entry to the logbook."""
     hass.add_job(async_log_entry, hass, name, message, domain, entity_id)
 
 
+@bind_hass
 def async_log_entry(hass, name, message, domain=None, entity_id=None):
     """Add an entry to the logbook."""
     data = {
@@ -141,7 +144,8 @@ class LogbookView(HomeAssistantView):
             return self.json(list(
                 _get_events(hass, self.config, start_day, end_day)))
 
-        return await hass.async_add_job(json_events)
+        return await hass.async_add_executor_job(
+            EXECUTOR_DATABASE, json_events)
 
 
 class Entry(object):
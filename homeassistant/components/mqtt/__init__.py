@@ -6,14 +6,15 @@ https://home-assistant.io/components/mqtt/
 """
 import asyncio
 from itertools import groupby
-from typing import Optional, Any, Union, Callable, List, cast  # noqa: F401
+from typing import (  # noqa: F401
+    Optional, Any, Union, Callable, Dict, List, Set, Tuple, cast)
 from operator import attrgetter
 import logging
 import os
 import socket
+import threading
 import time
 import ssl
-import re
 import requests.certs
 import attr
 
@@ -33,6 +34,7 @@ from homeassistant.const import (
     EVENT_HOMEASSISTANT_STOP, CONF_VALUE_TEMPLATE, CONF_USERNAME,
     CONF_PASSWORD, CONF_PORT, CONF_PROTOCOL, CONF_PAYLOAD)
 from homeassistant.components.mqtt.server import HBMQTT_CONFIG_SCHEMA
+from homeassistant.components.mqtt.topic_trie import TopicTrie, is_wildcard
 
 REQUIREMENTS = ['paho-mqtt==1.3.1']
 
@@ -57,6 +59,7 @@ CONF_TLS_INSECURE = 'tls_insecure'
 CONF_TLS_VERSION = 'tls_version'
 
 CONF_BIRTH_MESSAGE = 'birth_message'
+CONF_CLIENT_LOOP = 'client_loop'
 CONF_WILL_MESSAGE = 'will_message'
 
 CONF_STATE_TOPIC = 'state_topic'
@@ -70,6 +73,10 @@ CONF_RETAIN = 'retain'
 PROTOCOL_31 = '3.1'
 PROTOCOL_311 = '3.1.1'
 
+# Network I/O of the client in a paho-mqtt thread or on the event loop
+CLIENT_LOOP_THREAD = 'thread'
+CLIENT_LOOP_ASYNCIO = 'asyncio'
+
 DEFAULT_PORT = 1883
 DEFAULT_KEEPALIVE = 60
 DEFAULT_QOS = 0
@@ -80,6 +87,7 @@ DEFAULT_DISCOVERY_PREFIX = 'homeassistant'
 DEFAULT_TLS_PROTOCOL = 'auto'
 DEFAULT_PAYLOAD_AVAILABLE = 'online'
 DEFAULT_PAYLOAD_NOT_AVAILABLE = 'offline'
+DEFAULT_CLIENT_LOOP = CLIENT_LOOP_THREAD
 
 ATTR_TOPIC = 'topic'
 ATTR_PAYLOAD = 'payload'
@@ -89,6 +97,15 @@ ATTR_RETAIN = CONF_RETAIN
 
 MAX_RECONNECT_WAIT = 300  # seconds
 
+# Messages handled by the event loop before it runs other jobs
+MAX_MESSAGE_BATCH = 1000
+
+# Interval of the keepalive and retry checks on the event loop
+MISC_INTERVAL = 1  # seconds
+
+# Length of the window the message rates are counted over
+MESSAGE_RATE_WINDOW = 60  # seconds
+
 
 def valid_topic(value: Any) -> str:
     """Validate that this is a valid topic name/filter."""
@@ -172,6 +189,8 @@ CONFIG_SCHEMA = vol.Schema({
         vol.Optional(CONF_EMBEDDED): HBMQTT_CONFIG_SCHEMA,
         vol.Optional(CONF_WILL_MESSAGE): MQTT_WILL_BIRTH_SCHEMA,
         vol.Optional(CONF_BIRTH_MESSAGE): MQTT_WILL_BIRTH_SCHEMA,
+        vol.Optional(CONF_CLIENT_LOOP, default=DEFAULT_CLIENT_LOOP):
+            vol.In([CLIENT_LOOP_THREAD, CLIENT_LOOP_ASYNCIO]),
         vol.Optional(CONF_DISCOVERY, default=DEFAULT_DISCOVERY): cv.boolean,
         # discovery_prefix must be a valid publish topic because if no
         # state topic is specified, it will be created with the given prefix.
@@ -414,7 +433,8 @@ async def async_setup(hass: HomeAssistantType, config: ConfigType) -> bool:
         hass.data[DATA_MQTT] = MQTT(
             hass, broker, port, client_id, keepalive, username, password,
             certificate, client_key, client_cert, tls_insecure, protocol,
-            will_message, birth_message, tls_version)
+            will_message, birth_message, tls_version,
+            conf[CONF_CLIENT_LOOP])
     except socket.error:
         _LOGGER.exception("Can't connect to the broker. "
                           "Please check your settings and the broker itself")
@@ -481,6 +501,46 @@ class Message(object):
     retain = attr.ib(type=bool, default=False)
 
 
+class TopicStats(object):
+    """Count the messages received on a topic."""
+
+    __slots__ = ['count', 'rate', 'window_start', 'window_count']
+
+    def __init__(self, now: float) -> None:
+        """Initialize the counters."""
+        self.count = 0
+        # Messages per second over the last complete window
+        self.rate = 0.0
+        self.window_start = now
+        self.window_count = 0
+
+    def add(self, now: float) -> None:
+        """Count a message."""
+        if now - self.window_start >= MESSAGE_RATE_WINDOW:
+            self._roll(now)
+
+        self.count += 1
+        self.window_count += 1
+
+    def _roll(self, now: float) -> None:
+        """Start the window now falls in."""
+        windows = (now - self.window_start) // MESSAGE_RATE_WINDOW
+        self.rate = (self.window_count / MESSAGE_RATE_WINDOW
+                     if windows == 1 else 0.0)
+        self.window_start += windows * MESSAGE_RATE_WINDOW
+        self.window_count = 0
+
+    def as_dict(self, now: float) -> dict:
+        """Return the counters as a dictionary."""
+        if now - self.window_start >= MESSAGE_RATE_WINDOW:
+            self._roll(now)
+
+        return {
+            'count': self.count,
+            'rate': self.rate,
+        }
+
+
 class MQTT(object):
     """Home Assistant MQTT client."""
 
@@ -490,7 +550,8 @@ class MQTT(object):
                  certificate: Optional[str], client_key: Optional[str],
                  client_cert: Optional[str], tls_insecure: Optional[bool],
                  protocol: Optional[str], will_message: Optional[Message],
-                 birth_message: Optional[Message], tls_version) -> None:
+                 birth_message: Optional[Message], tls_version,
+                 client_loop: str = DEFAULT_CLIENT_LOOP) -> None:
         """Initialize Home Assistant MQTT client."""
         import paho.mqtt.client as mqtt
 
@@ -498,10 +559,29 @@ class MQTT(object):
         self.broker = broker
         self.port = port
         self.keepalive = keepalive
-        self.subscriptions = []  # type: List[Subscription]
+        self.subscriptions = TopicTrie()
         self.birth_message = birth_message
         self._mqttc = None  # type: mqtt.Client
         self._paho_lock = asyncio.Lock(loop=hass.loop)
+        self.topic_stats = {}  # type: Dict[str, TopicStats]
+
+        # Messages received by the paho thread, handed to the loop in batches
+        self._pending_lock = threading.Lock()
+        self._pending_messages = []  # type: List[Any]
+        self._drain_scheduled = False
+        self._reconnected = False
+
+        # Payloads of the retained messages last handled per topic and the
+        # topics the broker sends them again for after a reconnect
+        self._retained = {}  # type: Dict[str, bytes]
+        self._resubscribed = set()  # type: Set[str]
+
+        # Socket of the client handled by the event loop in asyncio mode
+        self._on_loop = client_loop == CLIENT_LOOP_ASYNCIO
+        self._sock_fd = None  # type: Optional[int]
+        self._writing = False
+        self._misc_timer = None  # type: Optional[asyncio.Handle]
+        self._reconnect_task = None  # type: Optional[asyncio.Task]
 
         if protocol == PROTOCOL_31:
             proto = mqtt.MQTTv31  # type: int
@@ -537,9 +617,22 @@ class MQTT(object):
 
         This method must be run in the event loop and returns a coroutine.
         """
+        await self._async_paho_call(
+            self._mqttc.publish, topic, payload, qos, retain)
+
+    async def _async_paho_call(self, func: Callable, *args) -> Any:
+        """Call a method of the paho-mqtt client that sends packets.
+
+        In asyncio mode the packets are written by the event loop, otherwise
+        the calls are serialized and run in the executor.
+        """
+        if self._on_loop:
+            result = func(*args)
+            self._async_check_write()
+            return result
+
         async with self._paho_lock:
-            await self.hass.async_add_job(
-                self._mqttc.publish, topic, payload, qos, retain)
+            return await self.hass.async_add_job(func, *args)
 
     async def async_connect(self) -> bool:
         """Connect to the host. Does process messages yet.
@@ -559,21 +652,94 @@ class MQTT(object):
             _LOGGER.error('Failed to connect: %s', mqtt.error_string(result))
             return False
 
-        self._mqttc.loop_start()
+        if self._on_loop:
+            self._async_start_loop()
+        else:
+            self._mqttc.loop_start()
         return True
 
-    @callback
-    def async_disconnect(self):
+    async def async_disconnect(self) -> None:
         """Stop the MQTT client.
 
-        This method must be run in the event loop and returns a coroutine.
+        This method is a coroutine.
         """
+        if self._on_loop:
+            if self._reconnect_task is not None:
+                self._reconnect_task.cancel()
+            self._mqttc.disconnect()
+            self._async_stop_loop()
+            return
+
         def stop():
             """Stop the MQTT client."""
             self._mqttc.disconnect()
             self._mqttc.loop_stop()
 
-        return self.hass.async_add_job(stop)
+        await self.hass.async_add_job(stop)
+
+    @callback
+    def _async_start_loop(self) -> None:
+        """Handle the socket of the connected client on the event loop."""
+        self._sock_fd = self._mqttc.socket().fileno()
+        self.hass.loop.add_reader(self._sock_fd, self._async_read)
+        self._misc_timer = self.hass.loop.call_later(
+            MISC_INTERVAL, self._async_misc)
+        self._async_check_write()
+
+    @callback
+    def _async_stop_loop(self) -> None:
+        """Stop handling the socket of the client."""
+        if self._sock_fd is None:
+            return
+
+        self.hass.loop.remove_reader(self._sock_fd)
+        if self._writing:
+            self.hass.loop.remove_writer(self._sock_fd)
+            self._writing = False
+        self._misc_timer.cancel()
+        self._sock_fd = None
+
+    @callback
+    def _async_read(self) -> None:
+        """Read the packets received on the socket."""
+        self._mqttc.loop_read()
+        sock = self._mqttc.socket()
+
+        # Data decrypted by SSL is not signalled by the socket
+        if self._sock_fd is not None and \
+                getattr(sock, 'pending', None) and sock.pending():
+            self.hass.loop.call_soon(self._async_read)
+
+        self._async_check_write()
+
+    @callback
+    def _async_write(self) -> None:
+        """Write the queued packets once the socket is writable."""
+        self._mqttc.loop_write()
+        self._async_check_write()
+
+    @callback
+    def _async_check_write(self) -> None:
+        """Wait for the socket to be writable while packets are queued."""
+        if self._sock_fd is None:
+            return
+
+        want_write = self._mqttc.want_write()
+
+        if want_write and not self._writing:
+            self.hass.loop.add_writer(self._sock_fd, self._async_write)
+        elif not want_write and self._writing:
+            self.hass.loop.remove_writer(self._sock_fd)
+
+        self._writing = want_write
+
+    @callback
+    def _async_misc(self) -> None:
+        """Send keepalive pings and retry unacknowledged messages."""
+        self._misc_timer = self.hass.loop.call_later(
+            MISC_INTERVAL, self._async_misc)
+        self._mqttc.loop_misc()
+        self._async_check_write()
 
     async def async_subscribe(self, topic: str,
                               msg_callback: MessageCallbackType,
@@ -586,7 +752,15 @@ class MQTT(object):
             raise HomeAssistantError("topic needs to be a string!")
 
         subscription = Subscription(topic, msg_callback, qos, encoding)
-        self.subscriptions.append(subscription)
+        self.subscriptions.add(subscription)
+
+        # New subscribers need the retained messages sent on subscribe
+        self._async_check_reconnected()
+        if self._resubscribed:
+            if is_wildcard(topic):
+                self._resubscribed.clear()
+            else:
+                self._resubscribed.discard(topic)
 
         await self._async_perform_subscription(topic, qos)
 
@@ -597,7 +771,7 @@ class MQTT(object):
                 raise HomeAssistantError("Can't remove subscription twice")
             self.subscriptions.remove(subscription)
 
-            if any(other.topic == topic for other in self.subscriptions):
+            if self.subscriptions.has_topic(topic):
                 # Other subscriptions on topic remaining - don't unsubscribe.
                 return
             self.hass.async_add_job(self._async_unsubscribe(topic))
@@ -609,21 +783,28 @@ class MQTT(object):
 
         This method is a coroutine.
         """
-        async with self._paho_lock:
-            result = None  # type: int
-            result, _ = await self.hass.async_add_job(
-                self._mqttc.unsubscribe, topic)
-            _raise_on_error(result)
+        result = None  # type: int
+        result, _ = await self._async_paho_call(
+            self._mqttc.unsubscribe, topic)
+        _raise_on_error(result)
 
     async def _async_perform_subscription(self, topic: str, qos: int) -> None:
         """Perform a paho-mqtt subscription."""
         _LOGGER.debug("Subscribing to %s", topic)
 
-        async with self._paho_lock:
-            result = None  # type: int
-            result, _ = await self.hass.async_add_job(
-                self._mqttc.subscribe, topic, qos)
-            _raise_on_error(result)
+        result = None  # type: int
+        result, _ = await self._async_paho_call(
+            self._mqttc.subscribe, topic, qos)
+        _raise_on_error(result)
+
+    async def _async_perform_subscriptions(
+            self, topics: List[Tuple[str, int]]) -> None:
+        """Subscribe to topics with a single SUBSCRIBE packet."""
+        _LOGGER.debug("Subscribing to %d topics", len(topics))
+
+        result = None  # type: int
+        result, _ = await self._async_paho_call(self._mqttc.subscribe, topics)
+        _raise_on_error(result)
 
     def _mqtt_on_connect(self, _mqttc, _userdata, _flags,
                          result_code: int) -> None:
@@ -640,30 +821,109 @@ class MQTT(object):
             self._mqttc.disconnect()
             return
 
+        with self._pending_lock:
+            self._reconnected = True
+
         # Group subscriptions to only re-subscribe once for each topic.
         keyfunc = attrgetter('topic')
-        for topic, subs in groupby(sorted(self.subscriptions, key=keyfunc),
-                                   keyfunc):
+        topics = [
             # Re-subscribe with the highest requested qos
-            max_qos = max(subscription.qos for subscription in subs)
-            self.hass.add_job(self._async_perform_subscription, topic, max_qos)
+            (topic, max(subscription.qos for subscription in subs))
+            for topic, subs in groupby(
+                sorted(self.subscriptions, key=keyfunc), keyfunc)]
+
+        if topics:
+            self.hass.add_job(self._async_perform_subscriptions, topics)
 
         if self.birth_message:
             self.hass.add_job(
                 self.async_publish(*attr.astuple(self.birth_message)))
 
     def _mqtt_on_message(self, _mqttc, _userdata, msg) -> None:
-        """Message received callback."""
-        self.hass.add_job(self._mqtt_handle_message, msg)
+        """Message received callback.
+
+        Messages are buffered, only the first message of a batch wakes up
+        the event loop.
+        """
+        with self._pending_lock:
+            self._pending_messages.append(msg)
+
+            if self._drain_scheduled:
+                return
+
+            self._drain_scheduled = True
+
+        self.hass.add_job(self._async_drain_messages)
+
+    @callback
+    def _async_drain_messages(self) -> None:
+        """Handle a batch of the buffered messages."""
+        with self._pending_lock:
+            batch = self._pending_messages[:MAX_MESSAGE_BATCH]
+            del self._pending_messages[:MAX_MESSAGE_BATCH]
+            self._drain_scheduled = bool(self._pending_messages)
+
+        if self._drain_scheduled:
+            # Let other jobs run before the next batch
+            self.hass.loop.call_soon(self._async_drain_messages)
+
+        self._async_check_reconnected()
+        now = self.hass.loop.time()
+
+        for msg in batch:
+            stats = self.topic_stats.get(msg.topic)
+            if stats is None:
+                stats = self.topic_stats[msg.topic] = TopicStats(now)
+            stats.add(now)
+
+            if not msg.retain:
+                self._retained.pop(msg.topic, None)
+            elif self._is_duplicate_retained(msg):
+                continue
+
+            self._mqtt_handle_message(msg)
+
+    @callback
+    def _async_check_reconnected(self) -> None:
+        """Expect the retained messages again if the client reconnected."""
+        with self._pending_lock:
+            reconnected, self._reconnected = self._reconnected, False
+
+        if reconnected:
+            self._resubscribed = set(self._retained)
+
+    @callback
+    def _is_duplicate_retained(self, msg) -> bool:
+        """Return if a retained message was already handled.
+
+        After a reconnect the broker sends the retained messages of all
+        resubscribed topics again, the unchanged ones are skipped.
+        """
+        topic = msg.topic
+
+        if topic in self._resubscribed:
+            self._resubscribed.discard(topic)
+
+            if self._retained.get(topic) == msg.payload:
+                _LOGGER.debug("Skipping unchanged retained message on %s",
+                              topic)
+                return True
+
+        self._retained[topic] = msg.payload
+        return False
+
+    @callback
+    def async_get_message_stats(self) -> Dict[str, dict]:
+        """Return the message counters per topic."""
+        now = self.hass.loop.time()
+        return {topic: stats.as_dict(now)
+                for topic, stats in self.topic_stats.items()}
 
     @callback
     def _mqtt_handle_message(self, msg) -> None:
         _LOGGER.debug("Received message on %s: %s", msg.topic, msg.payload)
 
-        for subscription in self.subscriptions:
-            if not _match_topic(subscription.topic, msg.topic):
-                continue
-
+        for subscription in self.subscriptions.match(msg.topic):
             payload = msg.payload  # type: SubscribePayloadType
             if subscription.encoding is not None:
                 try:
@@ -680,10 +940,18 @@ class MQTT(object):
 
     def _mqtt_on_disconnect(self, _mqttc, _userdata, result_code: int) -> None:
         """Disconnected callback."""
+        if self._on_loop:
+            self._async_stop_loop()
+
         # When disconnected because of calling disconnect()
         if result_code == 0:
             return
 
+        if self._on_loop:
+            self._reconnect_task = self.hass.async_add_job(
+                self._async_reconnect())
+            return
+
         tries = 0
 
         while True:
@@ -702,6 +970,27 @@ class MQTT(object):
             time.sleep(wait_time)
             tries += 1
 
+    async def _async_reconnect(self) -> None:
+        """Reconnect to the broker in asyncio mode."""
+        tries = 0
+
+        while True:
+            try:
+                if await self.hass.async_add_job(self._mqttc.reconnect) == 0:
+                    _LOGGER.info("Successfully reconnected to the MQTT server")
+                    self._reconnect_task = None
+                    self._async_start_loop()
+                    return
+            except socket.error:
+                pass
+
+            wait_time = min(2**tries, MAX_RECONNECT_WAIT)
+            _LOGGER.warning(
+                "Disconnected from MQTT. Trying to reconnect in %s s",
+                wait_time)
+            await asyncio.sleep(wait_time, loop=self.hass.loop)
+            tries += 1
+
 
 def _raise_on_error(result_code: int) -> None:
     """Raise error if error result."""
@@ -712,27 +1001,6 @@ def _raise_on_error(result_code: int) -> None:
             'Error talking to MQTT: {}'.format(mqtt.error_string(result_code)))
 
 
-def _match_topic(subscription: str, topic: str) -> bool:
-    """Test if topic matches subscription."""
-    reg_ex_parts = []  # type: List[str]
-    suffix = ""
-    if subscription.endswith('#'):
-        subscription = subscription[:-2]
-        suffix = "(.*)"
-    sub_parts = subscription.split('/')
-    for sub_part in sub_parts:
-        if sub_part == "+":
-            reg_ex_parts.append(r"([^\/]+)")
-        else:
-            reg_ex_parts.append(re.escape(sub_part))
-
-    reg_ex = "^" + (r'\/'.join(reg_ex_parts)) + suffix + "$"
-
-    reg = re.compile(reg_ex)
-
-    return reg.match(topic) is not None
-
-
 class MqttAvailability(Entity):
     """Mixin used for platforms that report availability."""
 
@@ -0,0 +1,180 @@
+"""Index of MQTT subscriptions by their topic filter.
+
+Subscriptions to plain topics are kept in a dictionary, subscriptions with
+the + and # wildcards in a trie of the topic levels. Finding the
+subscriptions of a topic depends on the number of levels of the topic, not
+on the number of subscriptions.
+"""
+from typing import Dict, Iterator, Optional  # noqa: F401
+
+SINGLE_LEVEL_WILDCARD = '+'
+MULTI_LEVEL_WILDCARD = '#'
+
+
+def is_wildcard(topic_filter: str) -> bool:
+    """Return if a topic filter contains a wildcard."""
+    return (SINGLE_LEVEL_WILDCARD in topic_filter or
+            MULTI_LEVEL_WILDCARD in topic_filter)
+
+
+class _Node(object):
+    """Level of the topic filters with wildcards."""
+
+    __slots__ = ['children', 'subscriptions', 'subtree']
+
+    def __init__(self) -> None:
+        """Initialize an empty level."""
+        self.children = {}  # type: Dict[str, _Node]
+        # Subscriptions to filters ending at this level
+        self.subscriptions = []  # type: list
+        # Subscriptions to filters ending with # after this level
+        self.subtree = []  # type: list
+
+    def is_empty(self) -> bool:
+        """Return if the level holds no subscriptions."""
+        return not (self.children or self.subscriptions or self.subtree)
+
+
+class TopicTrie(object):
+    """Subscriptions indexed by their topic filter.
+
+    Subscriptions need a topic attribute holding their topic filter.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._exact = {}  # type: Dict[str, list]
+        self._root = _Node()
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Return the number of subscriptions."""
+        return self._count
+
+    def __iter__(self) -> Iterator:
+        """Iterate over all subscriptions."""
+        for subscriptions in self._exact.values():
+            yield from subscriptions
+
+        nodes = [self._root]
+        while nodes:
+            node = nodes.pop()
+            yield from node.subscriptions
+            yield from node.subtree
+            nodes.extend(node.children.values())
+
+    def __contains__(self, subscription) -> bool:
+        """Return if a subscription is in the index."""
+        subscriptions = self._find(subscription.topic)
+        return subscriptions is not None and subscription in subscriptions
+
+    def _find(self, topic_filter: str, create: bool = False) \
+            -> Optional[list]:
+        """Return the list holding the subscriptions to a topic filter."""
+        if not is_wildcard(topic_filter):
+            if create:
+                return self._exact.setdefault(topic_filter, [])
+            return self._exact.get(topic_filter)
+
+        levels = topic_filter.split('/')
+        subtree = levels[-1] == MULTI_LEVEL_WILDCARD
+        if subtree:
+            levels.pop()
+
+        node = self._root
+        for level in levels:
+            child = node.children.get(level)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[level] = _Node()
+            node = child
+
+        return node.subtree if subtree else node.subscriptions
+
+    def has_topic(self, topic_filter: str) -> bool:
+        """Return if there are subscriptions to a topic filter."""
+        return bool(self._find(topic_filter))
+
+    def add(self, subscription) -> None:
+        """Add a subscription."""
+        self._find(subscription.topic, True).append(subscription)
+        self._count += 1
+
+    def remove(self, subscription) -> None:
+        """Remove a subscription.
+
+        Raises ValueError if the subscription is not in the index.
+        """
+        topic_filter = subscription.topic
+        subscriptions = self._find(topic_filter)
+
+        if subscriptions is None:
+            raise ValueError(subscription)
+
+        subscriptions.remove(subscription)
+        self._count -= 1
+
+        if subscriptions:
+            return
+
+        if not is_wildcard(topic_filter):
+            del self._exact[topic_filter]
+            return
+
+        # Prune the levels left without subscriptions
+        levels = topic_filter.split('/')
+        if levels[-1] == MULTI_LEVEL_WILDCARD:
+            levels.pop()
+
+        path = [self._root]
+        for level in levels:
+            path.append(path[-1].children[level])
+
+        for level, parent, node in zip(
+                reversed(levels), reversed(path[:-1]), reversed(path[1:])):
+            if not node.is_empty():
+                break
+            del parent.children[level]
+
+    def match(self, topic: str) -> list:
+        """Return the subscriptions matching a topic.
+
+        Subscriptions to plain topics come first, in the order they were
+        added.
+        """
+        matches = list(self._exact.get(topic, ()))
+
+        if self._root.is_empty():
+            return matches
+
+        # Wildcards on the first level do not match topics starting with $
+        sys_topic = topic.startswith('$')
+        nodes = [self._root]
+
+        for depth, level in enumerate(topic.split('/')):
+            wildcards = depth > 0 or not sys_topic
+            next_nodes = []
+
+            for node in nodes:
+                if wildcards:
+                    matches.extend(node.subtree)
+                    child = node.children.get(SINGLE_LEVEL_WILDCARD)
+                    if child is not None:
+                        next_nodes.append(child)
+
+                child = node.children.get(level)
+                if child is not None:
+                    next_nodes.append(child)
+
+            if not next_nodes:
+                return matches
+
+            nodes = next_nodes
+
+        for node in nodes:
+            # A # also matches the level before it
+            matches.extend(node.subscriptions)
+            matches.extend(node.subtree)
+
+        return matches
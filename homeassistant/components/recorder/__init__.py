@@ -8,7 +8,7 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/recorder/
 """
 import asyncio
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 import concurrent.futures
 from datetime import datetime, timedelta
 import logging
@@ -31,7 +31,7 @@ from homeassistant.helpers.typing import ConfigType
 import homeassistant.util.dt as dt_util
 from homeassistant.loader import bind_hass
 
-from . import migration, purge
+from . import migration, purge, statistics
 from .const import DATA_INSTANCE
 from .util import session_scope
 
@@ -58,9 +58,23 @@ CONF_DB_URL = 'db_url'
 CONF_PURGE_KEEP_DAYS = 'purge_keep_days'
 CONF_PURGE_INTERVAL = 'purge_interval'
 CONF_EVENT_TYPES = 'event_types'
+CONF_COMMIT_INTERVAL = 'commit_interval'
+CONF_COMMIT_MAX_EVENTS = 'commit_max_events'
+
+DEFAULT_COMMIT_INTERVAL = 1
+DEFAULT_COMMIT_MAX_EVENTS = 1000
 
 CONNECT_RETRY_WAIT = 3
 
+# Log a warning when this many events are waiting to be recorded
+QUEUE_BACKLOG_WARNING = 1000
+
+# Rows per INSERT ... RETURNING statement
+INSERT_RETURNING_CHUNK_SIZE = 500
+
+# Number of distinct attribute sets whose state_attributes id is remembered
+ATTRIBUTES_CACHE_SIZE = 2048
+
 FILTER_SCHEMA = vol.Schema({
     vol.Optional(CONF_EXCLUDE, default={}): vol.Schema({
         vol.Optional(CONF_DOMAINS): vol.All(cv.ensure_list, [cv.string]),
@@ -80,6 +94,11 @@ CONFIG_SCHEMA = vol.Schema({
         vol.Optional(CONF_PURGE_INTERVAL, default=1):
             vol.All(vol.Coerce(int), vol.Range(min=0)),
         vol.Optional(CONF_DB_URL): cv.string,
+        vol.Optional(CONF_COMMIT_INTERVAL, default=DEFAULT_COMMIT_INTERVAL):
+            vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Optional(CONF_COMMIT_MAX_EVENTS,
+                     default=DEFAULT_COMMIT_MAX_EVENTS):
+            vol.All(vol.Coerce(int), vol.Range(min=1)),
     })
 }, extra=vol.ALLOW_EXTRA)
 
@@ -116,6 +135,9 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     conf = config.get(DOMAIN, {})
     keep_days = conf.get(CONF_PURGE_KEEP_DAYS)
     purge_interval = conf.get(CONF_PURGE_INTERVAL)
+    commit_interval = conf.get(CONF_COMMIT_INTERVAL, DEFAULT_COMMIT_INTERVAL)
+    commit_max_events = conf.get(
+        CONF_COMMIT_MAX_EVENTS, DEFAULT_COMMIT_MAX_EVENTS)
 
     db_url = conf.get(CONF_DB_URL, None)
     if not db_url:
@@ -126,7 +148,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     exclude = conf.get(CONF_EXCLUDE, {})
     instance = hass.data[DATA_INSTANCE] = Recorder(
         hass=hass, keep_days=keep_days, purge_interval=purge_interval,
-        uri=db_url, include=include, exclude=exclude)
+        uri=db_url, include=include, exclude=exclude,
+        commit_interval=commit_interval, commit_max_events=commit_max_events)
     instance.async_initialize()
     instance.start()
 
@@ -143,19 +166,35 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
 PurgeTask = namedtuple('PurgeTask', ['keep_days', 'repack'])
 
+StatisticsTask = namedtuple('StatisticsTask', ['now'])
+
+# Put on the queue to commit the pending events right away
+FLUSH_TASK = object()
+
 
 class Recorder(threading.Thread):
     """A threaded recorder class."""
 
     def __init__(self, hass: HomeAssistant, keep_days: int,
                  purge_interval: int, uri: str,
-                 include: Dict, exclude: Dict) -> None:
+                 include: Dict, exclude: Dict,
+                 commit_interval: int = DEFAULT_COMMIT_INTERVAL,
+                 commit_max_events: int = DEFAULT_COMMIT_MAX_EVENTS) -> None:
         """Initialize the recorder."""
         threading.Thread.__init__(self, name='Recorder')
 
         self.hass = hass
         self.keep_days = keep_days
         self.purge_interval = purge_interval
+        self.commit_interval = commit_interval
+        self.commit_max_events = commit_max_events
+        # Size and duration of the last commit and the events left in the
+        # queue when it finished
+        self.last_commit_events = 0
+        self.last_commit_duration = 0.0
+        self.last_commit_queue_depth = 0
+        # Attributes JSON -> state_attributes id, least recently used first
+        self._attributes_ids = OrderedDict()  # type: OrderedDict
         self.queue = queue.Queue()  # type: Any
         self.recording_start = dt_util.utcnow()
         self.db_url = uri
@@ -184,9 +223,8 @@ class Recorder(threading.Thread):
 
     def run(self):
         """Start processing events to save."""
-        from .models import States, Events
+        from .models import Events
         from homeassistant.components import persistent_notification
-        from sqlalchemy import exc
 
         tries = 1
         connected = False
@@ -276,16 +314,57 @@ class Recorder(threading.Thread):
 
             self.hass.helpers.event.track_point_in_time(async_purge, run)
 
+        # Compile the statistics of the last hour every hour and catch up
+        # on the hours missed while not running
+        @callback
+        def async_compile_statistics(now):
+            """Trigger compiling the statistics."""
+            self.queue.put(StatisticsTask(dt_util.as_utc(now)))
+
+        self.hass.helpers.event.track_utc_time_change(
+            async_compile_statistics, minute=0, second=0)
+        self.queue.put(StatisticsTask(dt_util.utcnow()))
+
+        # Events waiting to be committed in a single transaction
+        batch = []
+        commit_deadline = None
+
         while True:
-            event = self.queue.get()
+            if batch:
+                try:
+                    event = self.queue.get(
+                        timeout=max(commit_deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    self._commit_events(batch)
+                    continue
+            else:
+                event = self.queue.get()
+
+            if event is None or event is FLUSH_TASK or \
+                    isinstance(event, (PurgeTask, StatisticsTask)):
+                self._commit_events(batch)
 
             if event is None:
                 self._close_run()
                 self._close_connection()
                 self.queue.task_done()
                 return
+            elif event is FLUSH_TASK:
+                self.queue.task_done()
+                continue
             elif isinstance(event, PurgeTask):
-                purge.purge_old_data(self, event.keep_days, event.repack)
+                if purge.purge_old_data(self, event.keep_days, event.repack):
+                    # Purge removed attributes that are no longer used
+                    self._attributes_ids.clear()
+                else:
+                    # Continue after the events queued in the meantime
+                    _LOGGER.debug("Purge not finished, continuing after %d "
+                                  "queued events", self.queue.qsize())
+                    self.queue.put(event)
+                self.queue.task_done()
+                continue
+            elif isinstance(event, StatisticsTask):
+                self._compile_statistics(event.now)
                 self.queue.task_done()
                 continue
             elif event.event_type == EVENT_TIME_CHANGED:
@@ -301,35 +380,179 @@ class Recorder(threading.Thread):
                     self.queue.task_done()
                     continue
 
-            tries = 1
-            updated = False
-            while not updated and tries <= 10:
-                if tries != 1:
-                    time.sleep(CONNECT_RETRY_WAIT)
-                try:
-                    with session_scope(session=self.get_session()) as session:
-                        dbevent = Events.from_event(event)
-                        session.add(dbevent)
-                        session.flush()
-
-                        if event.event_type == EVENT_STATE_CHANGED:
-                            dbstate = States.from_event(event)
-                            dbstate.event_id = dbevent.event_id
-                            session.add(dbstate)
-                    updated = True
-
-                except exc.OperationalError as err:
-                    _LOGGER.error("Error in database connectivity: %s. "
-                                  "(retrying in %s seconds)", err,
-                                  CONNECT_RETRY_WAIT)
-                    tries += 1
-
-            if not updated:
-                _LOGGER.error("Error in database update. Could not save "
-                              "after %d tries. Giving up", tries)
+            batch.append(event)
+
+            if len(batch) == 1:
+                commit_deadline = time.monotonic() + self.commit_interval
+
+            if len(batch) >= self.commit_max_events or (
+                    self.commit_interval and
+                    time.monotonic() >= commit_deadline):
+                self._commit_events(batch)
+
+    def _compile_statistics(self, now):
+        """Compile the statistics of the hours before now."""
+        from sqlalchemy.exc import SQLAlchemyError
+
+        try:
+            statistics.compile_statistics(self, now)
+        except SQLAlchemyError:
+            _LOGGER.exception("Error compiling statistics")
+
+    def _commit_events(self, batch):
+        """Write a batch of events in one transaction and empty the batch."""
+        if not batch:
+            return
+
+        from sqlalchemy.exc import SQLAlchemyError
+
+        start = time.monotonic()
+
+        try:
+            self._write_events(batch)
+        except SQLAlchemyError:
+            _LOGGER.exception("Error saving %d events", len(batch))
+
+        self.last_commit_events = len(batch)
+        self.last_commit_duration = time.monotonic() - start
+        self.last_commit_queue_depth = self.queue.qsize()
+        _LOGGER.debug("Committed %d events in %.3fs, %d queued",
+                      self.last_commit_events, self.last_commit_duration,
+                      self.last_commit_queue_depth)
 
+        if self.last_commit_queue_depth > QUEUE_BACKLOG_WARNING:
+            _LOGGER.warning("The recorder queue reached %d events, the "
+                            "database is not keeping up",
+                            self.last_commit_queue_depth)
+
+        for _ in batch:
             self.queue.task_done()
 
+        batch.clear()
+
+    def _write_events(self, events):
+        """Insert events and their states using executemany.
+
+        Rows are built as plain dictionaries and inserted with SQLAlchemy Core
+        instead of going through the ORM unit of work. Only the events that
+        have a state need their id back from the database, all other rows
+        are inserted with executemany. State attributes are stored once in
+        state_attributes and referenced by the states.
+        """
+        from .models import States, Events
+        from sqlalchemy import exc
+
+        tries = 1
+        updated = False
+        while not updated and tries <= 10:
+            if tries != 1:
+                time.sleep(CONNECT_RETRY_WAIT)
+            try:
+                with session_scope(session=self.get_session()) as session:
+                    event_rows = []
+                    state_rows = []
+                    # Attributes JSON -> state_attributes id for this batch
+                    attributes_ids = {}
+
+                    # Events are inserted in runs of the same kind to keep
+                    # their ids in the order they were fired.
+                    for event in events:
+                        has_state = event.event_type == EVENT_STATE_CHANGED
+
+                        if event_rows and has_state != bool(state_rows):
+                            self._insert_events(
+                                session, event_rows, state_rows,
+                                attributes_ids)
+
+                        event_rows.append(Events.row_from_event(event))
+
+                        if has_state:
+                            state_rows.append(States.row_from_event(event))
+
+                    if event_rows:
+                        self._insert_events(
+                            session, event_rows, state_rows, attributes_ids)
+                updated = True
+
+            except exc.OperationalError as err:
+                _LOGGER.error("Error in database connectivity: %s. "
+                              "(retrying in %s seconds)", err,
+                              CONNECT_RETRY_WAIT)
+                tries += 1
+
+        if not updated:
+            _LOGGER.error("Error in database update. Could not save "
+                          "%d events after %d tries. Giving up",
+                          len(events), tries)
+            return
+
+        for shared_attrs, attributes_id in attributes_ids.items():
+            self._attributes_ids[shared_attrs] = attributes_id
+            self._attributes_ids.move_to_end(shared_attrs)
+
+        while len(self._attributes_ids) > ATTRIBUTES_CACHE_SIZE:
+            self._attributes_ids.popitem(last=False)
+
+    def _insert_events(self, session, event_rows, state_rows,
+                       attributes_ids):
+        """Insert events and the states linked to them and empty the rows.
+
+        state_rows is either empty or has a state for every event.
+        """
+        from .models import States, Events
+
+        if state_rows:
+            event_ids = _insert_returning_ids(
+                session, Events.__table__, event_rows)
+
+            for row, event_id in zip(state_rows, event_ids):
+                row['event_id'] = event_id
+
+            self._link_attributes(session, state_rows, attributes_ids)
+
+            session.execute(States.__table__.insert(), state_rows)
+        else:
+            session.execute(Events.__table__.insert(), event_rows)
+
+        event_rows.clear()
+        state_rows.clear()
+
+    def _link_attributes(self, session, state_rows, attributes_ids):
+        """Move the attributes of state rows into state_attributes.
+
+        Attributes that are not cached or stored yet are inserted once.
+        """
+        from .models import StateAttributes
+
+        new_attrs = []
+
+        for row in state_rows:
+            shared_attrs = row['attributes']
+
+            if shared_attrs in attributes_ids:
+                continue
+
+            attributes_id = self._attributes_ids.get(shared_attrs)
+
+            if attributes_id is None:
+                attributes_id = _find_attributes_id(session, shared_attrs)
+
+                if attributes_id is None:
+                    new_attrs.append(shared_attrs)
+
+            attributes_ids[shared_attrs] = attributes_id
+
+        if new_attrs:
+            attributes_ids.update(zip(new_attrs, _insert_returning_ids(
+                session, StateAttributes.__table__, [{
+                    'hash': StateAttributes.hash_shared_attrs(shared_attrs),
+                    'shared_attrs': shared_attrs,
+                } for shared_attrs in new_attrs])))
+
+        for row in state_rows:
+            row['attributes_id'] = attributes_ids[row['attributes']]
+            row['attributes'] = None
+
     @callback
     def event_listener(self, event):
         """Listen for new events and put them in the process queue."""
@@ -337,6 +560,9 @@ class Recorder(threading.Thread):
 
     def block_till_done(self):
         """Block till all events processed."""
+        if self.is_alive():
+            # Commit the pending events without waiting for commit_interval
+            self.queue.put(FLUSH_TASK)
         self.queue.join()
 
     def _setup_connection(self):
@@ -411,3 +637,42 @@ class Recorder(threading.Thread):
             self.run_info.end = dt_util.utcnow()
             session.add(self.run_info)
         self.run_info = None
+
+
+def _insert_returning_ids(session, table, rows):
+    """Insert rows into table and return their primary keys in order.
+
+    Databases that support RETURNING get the rows in chunks of multi row
+    inserts, others insert one row at a time and read back the key.
+    """
+    if session.bind.dialect.implicit_returning:
+        ids = []
+        for start in range(0, len(rows), INSERT_RETURNING_CHUNK_SIZE):
+            chunk = rows[start:start + INSERT_RETURNING_CHUNK_SIZE]
+            result = session.execute(
+                table.insert().values(chunk).returning(
+                    *table.primary_key.columns))
+            ids.extend(row[0] for row in result)
+        return ids
+
+    # Compile the statement once for all rows
+    connection = session.connection().execution_options(compiled_cache={})
+    insert = table.insert()
+    return [connection.execute(insert, row).inserted_primary_key[0]
+            for row in rows]
+
+
+def _find_attributes_id(session, shared_attrs):
+    """Return the id of stored attributes matching shared_attrs."""
+    from .models import StateAttributes
+
+    query = session.query(
+        StateAttributes.attributes_id, StateAttributes.shared_attrs) \
+        .filter(StateAttributes.hash ==
+                StateAttributes.hash_shared_attrs(shared_attrs))
+
+    for attributes_id, stored_attrs in query:
+        if stored_attrs == shared_attrs:
+            return attributes_id
+
+    return None
@@ -57,6 +57,32 @@ def _create_index(engine, table_name, index_name):
     _LOGGER.debug("Finished creating %s", index_name)
 
 
+def _add_columns(engine, table_name, columns_def):
+    """Add columns to a table."""
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    _LOGGER.info("Adding columns %s to table %s. Note: this can take several "
+                 "minutes on large databases and slow computers. Please "
+                 "be patient!", ', '.join(column.split(' ')[0]
+                                          for column in columns_def),
+                 table_name)
+
+    columns_def = ['ADD {}'.format(col_def) for col_def in columns_def]
+
+    try:
+        engine.execute(text("ALTER TABLE {table} {columns_def}".format(
+            table=table_name, columns_def=', '.join(columns_def))))
+        return
+    except OperationalError:
+        # Some engines, like SQLite, only add one column per statement
+        _LOGGER.info("Unable to use quick column add. Adding 1 by 1.")
+
+    for column_def in columns_def:
+        engine.execute(text("ALTER TABLE {table} {column_def}".format(
+            table=table_name, column_def=column_def)))
+
+
 def _drop_index(engine, table_name, index_name):
     """Drop an index from a specified table.
 
@@ -146,6 +172,14 @@ def _apply_update(engine, new_version, old_version):
     elif new_version == 5:
         # Create supporting index for States.event_id foreign key
         _create_index(engine, "states", "ix_states_event_id")
+    elif new_version == 6:
+        # The state_attributes table itself is created with the other
+        # tables. Existing rows keep their inline attributes.
+        _add_columns(engine, "states", [
+            "attributes_id INTEGER REFERENCES "
+            "state_attributes(attributes_id)",
+        ])
+        _create_index(engine, "states", "ix_states_attributes_id")
     else:
         raise ValueError("No schema migration defined for version {}"
                          .format(new_version))
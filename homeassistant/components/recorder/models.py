@@ -2,11 +2,14 @@
 import json
 from datetime import datetime
 import logging
+from types import MappingProxyType
+import zlib
 
 from sqlalchemy import (
-    Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text,
-    distinct)
+    BigInteger, Boolean, Column, DateTime, Float, ForeignKey, Index, Integer,
+    String, Text, distinct)
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
 
 import homeassistant.util.dt as dt_util
 from homeassistant.core import Event, EventOrigin, State, split_entity_id
@@ -16,7 +19,7 @@ from homeassistant.remote import JSONEncoder
 # pylint: disable=invalid-name
 Base = declarative_base()
 
-SCHEMA_VERSION = 5
+SCHEMA_VERSION = 6
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,10 +38,17 @@ class Events(Base):  # type: ignore
     @staticmethod
     def from_event(event):
         """Create an event database object from a native event."""
-        return Events(event_type=event.event_type,
-                      event_data=json.dumps(event.data, cls=JSONEncoder),
-                      origin=str(event.origin),
-                      time_fired=event.time_fired)
+        return Events(**Events.row_from_event(event))
+
+    @staticmethod
+    def row_from_event(event):
+        """Create the column values of an events row from a native event."""
+        return {
+            'event_type': event.event_type,
+            'event_data': json.dumps(event.data, cls=JSONEncoder),
+            'origin': str(event.origin),
+            'time_fired': event.time_fired,
+        }
 
     def to_native(self):
         """Convert to a natve HA Event."""
@@ -55,6 +65,33 @@ class Events(Base):  # type: ignore
             return None
 
 
+class StateAttributes(Base):   # type: ignore
+    """State attributes shared between state rows."""
+
+    __tablename__ = 'state_attributes'
+    attributes_id = Column(Integer, primary_key=True)
+    hash = Column(BigInteger, index=True)
+    shared_attrs = Column(Text)
+
+    @staticmethod
+    def hash_shared_attrs(shared_attrs):
+        """Return the content hash used to look up shared attributes."""
+        return zlib.crc32(shared_attrs.encode('utf-8'))
+
+    def to_native(self):
+        """Return the attributes as a read-only mapping.
+
+        Decoded once and shared by all states loaded with this row.
+        """
+        native = self.__dict__.get('_native')
+
+        if native is None:
+            native = self._native = MappingProxyType(
+                json.loads(self.shared_attrs))
+
+        return native
+
+
 class States(Base):   # type: ignore
     """State change history."""
 
@@ -65,6 +102,8 @@ class States(Base):   # type: ignore
     state = Column(String(255))
     attributes = Column(Text)
     event_id = Column(Integer, ForeignKey('events.event_id'), index=True)
+    attributes_id = Column(
+        Integer, ForeignKey('state_attributes.attributes_id'), index=True)
     last_changed = Column(DateTime(timezone=True), default=datetime.utcnow)
     last_updated = Column(DateTime(timezone=True), default=datetime.utcnow,
                           index=True)
@@ -76,37 +115,55 @@ class States(Base):   # type: ignore
         Index(
             'ix_states_entity_id_last_updated', 'entity_id', 'last_updated'),)
 
+    # Rows written by the recorder keep their attributes in state_attributes,
+    # they are loaded with the state so to_native does not need a query.
+    state_attributes = relationship(StateAttributes, lazy='joined')
+
     @staticmethod
     def from_event(event):
         """Create object from a state_changed event."""
+        return States(**States.row_from_event(event))
+
+    @staticmethod
+    def row_from_event(event):
+        """Create the column values of a states row from a state event."""
         entity_id = event.data['entity_id']
         state = event.data.get('new_state')
 
-        dbstate = States(entity_id=entity_id)
-
         # State got deleted
         if state is None:
-            dbstate.state = ''
-            dbstate.domain = split_entity_id(entity_id)[0]
-            dbstate.attributes = '{}'
-            dbstate.last_changed = event.time_fired
-            dbstate.last_updated = event.time_fired
-        else:
-            dbstate.domain = state.domain
-            dbstate.state = state.state
-            dbstate.attributes = json.dumps(dict(state.attributes),
-                                            cls=JSONEncoder)
-            dbstate.last_changed = state.last_changed
-            dbstate.last_updated = state.last_updated
-
-        return dbstate
+            return {
+                'entity_id': entity_id,
+                'domain': split_entity_id(entity_id)[0],
+                'state': '',
+                'attributes': '{}',
+                'last_changed': event.time_fired,
+                'last_updated': event.time_fired,
+            }
+
+        return {
+            'entity_id': entity_id,
+            'domain': state.domain,
+            'state': state.state,
+            'attributes': json.dumps(dict(state.attributes),
+                                     cls=JSONEncoder),
+            'last_changed': state.last_changed,
+            'last_updated': state.last_updated,
+        }
 
     def to_native(self):
         """Convert to an HA state object."""
         try:
+            if self.attributes is not None:
+                attributes = json.loads(self.attributes)
+            elif self.state_attributes is not None:
+                attributes = self.state_attributes.to_native()
+            else:
+                attributes = None
+
             return State(
                 self.entity_id, self.state,
-                json.loads(self.attributes),
+                attributes,
                 _process_timestamp(self.last_changed),
                 _process_timestamp(self.last_updated)
             )
@@ -155,6 +212,36 @@ class RecorderRuns(Base):   # type: ignore
         return self
 
 
+class Statistics(Base):   # type: ignore
+    """Statistics of the numeric states of an entity over an hour or day."""
+
+    __tablename__ = 'statistics'
+    id = Column(Integer, primary_key=True)
+    entity_id = Column(String(255))
+    period = Column(String(8))
+    start = Column(DateTime(timezone=True))
+    mean = Column(Float)
+    min = Column(Float)
+    max = Column(Float)
+    count = Column(Integer)
+
+    __table_args__ = (
+        Index('ix_statistics_entity_id_period_start',
+              'entity_id', 'period', 'start'),)
+
+    def to_native(self):
+        """Return the statistics as a dictionary."""
+        return {
+            'entity_id': self.entity_id,
+            'period': self.period,
+            'start': _process_timestamp(self.start),
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'count': self.count,
+        }
+
+
 class SchemaChanges(Base):   # type: ignore
     """Representation of schema version changes."""
 
@@ -8,55 +8,76 @@ from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
 
+# Maximum number of states and events deleted in one transaction
+PURGE_BATCH_SIZE = 1000
+
 
 def purge_old_data(instance, purge_days, repack):
-    """Purge events and states older than purge_days ago."""
-    from .models import States, Events
+    """Purge events and states older than purge_days ago.
+
+    Deletes at most PURGE_BATCH_SIZE states and events per call, each batch
+    in its own transaction. Returns True when nothing is left to purge, the
+    caller is expected to call again otherwise.
+    """
+    from .models import States, Events, StateAttributes
     from sqlalchemy import func
 
     purge_before = dt_util.utcnow() - timedelta(days=purge_days)
     _LOGGER.debug("Purging events before %s", purge_before)
 
     with session_scope(session=instance.get_session()) as session:
-        delete_states = session.query(States) \
-                            .filter((States.last_updated < purge_before))
-
         # For each entity, the most recent state is protected from deletion
         # s.t. we can properly restore state even if the entity has not been
         # updated in a long time
-        protected_states = session.query(func.max(States.state_id)) \
-            .group_by(States.entity_id).all()
-
-        protected_state_ids = tuple(state[0] for state in protected_states)
-
-        if protected_state_ids:
-            delete_states = delete_states \
-                .filter(~States.state_id.in_(protected_state_ids))
-
-        deleted_rows = delete_states.delete(synchronize_session=False)
-        _LOGGER.debug("Deleted %s states", deleted_rows)
+        protected_states = session.query(
+            func.max(States.state_id).label('state_id')) \
+            .group_by(States.entity_id).subquery()
+
+        state_ids = [state[0] for state in session.query(States.state_id)
+                     .outerjoin(protected_states,
+                                States.state_id == protected_states.c.state_id)
+                     .filter(States.last_updated < purge_before)
+                     .filter(protected_states.c.state_id.is_(None))
+                     .limit(PURGE_BATCH_SIZE)]
+
+        if state_ids:
+            session.query(States) \
+                .filter(States.state_id.in_(state_ids)) \
+                .delete(synchronize_session=False)
+        _LOGGER.debug("Deleted %s states", len(state_ids))
 
-        delete_events = session.query(Events) \
-            .filter((Events.time_fired < purge_before))
-
-        # We also need to protect the events belonging to the protected states.
-        # Otherwise, if the SQL server has "ON DELETE CASCADE" as default, it
-        # will delete the protected state when deleting its associated
-        # event. Also, we would be producing NULLed foreign keys otherwise.
-        if protected_state_ids:
-            protected_events = session.query(States.event_id) \
-                .filter(States.state_id.in_(protected_state_ids)) \
-                .filter(States.event_id.isnot(None)) \
-                .all()
-
-            protected_event_ids = tuple(state[0] for state in protected_events)
+    with session_scope(session=instance.get_session()) as session:
+        # Events still linked to a state are kept. Otherwise, if the SQL
+        # server has "ON DELETE CASCADE" as default, it will delete the
+        # protected state when deleting its associated event. Also, we would
+        # be producing NULLed foreign keys otherwise.
+        event_ids = [event[0] for event in session.query(Events.event_id)
+                     .filter(Events.time_fired < purge_before)
+                     .filter(~session.query(States.state_id)
+                             .filter(States.event_id == Events.event_id)
+                             .exists())
+                     .limit(PURGE_BATCH_SIZE)]
+
+        if event_ids:
+            session.query(Events) \
+                .filter(Events.event_id.in_(event_ids)) \
+                .delete(synchronize_session=False)
+        _LOGGER.debug("Deleted %s events", len(event_ids))
+
+    if len(state_ids) == PURGE_BATCH_SIZE or \
+            len(event_ids) == PURGE_BATCH_SIZE:
+        return False
 
-            if protected_event_ids:
-                delete_events = delete_events \
-                    .filter(~Events.event_id.in_(protected_event_ids))
+    with session_scope(session=instance.get_session()) as session:
+        # Shared attributes no longer referenced by any state
+        used_attributes = session.query(States.attributes_id) \
+            .filter(States.attributes_id.isnot(None))
 
-        deleted_rows = delete_events.delete(synchronize_session=False)
-        _LOGGER.debug("Deleted %s events", deleted_rows)
+        deleted_rows = session.query(StateAttributes) \
+            .filter(~StateAttributes.attributes_id.in_(
+                used_attributes.subquery())) \
+            .delete(synchronize_session=False)
+        _LOGGER.debug("Deleted %s state attributes", deleted_rows)
 
     # Execute sqlite vacuum command to free up space on disk
     _LOGGER.debug("DB engine driver: %s", instance.engine.driver)
@@ -68,3 +89,5 @@ def purge_old_data(instance, purge_days, repack):
             instance.engine.execute("VACUUM")
         except exc.OperationalError as err:
             _LOGGER.error("Error vacuuming SQLite: %s.", err)
+
+    return True
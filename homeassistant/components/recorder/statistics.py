@@ -0,0 +1,155 @@
+"""Long-term statistics compiled from the recorded states."""
+from collections import defaultdict
+from datetime import timedelta
+import logging
+
+import homeassistant.util.dt as dt_util
+
+from .util import session_scope, execute
+
+_LOGGER = logging.getLogger(__name__)
+
+PERIOD_HOUR = 'hour'
+PERIOD_DAY = 'day'
+
+# Domains whose numeric states are compiled into statistics
+STATISTICS_DOMAINS = ('sensor',)
+
+# How far back missing hours are compiled, older states are purged anyway
+MAX_BACKFILL = timedelta(days=10)
+
+
+def compile_statistics(instance, utc_now):
+    """Compile the statistics of the full hours before utc_now.
+
+    Continues after the last compiled hour, so hours missed while Home
+    Assistant was not running are compiled as well. A day is compiled from
+    its hours once its last hour is done.
+    """
+    from .models import Statistics
+    from sqlalchemy import func
+
+    end = utc_now.replace(minute=0, second=0, microsecond=0)
+
+    with session_scope(session=instance.get_session()) as session:
+        last = session.query(func.max(Statistics.start)) \
+            .filter(Statistics.period == PERIOD_HOUR).scalar()
+
+    if last is None:
+        start = end - timedelta(hours=1)
+    else:
+        start = dt_util.as_utc(last) if last.tzinfo else \
+            dt_util.UTC.localize(last)
+        start = max(start + timedelta(hours=1), end - MAX_BACKFILL)
+
+    while start < end:
+        with session_scope(session=instance.get_session()) as session:
+            _compile_hour(session, start)
+
+            if (start + timedelta(hours=1)).hour == 0:
+                _compile_day(session, start.replace(hour=0))
+
+        start += timedelta(hours=1)
+
+
+def _compile_hour(session, start):
+    """Compile the hourly statistics of the states in the hour at start."""
+    from .models import States, Statistics
+
+    query = session.query(States.entity_id, States.state) \
+        .filter(States.domain.in_(STATISTICS_DOMAINS)) \
+        .filter(States.last_updated >= start) \
+        .filter(States.last_updated < start + timedelta(hours=1))
+
+    values = defaultdict(list)
+
+    for entity_id, state in query:
+        try:
+            value = float(state)
+        except ValueError:
+            continue
+
+        values[entity_id].append(value)
+
+    rows = [{
+        'entity_id': entity_id,
+        'period': PERIOD_HOUR,
+        'start': start,
+        'mean': sum(entity_values) / len(entity_values),
+        'min': min(entity_values),
+        'max': max(entity_values),
+        'count': len(entity_values),
+    } for entity_id, entity_values in values.items()]
+
+    # An hour without numeric states is still recorded as compiled
+    if not rows:
+        rows.append({
+            'entity_id': None, 'period': PERIOD_HOUR, 'start': start,
+            'mean': None, 'min': None, 'max': None, 'count': 0})
+
+    session.execute(Statistics.__table__.insert(), rows)
+    _LOGGER.debug("Compiled statistics of %d entities for %s",
+                  len(values), start)
+
+
+def _compile_day(session, start):
+    """Compile the daily statistics from the hours of the day at start."""
+    from .models import Statistics
+
+    days = {}
+
+    for hour in session.query(Statistics) \
+            .filter(Statistics.period == PERIOD_HOUR) \
+            .filter(Statistics.entity_id.isnot(None)) \
+            .filter(Statistics.start >= start) \
+            .filter(Statistics.start < start + timedelta(days=1)):
+        day = days.get(hour.entity_id)
+
+        if day is None:
+            days[hour.entity_id] = {
+                'entity_id': hour.entity_id,
+                'period': PERIOD_DAY,
+                'start': start,
+                'mean': hour.mean * hour.count,
+                'min': hour.min,
+                'max': hour.max,
+                'count': hour.count,
+            }
+            continue
+
+        day['mean'] += hour.mean * hour.count
+        day['min'] = min(day['min'], hour.min)
+        day['max'] = max(day['max'], hour.max)
+        day['count'] += hour.count
+
+    for day in days.values():
+        day['mean'] /= day['count']
+
+    if days:
+        session.execute(Statistics.__table__.insert(), list(days.values()))
+
+
+def statistics_during_period(hass, start_time, end_time=None,
+                             entity_ids=None, period=PERIOD_HOUR):
+    """Return the statistics per entity with a start in the period."""
+    from .models import Statistics
+
+    with session_scope(hass=hass) as session:
+        query = session.query(Statistics) \
+            .filter(Statistics.period == period) \
+            .filter(Statistics.entity_id.isnot(None)) \
+            .filter(Statistics.start >= start_time)
+
+        if end_time is not None:
+            query = query.filter(Statistics.start < end_time)
+
+        if entity_ids is not None:
+            query = query.filter(Statistics.entity_id.in_(entity_ids))
+
+        result = defaultdict(list)
+
+        for stats in execute(
+                query.order_by(Statistics.entity_id, Statistics.start)):
+            result[stats['entity_id']].append(stats)
+
+    return result
@@ -153,6 +153,16 @@ def event_message(iden, event):
     }
 
 
+def encoded_event_message(iden, event):
+    """Return an event message encoded as JSON.
+
+    The event itself is encoded once, no matter how many connections
+    are subscribed to it.
+    """
+    return '{{"id": {}, "type": "{}", "event": {}}}'.format(
+        iden, TYPE_EVENT, event.as_json())
+
+
 def error_message(iden, code, message):
     """Return an error result message."""
     return {
@@ -184,6 +194,13 @@ def result_message(iden, result=None):
     }
 
 
+def encoded_states_result_message(iden, states):
+    """Return a success result message of states encoded as JSON."""
+    return '{{"id": {}, "type": "{}", "success": true, "result": [{}]}}' \
+        .format(iden, TYPE_RESULT, ','.join(
+            state.as_json() for state in states))
+
+
 @bind_hass
 @callback
 def async_register_command(hass, command, handler, schema):
@@ -261,7 +278,11 @@ class ActiveConnection:
                     break
                 self.debug("Sending", message)
                 try:
-                    await self.wsock.send_json(message, dumps=JSON_DUMP)
+                    if isinstance(message, str):
+                        # Already encoded
+                        await self.wsock.send_str(message)
+                    else:
+                        await self.wsock.send_json(message, dumps=JSON_DUMP)
                 except TypeError as err:
                     _LOGGER.error('Unable to serialize to JSON: %s\n%s',
                                   err, message)
@@ -440,7 +461,8 @@ def handle_subscribe_events(hass, connection, msg):
         if event.event_type == EVENT_TIME_CHANGED:
             return
 
-        connection.send_message_outside(event_message(msg['id'], event))
+        connection.send_message_outside(
+            encoded_event_message(msg['id'], event))
 
     connection.event_listeners[msg['id']] = hass.bus.async_listen(
         msg['event_type'], forward_events)
@@ -485,7 +507,7 @@ def handle_get_states(hass, connection, msg):
 
     Async friendly.
     """
-    connection.to_write.put_nowait(result_message(
+    connection.to_write.put_nowait(encoded_states_result_message(
         msg['id'], hass.states.async_all()))
 
 
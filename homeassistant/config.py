@@ -19,11 +19,12 @@ from homeassistant.const import (
     CONF_TIME_ZONE, CONF_ELEVATION, CONF_UNIT_SYSTEM_METRIC,
     CONF_UNIT_SYSTEM_IMPERIAL, CONF_TEMPERATURE_UNIT, TEMP_CELSIUS,
     __version__, CONF_CUSTOMIZE, CONF_CUSTOMIZE_DOMAIN, CONF_CUSTOMIZE_GLOB,
-    CONF_WHITELIST_EXTERNAL_DIRS, CONF_AUTH_PROVIDERS)
-from homeassistant.core import callback, DOMAIN as CONF_CORE
+    CONF_WHITELIST_EXTERNAL_DIRS, CONF_AUTH_PROVIDERS, CONF_EXECUTORS)
+from homeassistant.core import (
+    callback, DOMAIN as CONF_CORE, DEFAULT_EXECUTOR_SIZES)
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.loader import get_component, get_platform
-from homeassistant.util.yaml import load_yaml, SECRET_YAML
+from homeassistant.util.yaml import load_yaml, load_yaml_cached, SECRET_YAML
 import homeassistant.helpers.config_validation as cv
 from homeassistant.util import dt as date_util, location as loc_util
 from homeassistant.util.unit_system import IMPERIAL_SYSTEM, METRIC_SYSTEM
@@ -38,6 +39,7 @@ RE_ASCII = re.compile(r"\033\[[^m]*m")
 HA_COMPONENT_URL = '[{}](https://home-assistant.io/components/{}/)'
 YAML_CONFIG_FILE = 'configuration.yaml'
 VERSION_FILE = '.HA_VERSION'
+CONFIG_CACHE_FILE = '.config_cache'
 CONFIG_DIR_NAME = '.homeassistant'
 DATA_CUSTOMIZE = 'hass_customize'
 
@@ -159,7 +161,11 @@ CORE_CONFIG_SCHEMA = CUSTOMIZE_CONFIG_SCHEMA.extend({
         vol.All(cv.ensure_list, [vol.IsDir()]),
     vol.Optional(CONF_PACKAGES, default={}): PACKAGES_CONFIG_SCHEMA,
     vol.Optional(CONF_AUTH_PROVIDERS):
-        vol.All(cv.ensure_list, [auth.AUTH_PROVIDER_SCHEMA])
+        vol.All(cv.ensure_list, [auth.AUTH_PROVIDER_SCHEMA]),
+    vol.Optional(CONF_EXECUTORS): {
+        vol.In(DEFAULT_EXECUTOR_SIZES):
+            vol.All(vol.Coerce(int), vol.Range(min=1)),
+    },
 })
 
 
@@ -278,7 +284,8 @@ async def async_hass_config_yaml(hass):
     """
     def _load_hass_yaml_config():
         path = find_config_file(hass.config.config_dir)
-        conf = load_yaml_config_file(path)
+        conf = load_yaml_config_file(
+            path, hass.config.path(CONFIG_CACHE_FILE))
         return conf
 
     conf = await hass.async_add_job(_load_hass_yaml_config)
@@ -295,13 +302,19 @@ def find_config_file(config_dir):
     return config_path if os.path.isfile(config_path) else None
 
 
-def load_yaml_config_file(config_path):
+def load_yaml_config_file(config_path, cache_path=None):
     """Parse a YAML configuration file.
 
+    If a cache path is given, the parsed file is reused until the file or
+    one of the files it includes changes.
+
     This method needs to run in an executor.
     """
     try:
-        conf_dict = load_yaml(config_path)
+        if cache_path is None:
+            conf_dict = load_yaml(config_path)
+        else:
+            conf_dict = load_yaml_cached(config_path, cache_path)
     except FileNotFoundError as err:
         raise HomeAssistantError("Config file not found: {}".format(
             getattr(err, 'filename', err)))
@@ -428,6 +441,10 @@ async def async_process_ha_core_config(hass, config):
     if CONF_TIME_ZONE in config:
         set_time_zone(config.get(CONF_TIME_ZONE))
 
+    # Sizes of the executors that have not been used yet
+    if CONF_EXECUTORS in config:
+        hass.executor_sizes.update(config[CONF_EXECUTORS])
+
     # Init whitelist external dir
     hac.whitelist_external_dirs = set((hass.config.path('www'),))
     if CONF_WHITELIST_EXTERNAL_DIRS in config:
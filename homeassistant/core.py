@@ -8,6 +8,7 @@ of entities and react to changes.
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import enum
+import json
 import logging
 import os
 import pathlib
@@ -52,6 +53,20 @@ ENTITY_ID_PATTERN = re.compile(r"^(\w+)\.(\w+)$")
 # How long to wait till things that run on startup have to finish.
 TIMEOUT_EVENT_START = 15
 
+# Executors for the blocking jobs of a workload, see async_add_executor_job
+EXECUTOR_POLLING = 'polling'
+EXECUTOR_DATABASE = 'database'
+EXECUTOR_CPU = 'cpu'
+EXECUTOR_SETUP = 'setup'
+
+# Maximum number of threads per executor, None is the Python default
+DEFAULT_EXECUTOR_SIZES = {
+    EXECUTOR_POLLING: 20,
+    EXECUTOR_DATABASE: 4,
+    EXECUTOR_CPU: 2,
+    EXECUTOR_SETUP: None,
+}
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -123,6 +138,9 @@ class HomeAssistant(object):
 
         self.executor = ThreadPoolExecutor(**executor_opts)
         self.loop.set_default_executor(self.executor)
+        # Executors per workload, created when first used
+        self.executors = {}
+        self.executor_sizes = dict(DEFAULT_EXECUTOR_SIZES)
         self.loop.set_exception_handler(async_loop_exception_handler)
         self._pending_tasks = []
         self._track_task = True
@@ -134,6 +152,8 @@ class HomeAssistant(object):
         self.helpers = loader.Helpers(self)
         # This is a dictionary that any component can store any data on.
         self.data = {}
+        # Records the durations of jobs, set by the instrumentation component
+        self.instrumentation = None
         self.state = CoreState.not_running
         self.exit_code = None
 
@@ -225,6 +245,36 @@ class HomeAssistant(object):
 
         return task
 
+    @callback
+    def async_add_executor_job(self, name: str, target: Callable[..., Any],
+                               *args: Any) -> asyncio.Future:
+        """Run a blocking job in the executor of a workload.
+
+        Keeps a slow workload from starving the others. This method must be
+        run in the event loop.
+
+        name: name of the executor, one of the EXECUTOR_* constants.
+        target: target to call.
+        args: parameters for method to call.
+        """
+        executor = self.executors.get(name)
+
+        if executor is None:
+            executor_opts = {'max_workers': self.executor_sizes[name]}
+            if sys.version_info[:2] >= (3, 6):
+                executor_opts['thread_name_prefix'] = '{}Worker'.format(
+                    name.capitalize())
+
+            executor = self.executors[name] = ThreadPoolExecutor(
+                **executor_opts)
+
+        task = self.loop.run_in_executor(executor, target, *args)
+
+        if self._track_task:
+            self._pending_tasks.append(task)
+
+        return task
+
     @callback
     def async_track_tasks(self):
         """Track tasks so you can wait for all tasks to be done."""
@@ -289,6 +339,9 @@ class HomeAssistant(object):
         await self.async_block_till_done()
         self.executor.shutdown()
 
+        for executor in self.executors.values():
+            executor.shutdown()
+
         self.exit_code = exit_code
         self.loop.stop()
 
@@ -307,7 +360,7 @@ class EventOrigin(enum.Enum):
 class Event(object):
     """Representation of an event within the bus."""
 
-    __slots__ = ['event_type', 'data', 'origin', 'time_fired']
+    __slots__ = ['event_type', 'data', 'origin', 'time_fired', '_json']
 
     def __init__(self, event_type, data=None, origin=EventOrigin.local,
                  time_fired=None):
@@ -316,6 +369,7 @@ class Event(object):
         self.data = data or {}
         self.origin = origin
         self.time_fired = time_fired or dt_util.utcnow()
+        self._json = None
 
     def as_dict(self):
         """Create a dict representation of this Event.
@@ -329,6 +383,16 @@ class Event(object):
             'time_fired': self.time_fired,
         }
 
+    def as_json(self):
+        """Return the JSON representation of this Event.
+
+        Encoded once and shared by all consumers, events are not changed
+        after they are fired. Async friendly.
+        """
+        if self._json is None:
+            self._json = _json_encode(self)
+        return self._json
+
     def __repr__(self):
         """Return the representation."""
         # pylint: disable=maybe-no-member
@@ -401,7 +465,11 @@ class EventBus(object):
         if not listeners:
             return
 
+        instrumentation = self._hass.instrumentation
+
         for func in listeners:
+            if instrumentation is not None:
+                func = instrumentation.wrap_listener(func)
             self._hass.async_add_job(func, event)
 
     def listen(self, event_type, listener):
@@ -515,7 +583,7 @@ class State(object):
     """
 
     __slots__ = ['entity_id', 'state', 'attributes',
-                 'last_changed', 'last_updated']
+                 'last_changed', 'last_updated', '_json']
 
     def __init__(self, entity_id, state, attributes=None, last_changed=None,
                  last_updated=None):
@@ -532,11 +600,18 @@ class State(object):
                 "Invalid state encountered for entity id: {}. "
                 "State max length is 255 characters.").format(entity_id))
 
-        self.entity_id = entity_id.lower()
-        self.state = state
-        self.attributes = MappingProxyType(attributes or {})
+        # Entity ids and state values repeat across many state objects
+        self.entity_id = sys.intern(entity_id.lower())
+        self.state = sys.intern(state)
+
+        if isinstance(attributes, MappingProxyType):
+            # Already read-only, share it with the other state
+            self.attributes = attributes
+        else:
+            self.attributes = MappingProxyType(attributes or {})
         self.last_updated = last_updated or dt_util.utcnow()
         self.last_changed = last_changed or self.last_updated
+        self._json = None
 
     @property
     def domain(self):
@@ -569,6 +644,16 @@ class State(object):
                 'last_changed': self.last_changed,
                 'last_updated': self.last_updated}
 
+    def as_json(self):
+        """Return the JSON representation of the State.
+
+        Encoded once and shared by all consumers, states are replaced and
+        not changed once they are in the state machine. Async friendly.
+        """
+        if self._json is None:
+            self._json = _json_encode(self)
+        return self._json
+
     @classmethod
     def from_dict(cls, json_dict):
         """Initialize a state from a dict.
@@ -611,12 +696,21 @@ class State(object):
             dt_util.as_local(self.last_changed).isoformat())
 
 
+def _json_encode(obj):
+    """Encode a Home Assistant object as JSON."""
+    from homeassistant.remote import JSONEncoder
+
+    return json.dumps(obj, sort_keys=True, cls=JSONEncoder)
+
+
 class StateMachine(object):
     """Helper class that tracks the state of different entities."""
 
     def __init__(self, bus, loop):
         """Initialize state machine."""
         self._states = {}
+        # Domain -> entity id -> state of all states in that domain
+        self._domain_index = {}
         self._bus = bus
         self._loop = loop
 
@@ -636,22 +730,24 @@ class StateMachine(object):
         if domain_filter is None:
             return list(self._states.keys())
 
-        domain_filter = domain_filter.lower()
+        return list(self._domain_index.get(domain_filter.lower(), ()))
 
-        return [state.entity_id for state in self._states.values()
-                if state.domain == domain_filter]
-
-    def all(self):
+    def all(self, domain_filter=None):
         """Create a list of all states."""
-        return run_callback_threadsafe(self._loop, self.async_all).result()
+        return run_callback_threadsafe(
+            self._loop, self.async_all, domain_filter).result()
 
     @callback
-    def async_all(self):
-        """Create a list of all states.
+    def async_all(self, domain_filter=None):
+        """Create a list of all states, optionally of a single domain.
 
         This method must be run in the event loop.
         """
-        return list(self._states.values())
+        if domain_filter is None:
+            return list(self._states.values())
+
+        return list(
+            self._domain_index.get(domain_filter.lower(), {}).values())
 
     def get(self, entity_id):
         """Retrieve state of entity_id or None if not found.
@@ -690,6 +786,12 @@ class StateMachine(object):
         if old_state is None:
             return False
 
+        domain_states = self._domain_index[old_state.domain]
+        del domain_states[entity_id]
+
+        if not domain_states:
+            del self._domain_index[old_state.domain]
+
         self._bus.async_fire(EVENT_STATE_CHANGED, {
             'entity_id': entity_id,
             'old_state': old_state,
@@ -735,8 +837,13 @@ class StateMachine(object):
             return
 
         last_changed = old_state.last_changed if same_state else None
+
+        if same_attr:
+            attributes = old_state.attributes
+
         state = State(entity_id, new_state, attributes, last_changed)
         self._states[entity_id] = state
+        self._domain_index.setdefault(state.domain, {})[entity_id] = state
         self._bus.async_fire(EVENT_STATE_CHANGED, {
             'entity_id': entity_id,
             'old_state': old_state,
@@ -993,6 +1100,7 @@ class ServiceRegistry(object):
             return
 
         service_call = ServiceCall(domain, service, service_data, call_id)
+        start = monotonic()
 
         try:
             if service_handler.is_callback:
@@ -1011,6 +1119,11 @@ class ServiceRegistry(object):
         except Exception:  # pylint: disable=broad-except
             _LOGGER.exception('Error executing service %s', service_call)
 
+        if self._hass.instrumentation is not None:
+            self._hass.instrumentation.record(
+                'service', '{}.{}'.format(domain, service),
+                monotonic() - start)
+
 
 class Config(object):
     """Configuration settings for Home Assistant."""
@@ -11,7 +11,7 @@ from homeassistant.const import (
     ATTR_UNIT_OF_MEASUREMENT, DEVICE_DEFAULT_NAME, STATE_OFF, STATE_ON,
     STATE_UNAVAILABLE, STATE_UNKNOWN, TEMP_CELSIUS, TEMP_FAHRENHEIT,
     ATTR_ENTITY_PICTURE, ATTR_SUPPORTED_FEATURES, ATTR_DEVICE_CLASS)
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import EXECUTOR_POLLING, HomeAssistant, callback
 from homeassistant.config import DATA_CUSTOMIZE
 from homeassistant.exceptions import NoEntitySpecifiedError
 from homeassistant.util import ensure_unique_string, slugify
@@ -80,6 +80,13 @@ class Entity(object):
     # Process updates in parallel
     parallel_updates = None
 
+    # Coalescing of state writes, see state_coalesce_window
+    _last_write = None
+    _last_state_change = None
+    _written_state = None
+    _pending_write = None
+    _pending_write_timer = None
+
     # Name in the entity registry
     registry_name = None
 
@@ -171,6 +178,17 @@ class Entity(object):
         """Flag supported features."""
         return None
 
+    @property
+    def state_coalesce_window(self) -> Optional[float]:
+        """Return the seconds in which state writes are coalesced.
+
+        Writes within the window after the previous write are collapsed to
+        the latest one, which is written at the end of the window. A change
+        of the state value is written right away if the state value did not
+        change within the window. None writes every update.
+        """
+        return None
+
     def update(self):
         """Retrieve latest state.
 
@@ -198,6 +216,8 @@ class Entity(object):
             raise NoEntitySpecifiedError(
                 "No entity id specified for entity {}".format(self.name))
 
+        update_start = timer()
+
         # update entity data
         if force_refresh:
             try:
@@ -283,8 +303,56 @@ class Entity(object):
             # Could not convert state to float
             pass
 
-        self.hass.states.async_set(
-            self.entity_id, state, attr, self.force_update)
+        if self.hass.instrumentation is not None:
+            self.hass.instrumentation.record(
+                'entity_update', self.entity_id, timer() - update_start)
+
+        window = self.state_coalesce_window
+
+        if window is None:
+            self.hass.states.async_set(
+                self.entity_id, state, attr, self.force_update)
+            return
+
+        now = self.hass.loop.time()
+        self._pending_write = (state, attr, self.force_update)
+
+        if (self._last_write is None or now - self._last_write >= window or
+                (state != self._written_state and
+                 now - self._last_state_change >= window)):
+            self._async_write_pending()
+        elif self._pending_write_timer is None:
+            self._pending_write_timer = self.hass.loop.call_at(
+                self._last_write + window, self._async_write_pending_timer)
+
+    @callback
+    def _async_write_pending(self):
+        """Write the latest coalesced state to the state machine."""
+        if self._pending_write_timer is not None:
+            self._pending_write_timer.cancel()
+            self._pending_write_timer = None
+
+        state, attr, force_update = self._pending_write
+        self._pending_write = None
+        self._last_write = self.hass.loop.time()
+
+        if state != self._written_state:
+            self._written_state = state
+            self._last_state_change = self._last_write
+
+        self.hass.states.async_set(self.entity_id, state, attr, force_update)
+
+    @callback
+    def _async_write_pending_timer(self):
+        """Write the coalesced state at the end of the window."""
+        self._pending_write_timer = None
+
+        # Do not bring back an entity that has been removed meanwhile
+        if self.hass.states.get(self.entity_id) is None:
+            self._pending_write = None
+            return
+
+        self._async_write_pending()
 
     def schedule_update_ha_state(self, force_refresh=False):
         """Schedule an update ha state change task.
@@ -324,7 +392,8 @@ class Entity(object):
                 # pylint: disable=no-member
                 yield from self.async_update()
             else:
-                yield from self.hass.async_add_job(self.update)
+                yield from self.hass.async_add_executor_job(
+                    EXECUTOR_POLLING, self.update)
         finally:
             self._update_staged = False
             if warning:
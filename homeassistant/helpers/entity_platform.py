@@ -1,14 +1,18 @@
 """Class to manage the entities for a single platform."""
 import asyncio
+from timeit import default_timer as timer
 
 from homeassistant.const import DEVICE_DEFAULT_NAME
 from homeassistant.core import callback, valid_entity_id, split_entity_id
 from homeassistant.exceptions import HomeAssistantError, PlatformNotReady
+from homeassistant.setup import PHASE_SETUP, async_get_setup_timeline
 from homeassistant.util.async_ import (
     run_callback_threadsafe, run_coroutine_threadsafe)
 
-from .event import async_track_time_interval, async_call_later
+from .event import async_call_later
 from .entity_registry import async_get_registry
+from .poll_scheduler import (
+    DEFAULT_PLATFORM_POLL_BUDGET, async_get_poll_scheduler)
 
 SLOW_SETUP_WARNING = 10
 SLOW_SETUP_MAX_WAIT = 60
@@ -43,18 +47,21 @@ class EntityPlatform(object):
         self.config_entry = None
         self.entities = {}
         self._tasks = []
-        # Method to cancel the state change listener
-        self._async_unsub_polling = None
+        # Methods to stop polling the entities
+        self._async_unsub_polling = {}
         # Method to cancel the retry of setup
         self._async_cancel_retry_setup = None
-        self._process_updates = asyncio.Lock(loop=hass.loop)
 
         # Platform is None for the EntityComponent "catch-all" EntityPlatform
         # which powers entity_component.add_entities
         if platform is None:
             self.parallel_updates = None
+            self.poll_budget = DEFAULT_PLATFORM_POLL_BUDGET
             return
 
+        self.poll_budget = getattr(
+            platform, 'POLL_BUDGET', DEFAULT_PLATFORM_POLL_BUDGET)
+
         # Async platforms do all updates in parallel by default
         if hasattr(platform, 'async_setup_platform'):
             default_parallel_updates = 0
@@ -120,6 +127,8 @@ class EntityPlatform(object):
             SLOW_SETUP_WARNING, logger.warning,
             "Setup of platform %s is taking over %s seconds.",
             self.platform_name, SLOW_SETUP_WARNING)
+        timeline = async_get_setup_timeline(hass)
+        start = timer()
 
         try:
             task = async_create_setup_task()
@@ -166,6 +175,7 @@ class EntityPlatform(object):
                 "Error while setting up platform %s", self.platform_name)
             return False
         finally:
+            timeline.add(full_name, PHASE_SETUP, start, timer())
             warn_task.cancel()
 
     def _schedule_add_entities(self, new_entities, update_before_add=False):
@@ -219,15 +229,6 @@ class EntityPlatform(object):
         await asyncio.wait(tasks, loop=self.hass.loop)
         self.async_entities_added_callback()
 
-        if self._async_unsub_polling is not None or \
-           not any(entity.should_poll for entity
-                   in self.entities.values()):
-            return
-
-        self._async_unsub_polling = async_track_time_interval(
-            self.hass, self._update_entity_states, self.scan_interval
-        )
-
     async def _async_add_entity(self, entity, update_before_add,
                                 component_entities, registry):
         """Helper method to add an entity to the platform."""
@@ -315,6 +316,11 @@ class EntityPlatform(object):
 
         await entity.async_update_ha_state()
 
+        if entity.should_poll:
+            self._async_unsub_polling[entity.entity_id] = \
+                async_get_poll_scheduler(self.hass).async_add_entity(
+                    self, entity, self.scan_interval, self.poll_budget)
+
     async def async_reset(self):
         """Remove all entities and reset data.
 
@@ -332,51 +338,19 @@ class EntityPlatform(object):
 
         await asyncio.wait(tasks, loop=self.hass.loop)
 
-        if self._async_unsub_polling is not None:
-            self._async_unsub_polling()
-            self._async_unsub_polling = None
-
     async def async_remove_entity(self, entity_id):
         """Remove entity id from platform."""
         await self._async_remove_entity(entity_id)
 
-        # Clean up polling job if no longer needed
-        if (self._async_unsub_polling is not None and
-                not any(entity.should_poll for entity
-                        in self.entities.values())):
-            self._async_unsub_polling()
-            self._async_unsub_polling = None
-
     async def _async_remove_entity(self, entity_id):
         """Remove entity id from platform."""
         entity = self.entities.pop(entity_id)
 
+        unsub_polling = self._async_unsub_polling.pop(entity_id, None)
+        if unsub_polling is not None:
+            unsub_polling()
+
         if hasattr(entity, 'async_will_remove_from_hass'):
             await entity.async_will_remove_from_hass()
 
         self.hass.states.async_remove(entity_id)
-
-    async def _update_entity_states(self, now):
-        """Update the states of all the polling entities.
-
-        To protect from flooding the executor, we will update async entities
-        in parallel and other entities sequential.
-
-        This method must be run in the event loop.
-        """
-        if self._process_updates.locked():
-            self.logger.warning(
-                "Updating %s %s took longer than the scheduled update "
-                "interval %s", self.platform_name, self.domain,
-                self.scan_interval)
-            return
-
-        async with self._process_updates:
-            tasks = []
-            for entity in self.entities.values():
-                if not entity.should_poll:
-                    continue
-                tasks.append(entity.async_update_ha_state(True))
-
-            if tasks:
-                await asyncio.wait(tasks, loop=self.hass.loop)
@@ -1,6 +1,9 @@
 """Helpers for listening to events."""
-from datetime import timedelta
+from calendar import monthrange
+from datetime import datetime, timedelta, MAXYEAR
 import functools as ft
+import heapq
+import logging
 
 from homeassistant.loader import bind_hass
 from homeassistant.helpers.sun import get_astral_event_next
@@ -10,6 +13,19 @@ from ..const import (
 from ..util import dt as dt_util
 from ..util.async_ import run_callback_threadsafe
 
+DATA_TIME_SCHEDULER = 'event_time_scheduler'
+DATA_TIME_PATTERNS = 'event_time_patterns'
+DATA_STATE_CHANGE_ROUTER = 'event_state_change_router'
+
+# How many years ahead we look for the next match of a time pattern
+TIME_PATTERN_HORIZON = 100
+
+# Possible values of month, day, hour, minute and second
+_TIME_FIELD_RANGES = (
+    range(1, 13), range(1, 32), range(24), range(60), range(60))
+
+_LOGGER = logging.getLogger(__name__)
+
 # PyLint does not like the use of threaded_listener_factory
 # pylint: disable=invalid-name
 
@@ -63,10 +79,6 @@ def async_track_state_change(hass, entity_ids, action, from_state=None,
     @callback
     def state_change_listener(event):
         """Handle specific state changes."""
-        if entity_ids != MATCH_ALL and \
-           event.data.get('entity_id') not in entity_ids:
-            return
-
         old_state = event.data.get('old_state')
         if old_state is not None:
             old_state = old_state.state
@@ -80,7 +92,8 @@ def async_track_state_change(hass, entity_ids, action, from_state=None,
                                event.data.get('old_state'),
                                event.data.get('new_state'))
 
-    return hass.bus.async_listen(EVENT_STATE_CHANGED, state_change_listener)
+    return _async_get_router(hass).async_add(
+        entity_ids, state_change_listener)
 
 
 track_state_change = threaded_listener_factory(async_track_state_change)
@@ -89,28 +102,70 @@ track_state_change = threaded_listener_factory(async_track_state_change)
 @callback
 @bind_hass
 def async_track_template(hass, template, action, variables=None):
-    """Add a listener that track state changes with template condition."""
-    from . import condition
+    """Add a listener that track state changes with template condition.
+
+    The listener tracks the entities and domains the template accessed the
+    last time it was rendered.
+    """
+    router = _async_get_router(hass)
 
     # Local variable to keep track of if the action has already been triggered
     already_triggered = False
+    tracked = None
+    remove_listener = None
+
+    @callback
+    def render_and_track():
+        """Render the template and track the states it accessed."""
+        nonlocal tracked, remove_listener
+        info = template.async_render_to_info(variables)
+
+        # Templates reading no states, like the ones using now(), are
+        # rendered on every state change
+        if info.all_states or not (info.entities or info.domains):
+            track = (MATCH_ALL, ())
+        else:
+            track = (frozenset(info.entities), frozenset(info.domains))
+
+        if track != tracked:
+            if remove_listener is not None:
+                remove_listener()
+            tracked = track
+            remove_listener = router.async_add(
+                track[0], template_condition_listener, track[1])
+
+        return info
 
     @callback
-    def template_condition_listener(entity_id, from_s, to_s):
+    def template_condition_listener(event):
         """Check if condition is correct and run action."""
         nonlocal already_triggered
-        template_result = condition.async_template(hass, template, variables)
+        info = render_and_track()
+
+        if info.exception is not None:
+            _LOGGER.error("Error during template condition: %s",
+                          info.exception)
+            template_result = False
+        else:
+            template_result = info.result.lower() == 'true'
 
         # Check to see if template returns true
         if template_result and not already_triggered:
             already_triggered = True
-            hass.async_run_job(action, entity_id, from_s, to_s)
+            hass.async_run_job(action, event.data.get('entity_id'),
+                               event.data.get('old_state'),
+                               event.data.get('new_state'))
         elif not template_result:
             already_triggered = False
 
-    return async_track_state_change(
-        hass, template.extract_entities(variables),
-        template_condition_listener)
+    render_and_track()
+
+    @callback
+    def async_remove():
+        """Remove the listener."""
+        remove_listener()
+
+    return async_remove
 
 
 track_template = threaded_listener_factory(async_track_template)
@@ -192,28 +247,12 @@ def async_track_point_in_utc_time(hass, action, point_in_time):
     # Ensure point_in_time is UTC
     point_in_time = dt_util.as_utc(point_in_time)
 
-    @callback
-    def point_in_time_listener(event):
-        """Listen for matching time_changed events."""
-        now = event.data[ATTR_NOW]
+    scheduler = hass.data.get(DATA_TIME_SCHEDULER)
 
-        if now < point_in_time or hasattr(point_in_time_listener, 'run'):
-            return
+    if scheduler is None:
+        scheduler = hass.data[DATA_TIME_SCHEDULER] = _TimeScheduler(hass)
 
-        # Set variable so that we will never run twice.
-        # Because the event bus might have to wait till a thread comes
-        # available to execute this listener it might occur that the
-        # listener gets lined up twice to be executed. This will make
-        # sure the second time it does nothing.
-        point_in_time_listener.run = True
-        async_unsub()
-
-        hass.async_run_job(action, now)
-
-    async_unsub = hass.bus.async_listen(EVENT_TIME_CHANGED,
-                                        point_in_time_listener)
-
-    return async_unsub
+    return scheduler.async_schedule(point_in_time, action)
 
 
 track_point_in_utc_time = threaded_listener_factory(
@@ -334,25 +373,16 @@ def async_track_utc_time_change(hass, action, year=None, month=None, day=None,
         return hass.bus.async_listen(EVENT_TIME_CHANGED, time_change_listener)
 
     pmp = _process_time_match
-    year, month, day = pmp(year), pmp(month), pmp(day)
-    hour, minute, second = pmp(hour), pmp(minute), pmp(second)
-
-    @callback
-    def pattern_time_change_listener(event):
-        """Listen for matching time_changed events."""
-        now = event.data[ATTR_NOW]
+    pattern = _TimePattern(
+        action, (pmp(year), pmp(month), pmp(day), pmp(hour), pmp(minute),
+                 pmp(second)), local)
 
-        if local:
-            now = dt_util.as_local(now)
+    index = hass.data.get(DATA_TIME_PATTERNS)
 
-        # pylint: disable=too-many-boolean-expressions
-        if second(now.second) and minute(now.minute) and hour(now.hour) and \
-           day(now.day) and month(now.month) and year(now.year):
+    if index is None:
+        index = hass.data[DATA_TIME_PATTERNS] = _TimePatternIndex(hass)
 
-            hass.async_run_job(action, now)
-
-    return hass.bus.async_listen(EVENT_TIME_CHANGED,
-                                 pattern_time_change_listener)
+    return index.async_add(pattern)
 
 
 track_utc_time_change = threaded_listener_factory(async_track_utc_time_change)
@@ -370,6 +400,470 @@ def async_track_time_change(hass, action, year=None, month=None, day=None,
 track_time_change = threaded_listener_factory(async_track_time_change)
 
 
+class _TimeScheduler(object):
+    """Keep point in time listeners in a heap ordered by their deadline.
+
+    A single EVENT_TIME_CHANGED listener is registered while listeners are
+    pending, so a time tick only costs a peek at the earliest deadline
+    instead of a call to every pending listener.
+    """
+
+    def __init__(self, hass):
+        """Initialize the scheduler."""
+        self._hass = hass
+        self._heap = []
+        self._counter = 0
+        self._cancelled = 0
+        self._unsub = None
+
+    @callback
+    def async_schedule(self, point_in_time, action):
+        """Schedule action to be called once point_in_time has passed.
+
+        Returns a function that can be called to cancel the action.
+        """
+        self._counter += 1
+        # The counter makes entries with the same deadline fire in the order
+        # they were scheduled and keeps the heap from comparing actions.
+        entry = [point_in_time, self._counter, action]
+        heapq.heappush(self._heap, entry)
+
+        if self._unsub is None:
+            self._unsub = self._hass.bus.async_listen(
+                EVENT_TIME_CHANGED, self._async_time_changed)
+
+        @callback
+        def cancel():
+            """Cancel the scheduled action."""
+            if entry[2] is None:
+                return
+
+            entry[2] = None
+            self._cancelled += 1
+
+            # Cancelled entries are removed lazily when their deadline passes,
+            # rebuild the heap if they start to dominate it.
+            if self._cancelled > len(self._heap) // 2:
+                self._async_compact()
+
+        return cancel
+
+    @callback
+    def _async_compact(self):
+        """Remove all cancelled entries from the heap."""
+        self._heap = [entry for entry in self._heap if entry[2] is not None]
+        heapq.heapify(self._heap)
+        self._cancelled = 0
+
+        if not self._heap and self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _async_time_changed(self, event):
+        """Run the actions that are due."""
+        now = event.data[ATTR_NOW]
+        heap = self._heap
+        due = []
+
+        # Collect before running so that actions scheduling new points in
+        # time are not picked up by this same tick.
+        while heap and heap[0][0] <= now:
+            due.append(heapq.heappop(heap))
+
+        for entry in due:
+            action = entry[2]
+
+            if action is None:
+                self._cancelled = max(self._cancelled - 1, 0)
+                continue
+
+            entry[2] = None
+
+            try:
+                self._hass.async_run_job(action, now)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error running point in time action %s",
+                                  action)
+
+        if not self._heap and self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+            self._cancelled = 0
+
+
+@callback
+def _async_get_router(hass):
+    """Return the state change router, create it if needed."""
+    router = hass.data.get(DATA_STATE_CHANGE_ROUTER)
+
+    if router is None:
+        router = hass.data[DATA_STATE_CHANGE_ROUTER] = \
+            _StateChangeRouter(hass)
+
+    return router
+
+
+class _StateChangeRouter(object):
+    """Route state changed events to the listeners of the changed entity.
+
+    All state change trackers share a single EVENT_STATE_CHANGED listener and
+    are kept per entity id or domain, so a state change only reaches the
+    trackers that are interested in that entity or its domain and the ones
+    tracking MATCH_ALL.
+    """
+
+    def __init__(self, hass):
+        """Initialize the router."""
+        self._hass = hass
+        self._listeners = {}
+        self._domain_listeners = {}
+        self._counter = 0
+        self._unsub = None
+
+    @callback
+    def async_add(self, entity_ids, listener, domains=()):
+        """Add a listener for entity_ids, a tuple of ids or MATCH_ALL.
+
+        The listener is also called for the entities of domains.
+
+        Returns a function that can be called to remove the listener.
+        """
+        keys = (MATCH_ALL,) if entity_ids == MATCH_ALL else set(entity_ids)
+        buckets = [(self._listeners, key) for key in keys] + \
+            [(self._domain_listeners, domain) for domain in set(domains)]
+        self._counter += 1
+        # Listeners are called in the order they were added.
+        entry = [self._counter, listener]
+
+        # Buckets are replaced instead of mutated so that dispatching does
+        # not have to copy them.
+        for listeners, key in buckets:
+            listeners[key] = listeners.get(key, ()) + (entry,)
+
+        if buckets and self._unsub is None:
+            self._unsub = self._hass.bus.async_listen(
+                EVENT_STATE_CHANGED, self._async_state_changed)
+
+        @callback
+        def remove():
+            """Remove the listener."""
+            if entry[1] is None:
+                return
+
+            entry[1] = None
+
+            for listeners, key in buckets:
+                entries = tuple(item for item in listeners[key]
+                                if item is not entry)
+
+                if entries:
+                    listeners[key] = entries
+                else:
+                    listeners.pop(key)
+
+            if not (self._listeners or self._domain_listeners) and \
+                    self._unsub is not None:
+                self._unsub()
+                self._unsub = None
+
+        return remove
+
+    @callback
+    def async_listeners(self):
+        """Return dictionary with entity ids and the number of listeners."""
+        return {key: len(self._listeners[key]) for key in self._listeners}
+
+    @callback
+    def async_domain_listeners(self):
+        """Return dictionary with domains and the number of listeners."""
+        return {key: len(entries)
+                for key, entries in self._domain_listeners.items()}
+
+    @callback
+    def _async_state_changed(self, event):
+        """Call the listeners tracking the changed entity."""
+        entity_id = event.data.get('entity_id')
+        buckets = [self._listeners.get(entity_id),
+                   self._listeners.get(MATCH_ALL)]
+
+        if self._domain_listeners:
+            buckets.append(self._domain_listeners.get(
+                entity_id.split('.', 1)[0]))
+
+        buckets = [entries for entries in buckets if entries is not None]
+
+        if not buckets:
+            return
+
+        if len(buckets) == 1:
+            entries = buckets[0]
+        else:
+            entries = list(heapq.merge(*buckets))
+
+        for entry in entries:
+            listener = entry[1]
+
+            # Removed by a listener that ran before it
+            if listener is None:
+                continue
+
+            try:
+                listener(event)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error running state change listener %s",
+                                  listener)
+
+
+class _TimePattern(object):
+    """Representation of a time pattern listener."""
+
+    __slots__ = ['action', 'matchers', 'local', 'values']
+
+    def __init__(self, action, matchers, local):
+        """Initialize a time pattern.
+
+        matchers is a tuple of year, month, day, hour, minute and second
+        matchers as returned by _process_time_match.
+        """
+        self.action = action
+        self.matchers = matchers
+        self.local = local
+        # Matching months, days, hours, minutes and seconds in ascending
+        # order, None if one of them has no valid value.
+        values = tuple(
+            [value for value in field_range if matcher(value)]
+            for matcher, field_range in zip(matchers[1:], _TIME_FIELD_RANGES))
+        self.values = values if all(values) else None
+
+    def matches(self, now):
+        """Return if now matches the pattern."""
+        year, month, day, hour, minute, second = self.matchers
+        # pylint: disable=too-many-boolean-expressions
+        return (second(now.second) and minute(now.minute) and
+                hour(now.hour) and day(now.day) and month(now.month) and
+                year(now.year))
+
+    def next_match(self, utc_start):
+        """Return first UTC instant at or after utc_start that matches.
+
+        Returns None if nothing matches within TIME_PATTERN_HORIZON years.
+        """
+        if self.values is None:
+            return None
+
+        if not self.local:
+            wall = _find_next_time_match(
+                utc_start.replace(tzinfo=None), self.matchers[0], self.values)
+            return None if wall is None else wall.replace(tzinfo=dt_util.UTC)
+
+        wall = _find_next_time_match(
+            dt_util.as_local(utc_start).replace(tzinfo=None),
+            self.matchers[0], self.values)
+
+        if wall is None:
+            return None
+
+        # Around DST changes a wall clock time can exist twice or not at all,
+        # prefer the earliest interpretation that is not in the past.
+        time_zone = dt_util.DEFAULT_TIME_ZONE
+        utc_start = utc_start.replace(microsecond=0)
+        candidates = sorted(
+            dt_util.as_utc(time_zone.localize(wall, is_dst=is_dst))
+            for is_dst in (True, False))
+
+        for candidate in candidates:
+            if candidate >= utc_start:
+                return candidate
+
+        return candidates[-1]
+
+
+class _TimePatternIndex(object):
+    """Schedule time pattern listeners on the next instant they match.
+
+    Each pattern sits in a heap keyed on the next matching instant, so a time
+    tick only runs the patterns that are due. A due pattern is matched
+    against the tick before it fires, which keeps the old behavior of only
+    firing on ticks that match. If time goes backwards all patterns are
+    anchored again on the new time.
+    """
+
+    def __init__(self, hass):
+        """Initialize the index."""
+        self._hass = hass
+        self._heap = []
+        self._pending = []
+        self._parked = []
+        self._counter = 0
+        self._cancelled = 0
+        self._last_now = None
+        self._unsub = None
+
+    @callback
+    def async_add(self, pattern):
+        """Add a time pattern.
+
+        Returns a function that can be called to remove the pattern.
+        """
+        self._counter += 1
+        # New patterns are anchored on the next time tick they see.
+        entry = [None, self._counter, pattern]
+        self._pending.append(entry)
+
+        if self._unsub is None:
+            self._unsub = self._hass.bus.async_listen(
+                EVENT_TIME_CHANGED, self._async_time_changed)
+
+        @callback
+        def remove():
+            """Remove the time pattern."""
+            if entry[2] is None:
+                return
+
+            entry[2] = None
+            self._cancelled += 1
+
+            if self._cancelled > self._count() // 2:
+                self._async_compact()
+
+        return remove
+
+    def _count(self):
+        """Return number of entries held by the index."""
+        return len(self._heap) + len(self._pending) + len(self._parked)
+
+    @callback
+    def _async_compact(self):
+        """Remove all removed patterns."""
+        self._heap = [entry for entry in self._heap if entry[2] is not None]
+        heapq.heapify(self._heap)
+        self._pending = [entry for entry in self._pending
+                         if entry[2] is not None]
+        self._parked = [entry for entry in self._parked
+                        if entry[2] is not None]
+        self._cancelled = 0
+
+        if not self._count() and self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+            self._last_now = None
+
+    @callback
+    def _async_push(self, entry, utc_start):
+        """Schedule entry on its first match at or after utc_start."""
+        entry[0] = entry[2].next_match(utc_start)
+
+        if entry[0] is None:
+            self._parked.append(entry)
+        else:
+            heapq.heappush(self._heap, entry)
+
+    @callback
+    def _async_time_changed(self, event):
+        """Fire the patterns that match the new time."""
+        now = event.data[ATTR_NOW]
+        utc_now = now if now.tzinfo is not None else dt_util.UTC.localize(now)
+
+        # Time went back or the same time was sent again, recalculate.
+        if self._last_now is not None and utc_now <= self._last_now:
+            self._pending.extend(self._heap)
+            self._pending.extend(self._parked)
+            self._heap = []
+            self._parked = []
+
+        self._last_now = utc_now
+
+        pending = self._pending
+        self._pending = []
+
+        for entry in pending:
+            if entry[2] is not None:
+                self._async_push(entry, utc_now)
+
+        heap = self._heap
+        due = []
+
+        while heap and heap[0][0] <= utc_now:
+            due.append(heapq.heappop(heap))
+
+        for entry in due:
+            pattern = entry[2]
+
+            if pattern is None:
+                self._cancelled = max(self._cancelled - 1, 0)
+                continue
+
+            pattern_now = dt_util.as_local(now) if pattern.local else now
+
+            if not pattern.matches(pattern_now):
+                # Time jumped past the expected match, wait for the next one.
+                self._async_push(entry, utc_now)
+                continue
+
+            self._async_push(entry, utc_now + timedelta(seconds=1))
+
+            try:
+                self._hass.async_run_job(pattern.action, pattern_now)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error running time pattern action %s",
+                                  pattern.action)
+
+
+def _find_next_time_match(start, year, values):
+    """Return first naive datetime at or after start matching the pattern.
+
+    year is the year matcher and values the matching months, days, hours,
+    minutes and seconds of the pattern in ascending order.
+    """
+    start = start.replace(microsecond=0)
+    lower = (start.month, start.day, start.hour, start.minute, start.second)
+    last_year = min(start.year + TIME_PATTERN_HORIZON, MAXYEAR - 1)
+
+    for cur_year in range(start.year, last_year + 1):
+        if not year(cur_year):
+            continue
+
+        fields = _find_next_fields_match(
+            cur_year, values, lower if cur_year == start.year else None, ())
+
+        if fields is not None:
+            return datetime(cur_year, *fields)
+
+    return None
+
+
+def _find_next_fields_match(year, values, lower, fields):
+    """Return the first matching fields of year that are not below lower.
+
+    Fields are walked from month to second, so every step jumps straight to
+    the next value that can match instead of stepping through time.
+    """
+    depth = len(fields)
+
+    if depth == len(values):
+        return fields
+
+    bound = None if lower is None else lower[depth]
+
+    for value in values[depth]:
+        if bound is not None and value < bound:
+            continue
+
+        # Day does not exist in this month
+        if depth == 1 and value > monthrange(year, fields[0])[1]:
+            break
+
+        match = _find_next_fields_match(
+            year, values, lower if value == bound else None,
+            fields + (value,))
+
+        if match is not None:
+            return match
+
+    return None
+
+
 def _process_state_match(parameter):
     """Convert parameter to function that matches input against parameter."""
     if parameter is None or parameter == MATCH_ALL:
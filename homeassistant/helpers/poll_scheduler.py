@@ -0,0 +1,161 @@
+"""Schedule the polling of entities.
+
+Every polling entity is polled on its own grid, shifted by a phase derived
+from its entity id, so the entities of a platform and platforms sharing a
+scan interval do not all poll at the same instant. The number of polls
+running at the same time is limited per platform and over all platforms.
+"""
+import asyncio
+from datetime import timedelta
+import logging
+import zlib
+
+from homeassistant.core import callback
+from homeassistant.loader import bind_hass
+import homeassistant.util.dt as dt_util
+
+from .event import async_track_point_in_utc_time
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_POLL_SCHEDULER = 'poll_scheduler'
+
+# Polls running at the same time over all platforms
+DEFAULT_POLL_BUDGET = 20
+
+# Polls running at the same time per platform, platforms can set POLL_BUDGET
+DEFAULT_PLATFORM_POLL_BUDGET = 5
+
+
+@callback
+@bind_hass
+def async_get_poll_scheduler(hass):
+    """Return the poll scheduler, create it if needed."""
+    scheduler = hass.data.get(DATA_POLL_SCHEDULER)
+
+    if scheduler is None:
+        scheduler = hass.data[DATA_POLL_SCHEDULER] = PollScheduler(
+            hass, DEFAULT_POLL_BUDGET)
+
+    return scheduler
+
+
+def poll_phase(entity_id, interval):
+    """Return the offset of the polls of an entity within the interval."""
+    millis = int(interval.total_seconds() * 1000)
+
+    if millis <= 0:
+        return timedelta(0)
+
+    return timedelta(
+        milliseconds=zlib.crc32(entity_id.encode('utf-8')) % millis)
+
+
+class PollStats(object):
+    """Statistics of the polls of a platform."""
+
+    __slots__ = ['polls', 'overruns', 'total_time', 'max_time']
+
+    def __init__(self):
+        """Initialize the statistics."""
+        self.polls = 0
+        self.overruns = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def as_dict(self):
+        """Return the statistics as a dictionary."""
+        return {
+            'polls': self.polls,
+            'overruns': self.overruns,
+            'mean_time': self.total_time / self.polls if self.polls else None,
+            'max_time': self.max_time,
+        }
+
+
+class PollScheduler(object):
+    """Poll entities spread over their interval within budgets."""
+
+    def __init__(self, hass, budget):
+        """Initialize the poll scheduler."""
+        self.hass = hass
+        self._budget = asyncio.Semaphore(budget, loop=hass.loop)
+        self._platform_budgets = {}
+        self._polling = set()
+        self.stats = {}
+
+    @callback
+    def async_add_entity(self, platform, entity, interval, poll_budget):
+        """Start polling an entity every interval.
+
+        Returns a function that stops the polling.
+        """
+        name = '{}.{}'.format(platform.domain, platform.platform_name)
+        stats = self.stats.get(name)
+
+        if stats is None:
+            stats = self.stats[name] = PollStats()
+
+        budget = self._platform_budgets.get(name)
+
+        if budget is None:
+            budget = self._platform_budgets[name] = asyncio.Semaphore(
+                poll_budget, loop=self.hass.loop)
+
+        remove = None
+        point = dt_util.utcnow() + poll_phase(entity.entity_id, interval)
+
+        @callback
+        def poll_listener(now):
+            """Poll the entity and schedule the next poll."""
+            nonlocal remove, point
+
+            # Stay on the grid of the entity, skipping missed polls
+            point += interval
+            if point <= now and interval:
+                point += ((now - point) // interval + 1) * interval
+
+            remove = async_track_point_in_utc_time(
+                self.hass, poll_listener, point)
+
+            if entity.entity_id in self._polling:
+                stats.overruns += 1
+                _LOGGER.warning(
+                    "Updating %s took longer than the scheduled update "
+                    "interval %s", entity.entity_id, interval)
+                return
+
+            self.hass.async_add_job(self._async_poll(entity, budget, stats))
+
+        remove = async_track_point_in_utc_time(
+            self.hass, poll_listener, point)
+
+        def remove_listener():
+            """Stop polling the entity."""
+            remove()
+
+        return remove_listener
+
+    async def _async_poll(self, entity, budget, stats):
+        """Poll an entity once budgets allow it."""
+        self._polling.add(entity.entity_id)
+
+        try:
+            async with budget, self._budget:
+                if not entity.should_poll:
+                    return
+
+                start = self.hass.loop.time()
+                await entity.async_update_ha_state(True)
+                duration = self.hass.loop.time() - start
+        finally:
+            self._polling.discard(entity.entity_id)
+
+        stats.polls += 1
+        stats.total_time += duration
+        stats.max_time = max(stats.max_time, duration)
+
+    @callback
+    def async_get_stats(self):
+        """Return the poll statistics per platform."""
+        return {name: stats.as_dict() for name, stats in self.stats.items()}
@@ -8,11 +8,10 @@ import async_timeout
 from homeassistant.core import HomeAssistant, CoreState, callback
 from homeassistant.const import EVENT_HOMEASSISTANT_START
 from homeassistant.loader import bind_hass
-from homeassistant.components.history import get_states, last_recorder_run
-from homeassistant.components.recorder import (
-    wait_connection_ready, DOMAIN as _RECORDER)
 import homeassistant.util.dt as dt_util
 
+# History and recorder import SQLAlchemy, they are imported once used
+_RECORDER = 'recorder'
 RECORDER_TIMEOUT = 10
 DATA_RESTORE_CACHE = 'restore_state_cache'
 _LOCK = 'restore_lock'
@@ -21,6 +20,9 @@ _LOGGER = logging.getLogger(__name__)
 
 def _load_restore_cache(hass: HomeAssistant):
     """Load the restore cache to be used by other components."""
+    from homeassistant.components.history import (
+        get_states, last_recorder_run)
+
     @callback
     def remove_cache(event):
         """Remove the states cache."""
@@ -63,6 +65,8 @@ async def async_get_last_state(hass, entity_id: str):
                       entity_id, hass.state)
         return None
 
+    from homeassistant.components.recorder import wait_connection_ready
+
     try:
         with async_timeout.timeout(RECORDER_TIMEOUT, loop=hass.loop):
             connected = await wait_connection_ready(hass)
@@ -1,5 +1,6 @@
 """Template helper methods for rendering strings with Home Assistant data."""
 from datetime import datetime
+import functools as ft
 import json
 import logging
 import math
@@ -26,6 +27,12 @@ _LOGGER = logging.getLogger(__name__)
 _SENTINEL = object()
 DATE_STR_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+_RENDER_INFO = 'template.render_info'
+_TEMPLATE_GLOBALS = 'template.globals'
+
+# Number of compiled templates kept, shared by all template instances
+COMPILE_CACHE_SIZE = 1024
+
 _RE_NONE_ENTITIES = re.compile(r"distance\(|closest\(", re.I | re.M)
 _RE_GET_ENTITIES = re.compile(
     r"(?:(?:states\.|(?:is_state|is_state_attr|state_attr|states)"
@@ -82,11 +89,74 @@ def extract_entities(template, variables=None):
     return MATCH_ALL
 
 
+class RenderInfo(object):
+    """Result of a render and the states the template accessed."""
+
+    def __init__(self, template):
+        """Initialize the render info."""
+        self.template = template
+        self.result = None
+        self.exception = None
+        self.all_states = False
+        self.domains = set()
+        self.entities = set()
+
+
+def _collect_entity(hass, entity_id):
+    """Record the access to the state of an entity."""
+    render_info = hass.data.get(_RENDER_INFO)
+    if render_info is not None and isinstance(entity_id, str):
+        render_info.entities.add(entity_id.lower())
+
+
+def _collect_domain(hass, domain):
+    """Record the access to all states of a domain."""
+    render_info = hass.data.get(_RENDER_INFO)
+    if render_info is not None:
+        render_info.domains.add(domain.lower())
+
+
+def _collect_all_states(hass):
+    """Record the access to all states."""
+    render_info = hass.data.get(_RENDER_INFO)
+    if render_info is not None:
+        render_info.all_states = True
+
+
+@ft.lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile(source):
+    """Compile the source of a template to code."""
+    return ENV.compile(source)
+
+
+def _template_globals(hass):
+    """Return the globals of the templates bound to a hass instance."""
+    global_vars = hass.data.get(_TEMPLATE_GLOBALS)
+
+    if global_vars is None:
+        template_methods = TemplateMethods(hass)
+        global_vars = hass.data[_TEMPLATE_GLOBALS] = ENV.make_globals({
+            'closest': template_methods.closest,
+            'distance': template_methods.distance,
+            'is_state': template_methods.is_state,
+            'is_state_attr': template_methods.is_state_attr,
+            'state_attr': template_methods.state_attr,
+            'states': AllStates(hass),
+        })
+
+    return global_vars
+
+
 class Template(object):
     """Class to hold a template and manage caching and rendering."""
 
-    def __init__(self, template, hass=None):
-        """Instantiate a template."""
+    def __init__(self, template, hass=None, memoize=False):
+        """Instantiate a template.
+
+        With memoize the result of a render without variables is reused
+        as long as the states the template read are unchanged. Only use it
+        for templates depending on nothing but those states.
+        """
         if not isinstance(template, str):
             raise TypeError('Expected template to be a string')
 
@@ -94,6 +164,9 @@ class Template(object):
         self._compiled_code = None
         self._compiled = None
         self.hass = hass
+        self.memoize = memoize
+        # Read entities, their states and the result of the last render
+        self._memo = None
 
     def ensure_valid(self):
         """Return if template is valid."""
@@ -101,7 +174,7 @@ class Template(object):
             return
 
         try:
-            self._compiled_code = ENV.compile(self.template)
+            self._compiled_code = _compile(self.template)
         except jinja2.exceptions.TemplateSyntaxError as err:
             raise TemplateError(err)
 
@@ -128,11 +201,81 @@ class Template(object):
         if variables is not None:
             kwargs.update(variables)
 
+        if self.memoize and not kwargs:
+            return self._async_render_memoized()
+
         try:
             return self._compiled.render(kwargs).strip()
         except jinja2.TemplateError as err:
             raise TemplateError(err)
 
+    def _async_render_memoized(self):
+        """Render the template or return the result of the last render.
+
+        This method must be run in the event loop.
+        """
+        hass = self.hass
+        memo = self._memo
+
+        if memo is not None:
+            entity_ids, states, result = memo
+
+            if all(hass.states.get(entity_id) is state
+                   for entity_id, state in zip(entity_ids, states)):
+                for entity_id in entity_ids:
+                    _collect_entity(hass, entity_id)
+                return result
+
+        self._memo = None
+        render_info = RenderInfo(self)
+        previous = hass.data.get(_RENDER_INFO)
+        hass.data[_RENDER_INFO] = render_info
+
+        try:
+            result = self._compiled.render().strip()
+        except jinja2.TemplateError as err:
+            raise TemplateError(err)
+        finally:
+            hass.data[_RENDER_INFO] = previous
+
+            # Pass the accessed states on to an enclosing render to info
+            if previous is not None:
+                previous.all_states |= render_info.all_states
+                previous.domains.update(render_info.domains)
+                previous.entities.update(render_info.entities)
+
+        # The states of a domain or all states can change by adding an
+        # entity, templates reading no states may depend on the time.
+        if render_info.entities and not render_info.domains and \
+                not render_info.all_states:
+            entity_ids = tuple(render_info.entities)
+            self._memo = (
+                entity_ids,
+                tuple(hass.states.get(entity_id) for entity_id in entity_ids),
+                result)
+
+        return result
+
+    def async_render_to_info(self, variables=None, **kwargs):
+        """Render the template and record the states it accessed.
+
+        Returns a RenderInfo, errors are stored in its exception attribute.
+
+        This method must be run in the event loop.
+        """
+        render_info = RenderInfo(self)
+        previous = self.hass.data.get(_RENDER_INFO)
+        self.hass.data[_RENDER_INFO] = render_info
+
+        try:
+            render_info.result = self.async_render(variables, **kwargs)
+        except TemplateError as ex:
+            render_info.exception = ex
+        finally:
+            self.hass.data[_RENDER_INFO] = previous
+
+        return render_info
+
     def render_with_possible_json_value(self, value, error_value=_SENTINEL):
         """Render template with value exposed.
 
@@ -175,19 +318,8 @@ class Template(object):
 
         assert self.hass is not None, 'hass variable not set on template'
 
-        template_methods = TemplateMethods(self.hass)
-
-        global_vars = ENV.make_globals({
-            'closest': template_methods.closest,
-            'distance': template_methods.distance,
-            'is_state': self.hass.states.is_state,
-            'is_state_attr': template_methods.is_state_attr,
-            'state_attr': template_methods.state_attr,
-            'states': AllStates(self.hass),
-        })
-
         self._compiled = jinja2.Template.from_code(
-            ENV, self._compiled_code, global_vars, None)
+            ENV, self._compiled_code, _template_globals(self.hass), None)
 
         return self._compiled
 
@@ -211,6 +343,7 @@ class AllStates(object):
 
     def __iter__(self):
         """Return all states."""
+        _collect_all_states(self._hass)
         return iter(
             _wrap_state(state) for state in
             sorted(self._hass.states.async_all(),
@@ -218,10 +351,12 @@ class AllStates(object):
 
     def __len__(self):
         """Return number of states."""
+        _collect_all_states(self._hass)
         return len(self._hass.states.async_entity_ids())
 
     def __call__(self, entity_id):
         """Return the states."""
+        _collect_entity(self._hass, entity_id)
         state = self._hass.states.get(entity_id)
         return STATE_UNKNOWN if state is None else state.state
 
@@ -236,24 +371,29 @@ class DomainStates(object):
 
     def __getattr__(self, name):
         """Return the states."""
-        return _wrap_state(
-            self._hass.states.get('{}.{}'.format(self._domain, name)))
+        entity_id = '{}.{}'.format(self._domain, name)
+        _collect_entity(self._hass, entity_id)
+        return _wrap_state(self._hass.states.get(entity_id))
 
     def __iter__(self):
         """Return the iteration over all the states."""
+        _collect_domain(self._hass, self._domain)
         return iter(sorted(
-            (_wrap_state(state) for state in self._hass.states.async_all()
-             if state.domain == self._domain),
+            (_wrap_state(state) for state
+             in self._hass.states.async_all(self._domain)),
             key=lambda state: state.entity_id))
 
     def __len__(self):
         """Return number of states."""
+        _collect_domain(self._hass, self._domain)
         return len(self._hass.states.async_entity_ids(self._domain))
 
 
 class TemplateState(State):
     """Class to represent a state object in a template."""
 
+    __slots__ = ['_state']
+
     # Inheritance is done so functions that check against State keep working
     # pylint: disable=super-init-not-called
     def __init__(self, state):
@@ -350,9 +490,14 @@ class TemplateMethods(object):
                 gr_entity_id = str(entities)
 
             group = self._hass.components.group
+            entity_ids = group.expand_entity_ids([gr_entity_id])
+
+            _collect_entity(self._hass, gr_entity_id)
+            for entity_id in entity_ids:
+                _collect_entity(self._hass, entity_id)
 
             states = [self._hass.states.get(entity_id) for entity_id
-                      in group.expand_entity_ids([gr_entity_id])]
+                      in entity_ids]
 
         return _wrap_state(loc_helper.closest(latitude, longitude, states))
 
@@ -404,6 +549,11 @@ class TemplateMethods(object):
         return self._hass.config.units.length(
             loc_util.distance(*locations[0] + locations[1]), 'm')
 
+    def is_state(self, entity_id, state):
+        """Test if a state is a specific value."""
+        _collect_entity(self._hass, entity_id)
+        return self._hass.states.is_state(entity_id, state)
+
     def is_state_attr(self, entity_id, name, value):
         """Test if a state is a specific attribute."""
         state_attr = self.state_attr(entity_id, name)
@@ -411,6 +561,7 @@ class TemplateMethods(object):
 
     def state_attr(self, entity_id, name):
         """Get a specific attribute from a state."""
+        _collect_entity(self._hass, entity_id)
         state_obj = self._hass.states.get(entity_id)
         if state_obj is not None:
             return state_obj.attributes.get(name)
@@ -421,6 +572,7 @@ class TemplateMethods(object):
         if isinstance(entity_id_or_state, State):
             return entity_id_or_state
         elif isinstance(entity_id_or_state, str):
+            _collect_entity(self._hass, entity_id_or_state)
             return self._hass.states.get(entity_id_or_state)
         return None
 
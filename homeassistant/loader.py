@@ -9,10 +9,16 @@ If you want to retrieve a platform that is part of a component, you should
 call get_component(hass, 'switch.your_platform'). In both cases the config
 directory is checked to see if it contains a user provided version. If not
 available it will check the built-in components and platforms.
+
+The built-in components and platforms are listed in component_index.json,
+generated by script/gen_component_index.py, so that only modules that exist
+are imported.
 """
 import functools as ft
 import importlib
+import json
 import logging
+import os
 import sys
 from types import ModuleType
 
@@ -37,6 +43,8 @@ _LOGGER = logging.getLogger(__name__)
 DATA_KEY = 'components'
 PATH_CUSTOM_COMPONENTS = 'custom_components'
 PACKAGE_COMPONENTS = 'homeassistant.components'
+PATH_COMPONENT_INDEX = os.path.join(
+    os.path.dirname(__file__), 'component_index.json')
 
 
 def set_component(hass, comp_name: str, component: ModuleType) -> None:
@@ -78,8 +86,16 @@ def get_component(hass, comp_or_platform) -> Optional[ModuleType]:
         cache = hass.data[DATA_KEY] = {}
 
     # First check custom, then built-in
-    potential_paths = ['custom_components.{}'.format(comp_or_platform),
-                       'homeassistant.components.{}'.format(comp_or_platform)]
+    potential_paths = []
+
+    if _has_custom_component(hass, comp_or_platform):
+        potential_paths.append('custom_components.{}'.format(comp_or_platform))
+
+    index = get_component_index()
+
+    if index is None or comp_or_platform in index:
+        potential_paths.append(
+            'homeassistant.components.{}'.format(comp_or_platform))
 
     for path in potential_paths:
         try:
@@ -124,6 +140,34 @@ def get_component(hass, comp_or_platform) -> Optional[ModuleType]:
     return None
 
 
+@ft.lru_cache(maxsize=1)
+def get_component_index() -> Optional[Dict]:
+    """Return the index of the built-in components and platforms.
+
+    Maps the name of every module to its path and, if they are literals,
+    its dependencies and requirements. Returns None if the index has not
+    been generated.
+    """
+    try:
+        with open(PATH_COMPONENT_INDEX, encoding='utf-8') as index_file:
+            return json.load(index_file)
+    except FileNotFoundError:
+        return None
+
+
+def _has_custom_component(hass, comp_or_platform: str) -> bool:
+    """Check if a custom component or platform is in the config dir."""
+    if hass.config.config_dir is None:
+        return True
+
+    path = os.path.join(
+        hass.config.config_dir, PATH_CUSTOM_COMPONENTS,
+        *comp_or_platform.split('.'))
+
+    return os.path.isfile(path + '.py') or \
+        os.path.isfile(os.path.join(path, '__init__.py'))
+
+
 class Components:
     """Helper to load components."""
 
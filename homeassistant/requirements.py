@@ -4,6 +4,7 @@ from functools import partial
 import logging
 import os
 
+from homeassistant.core import EXECUTOR_SETUP
 import homeassistant.util.package as pkg_util
 
 DATA_PIP_LOCK = 'pip_lock'
@@ -25,7 +26,8 @@ async def async_process_requirements(hass, name, requirements):
 
     async with pip_lock:
         for req in requirements:
-            ret = await hass.async_add_job(pip_install, req)
+            ret = await hass.async_add_executor_job(
+                EXECUTOR_SETUP, pip_install, req)
             if not ret:
                 _LOGGER.error("Not initializing %s because could not install "
                               "requirement %s", name, req)
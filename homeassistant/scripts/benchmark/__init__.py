@@ -2,7 +2,7 @@
 import argparse
 import asyncio
 from contextlib import suppress
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 from timeit import default_timer as timer
 
@@ -108,6 +108,40 @@ async def async_million_time_changed_helper(hass):
     return timer() - start
 
 
+@benchmark
+# pylint: disable=invalid-name
+async def async_time_pattern_listeners(hass):
+    """Run an hour of time ticks through 5000 time pattern listeners.
+
+    Divide the runtime by 3600 for the cost per tick.
+    """
+    count = 0
+
+    @core.callback
+    def listener(_):
+        """Handle time pattern."""
+        nonlocal count
+        count += 1
+
+    for idx in range(5000):
+        hass.helpers.event.async_track_utc_time_change(
+            listener, minute=idx % 60, second=idx // 60 % 60)
+
+    now = datetime(2017, 10, 10, 15, 0, 0, tzinfo=dt_util.UTC)
+    event_data = [{ATTR_NOW: now + timedelta(seconds=sec)}
+                  for sec in range(3600)]
+
+    start = timer()
+
+    for data in event_data:
+        hass.bus.async_fire(EVENT_TIME_CHANGED, data)
+        await asyncio.sleep(0, loop=hass.loop)
+
+    await asyncio.sleep(0, loop=hass.loop)
+
+    return timer() - start
+
+
 @benchmark
 # pylint: disable=invalid-name
 async def async_million_state_changed_helper(hass):
@@ -143,6 +177,209 @@ async def async_million_state_changed_helper(hass):
     return timer() - start
 
 
+@benchmark
+# pylint: disable=invalid-name
+async def async_state_changed_helper_many_trackers(hass):
+    """Run 100k state changes through 3000 trackers of 2500 entities."""
+    count = 0
+    entity_ids = ['sensor.benchmark_{}'.format(idx) for idx in range(2500)]
+
+    @core.callback
+    def listener(*args):
+        """Handle state change."""
+        nonlocal count
+        count += 1
+
+    for idx in range(3000):
+        hass.helpers.event.async_track_state_change(
+            entity_ids[idx % len(entity_ids)], listener)
+
+    events = [{
+        'entity_id': entity_id,
+        'old_state': core.State(entity_id, 'off'),
+        'new_state': core.State(entity_id, 'on'),
+    } for entity_id in entity_ids]
+
+    start = timer()
+
+    for idx in range(10**5):
+        hass.bus.async_fire(EVENT_STATE_CHANGED, events[idx % len(events)])
+
+        if idx % 100 == 0:
+            await asyncio.sleep(0, loop=hass.loop)
+
+    await asyncio.sleep(0, loop=hass.loop)
+
+    return timer() - start
+
+
+@benchmark
+async def recorder_write_states(hass):
+    """Write 100k state changes to an in-memory SQLite recorder."""
+    from homeassistant.components import recorder
+
+    instance = recorder.Recorder(
+        hass, keep_days=0, purge_interval=0, uri='sqlite://', include={},
+        exclude={})
+    # pylint: disable=protected-access
+    await hass.async_add_job(instance._setup_connection)
+
+    events = []
+    for idx in range(10**5):
+        entity_id = 'sensor.benchmark_{}'.format(idx % 1000)
+        events.append(core.Event(EVENT_STATE_CHANGED, {
+            'entity_id': entity_id,
+            'old_state': None,
+            'new_state': core.State(entity_id, idx, {
+                'unit_of_measurement': 'W',
+                'friendly_name': 'Benchmark {}'.format(idx % 1000),
+            }),
+        }))
+
+    def write_events():
+        """Write the events in batches."""
+        batch_size = instance.commit_max_events
+        for idx in range(0, len(events), batch_size):
+            instance._write_events(events[idx:idx + batch_size])
+
+    start = timer()
+
+    await hass.async_add_job(write_events)
+
+    runtime = timer() - start
+    await hass.async_add_job(instance._close_connection)
+    return runtime
+
+
+@benchmark
+async def million_states_memory(hass):
+    """Create a million states of 3,000 entities and report their memory."""
+    import tracemalloc
+
+    attributes = [{
+        'unit_of_measurement': 'W',
+        'friendly_name': 'Benchmark {}'.format(idx),
+    } for idx in range(3000)]
+
+    tracemalloc.start()
+    start = timer()
+
+    states = []
+    for idx in range(10**6):
+        # Built at runtime like the strings decoded from the database
+        states.append(core.State(
+            'sensor.benchmark_{}'.format(idx % 3000),
+            str(idx % 100), attributes[idx % 3000]))
+
+    runtime = timer() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print('{} states use {:.1f} MiB'.format(len(states), size / 2**20))
+    return runtime
+
+
+@benchmark
+async def import_components(hass):
+    """Import 150 components and platforms with their dependencies."""
+    import sys
+    from tempfile import TemporaryDirectory
+    from homeassistant import loader
+
+    index = loader.get_component_index()
+    names = sorted(index)[::len(index) // 150][:150]
+
+    # Import the modules again on every run
+    for name in list(sys.modules):
+        if name.startswith(loader.PACKAGE_COMPONENTS + '.'):
+            del sys.modules[name]
+
+    with TemporaryDirectory() as config_dir:
+        hass.config.config_dir = config_dir
+        start = timer()
+
+        for name in names:
+            loader.load_order_component(hass, name)
+
+        runtime = timer() - start
+
+    print('Imported {} modules'.format(len(hass.data[loader.DATA_KEY])))
+    return runtime
+
+
+@benchmark
+async def mqtt_message_dispatch(hass):
+    """Dispatch 100k MQTT messages to 10k subscriptions."""
+    from homeassistant.components import mqtt
+
+    count = 0
+
+    @core.callback
+    def message_received(topic, payload, qos):
+        """Handle a message."""
+        nonlocal count
+        count += 1
+
+    client = mqtt.MQTT(
+        hass, 'localhost', mqtt.DEFAULT_PORT, None, mqtt.DEFAULT_KEEPALIVE,
+        None, None, None, None, None, None, mqtt.PROTOCOL_311, None, None,
+        None)
+
+    # Subscribed like Zigbee2MQTT, Tasmota and Homie entities
+    for idx in range(8000):
+        client.subscriptions.add(mqtt.Subscription(
+            'zigbee2mqtt/device_{}'.format(idx), message_received))
+    for idx in range(1000):
+        client.subscriptions.add(mqtt.Subscription(
+            'tasmota/+/sensor_{}'.format(idx), message_received))
+        client.subscriptions.add(mqtt.Subscription(
+            'homie/device_{}/#'.format(idx), message_received))
+
+    messages = []
+    for idx in range(1000):
+        for topic in ('zigbee2mqtt/device_{}', 'tasmota/tele/sensor_{}',
+                      'homie/device_{}/temperature/value'):
+            messages.append(mqtt.Message(topic.format(idx), b'21.5'))
+
+    # pylint: disable=protected-access
+    start = timer()
+
+    for idx in range(10**5):
+        client._mqtt_handle_message(messages[idx % len(messages)])
+
+    runtime = timer() - start
+    assert count == 10**5
+    return runtime
+
+
+@benchmark
+async def template_render(hass):
+    """Compile 1000 templates of 10 sources and render them 100 times."""
+    from homeassistant.helpers import template
+
+    hass.states.async_set('sensor.benchmark', '21.5')
+    sources = ['{{{{ value_json.value_{} }}}}'.format(idx % 10)
+               for idx in range(1000)]
+
+    start = timer()
+
+    templates = [template.Template(source, hass) for source in sources]
+    for tpl in templates:
+        tpl.ensure_valid()
+
+    memoized = [template.Template(
+        '{{ states.sensor.benchmark.state | float * 2 }}', hass,
+        memoize=True) for _ in range(1000)]
+
+    for _ in range(100):
+        for tpl in templates:
+            tpl.async_render_with_possible_json_value('{"value_1": 1}')
+        for tpl in memoized:
+            tpl.async_render()
+
+    return timer() - start
+
+
 @benchmark
 @asyncio.coroutine
 def logbook_filtering_state(hass):
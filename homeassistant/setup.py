@@ -19,6 +19,11 @@ ATTR_COMPONENT = 'component'
 
 DATA_SETUP = 'setup_tasks'
 DATA_DEPS_REQS = 'deps_reqs_processed'
+DATA_SETUP_TIMELINE = 'setup_timeline'
+
+PHASE_IMPORT = 'import'
+PHASE_REQUIREMENTS = 'requirements'
+PHASE_SETUP = 'setup'
 
 SLOW_SETUP_WARNING = 10
 
@@ -56,6 +61,115 @@ async def async_setup_component(hass: core.HomeAssistant, domain: str,
     return await task
 
 
+async def async_setup_components(hass: core.HomeAssistant, domains,
+                                 config: Dict) -> None:
+    """Set up components, each as soon as its dependencies are set up.
+
+    All components and their dependencies are imported before any setup
+    starts, each import is recorded on the timeline of its own module.
+
+    This method is a coroutine.
+    """
+    loading = set()
+    for domain in domains:
+        _load_component_tree(hass, domain, loading)
+
+    tasks = [async_setup_component(hass, domain, config)
+             for domain in domains]
+
+    if tasks:
+        await asyncio.wait(tasks, loop=hass.loop)
+
+
+def _load_component_tree(hass, domain, loading):
+    """Import the dependencies of a component and then the component."""
+    if domain in loading:
+        return
+
+    loading.add(domain)
+    component = _load_component(hass, domain)
+
+    for dependency in getattr(component, 'DEPENDENCIES', []):
+        _load_component_tree(hass, dependency, loading)
+
+
+def _load_component(hass, name):
+    """Import a component or platform and record how long it took."""
+    timeline = async_get_setup_timeline(hass)
+    start = timer()
+    module = loader.get_component(hass, name)
+
+    if module is not None:
+        timeline.add(name, PHASE_IMPORT, start, timer())
+
+    return module
+
+
+@core.callback
+def async_get_setup_timeline(hass: core.HomeAssistant) -> 'SetupTimeline':
+    """Return the timeline of the setup, create it if needed."""
+    timeline = hass.data.get(DATA_SETUP_TIMELINE)
+
+    if timeline is None:
+        timeline = hass.data[DATA_SETUP_TIMELINE] = SetupTimeline()
+
+    return timeline
+
+
+class SetupTimeline(object):
+    """Record when components and platforms are imported and set up."""
+
+    def __init__(self):
+        """Initialize the timeline."""
+        self.start = timer()
+        self.events = []
+        self._imported = set()
+
+    def add(self, name, phase, start, end):
+        """Add a phase of the setup of a component or platform."""
+        # Only the first load of a module imports it
+        if phase == PHASE_IMPORT:
+            if name in self._imported:
+                return
+            self._imported.add(name)
+
+        self.events.append((name, phase, start, end))
+
+    def as_chrome_trace(self):
+        """Return the timeline in the Chrome trace event format.
+
+        Every component and platform gets its own row.
+        """
+        rows = {}
+        trace_events = []
+
+        for name, phase, start, end in self.events:
+            row = rows.get(name)
+
+            if row is None:
+                row = rows[name] = len(rows) + 1
+                trace_events.append({
+                    'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': row,
+                    'args': {'name': name},
+                })
+
+            trace_events.append({
+                'name': phase, 'cat': name, 'ph': 'X', 'pid': 1, 'tid': row,
+                'ts': round((start - self.start) * 1000000),
+                'dur': round((end - start) * 1000000),
+            })
+
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def slowest(self, phase, count=5):
+        """Return the names and durations of the slowest of a phase."""
+        durations = [(name, end - start)
+                     for name, event_phase, start, end in self.events
+                     if event_phase == phase]
+        durations.sort(key=lambda item: item[1], reverse=True)
+        return durations[:count]
+
+
 async def _async_process_dependencies(hass, config, name, dependencies):
     """Ensure all dependencies are set up."""
     blacklisted = [dep for dep in dependencies
@@ -98,7 +212,7 @@ async def _async_setup_component(hass: core.HomeAssistant,
         _LOGGER.error("Setup failed for %s: %s", domain, msg)
         async_notify_setup_error(hass, domain, link)
 
-    component = loader.get_component(hass, domain)
+    component = _load_component(hass, domain)
 
     if not component:
         log_error("Component not found.", False)
@@ -141,14 +255,15 @@ async def _async_setup_component(hass: core.HomeAssistant,
         if hasattr(component, 'async_setup'):
             result = await component.async_setup(hass, processed_config)
         else:
-            result = await hass.async_add_job(
-                component.setup, hass, processed_config)
+            result = await hass.async_add_executor_job(
+                core.EXECUTOR_SETUP, component.setup, hass, processed_config)
     except Exception:  # pylint: disable=broad-except
         _LOGGER.exception("Error during setup of component %s", domain)
         async_notify_setup_error(hass, domain, True)
         return False
     finally:
         end = timer()
+        async_get_setup_timeline(hass).add(domain, PHASE_SETUP, start, end)
         if warn_task:
             warn_task.cancel()
     _LOGGER.info("Setup of domain %s took %.1f seconds.", domain, end - start)
@@ -193,7 +308,7 @@ async def async_prepare_setup_platform(hass: core.HomeAssistant, config,
                       platform_path, msg)
         async_notify_setup_error(hass, platform_path)
 
-    platform = loader.get_platform(hass, domain, platform_name)
+    platform = _load_component(hass, platform_path)
 
     # Not found
     if platform is None:
@@ -226,18 +341,31 @@ async def async_process_deps_reqs(hass, config, name, module):
     elif name in processed:
         return
 
-    if hasattr(module, 'DEPENDENCIES'):
-        dep_success = await _async_process_dependencies(
-            hass, config, name, module.DEPENDENCIES)
+    # Install the requirements while the dependencies are set up
+    dep_success, req_success = await asyncio.gather(
+        _async_process_dependencies(
+            hass, config, name, getattr(module, 'DEPENDENCIES', [])),
+        _async_process_requirements(hass, name, module), loop=hass.loop)
 
-        if not dep_success:
-            raise HomeAssistantError("Could not setup all dependencies.")
+    if not dep_success:
+        raise HomeAssistantError("Could not setup all dependencies.")
 
-    if not hass.config.skip_pip and hasattr(module, 'REQUIREMENTS'):
-        req_success = await requirements.async_process_requirements(
-            hass, name, module.REQUIREMENTS)
-
-        if not req_success:
-            raise HomeAssistantError("Could not install all requirements.")
+    if not req_success:
+        raise HomeAssistantError("Could not install all requirements.")
 
     processed.add(name)
+
+
+async def _async_process_requirements(hass, name, module):
+    """Install the requirements of a module and record how long it took."""
+    if hass.config.skip_pip or not hasattr(module, 'REQUIREMENTS'):
+        return True
+
+    timeline = async_get_setup_timeline(hass)
+    start = timer()
+
+    try:
+        return await requirements.async_process_requirements(
+            hass, name, module.REQUIREMENTS)
+    finally:
+        timeline.add(name, PHASE_REQUIREMENTS, start, timer())
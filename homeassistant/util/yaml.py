@@ -1,10 +1,12 @@
 """YAML utility functions."""
 import logging
 import os
+import pickle
 import sys
 import fnmatch
+import threading
 from collections import OrderedDict
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Optional
 
 import yaml
 try:
@@ -17,6 +19,7 @@ try:
 except ImportError:
     credstash = None
 
+from homeassistant.const import __version__
 from homeassistant.exceptions import HomeAssistantError
 
 _LOGGER = logging.getLogger(__name__)
@@ -24,6 +27,12 @@ _SECRET_NAMESPACE = 'homeassistant'
 SECRET_YAML = 'secrets.yaml'
 __SECRET_CACHE = {}  # type: Dict
 
+# Bump when the structure of the cache changes
+CACHE_VERSION = 1
+
+# Files, directories and environment variables used by the running load
+_TRACKER = threading.local()
+
 
 class NodeListClass(list):
     """Wrapper class to be able to add attributes on a list."""
@@ -61,13 +70,35 @@ class SafeLineLoader(yaml.SafeLoader):
         return node
 
 
+if hasattr(yaml, 'CSafeLoader'):
+    # pylint: disable=too-many-ancestors
+    class SafeLineCLoader(yaml.CSafeLoader):
+        """Loader class based on libyaml that keeps track of the file name.
+
+        The nodes of libyaml carry their start mark, which is all that is
+        needed to annotate the loaded objects with their line.
+        """
+
+        def __init__(self, stream):
+            """Initialize the loader."""
+            super().__init__(stream)
+            self.name = getattr(stream, 'name', '<file>')
+            self.stream = stream
+else:
+    SafeLineCLoader = None
+
+
 def load_yaml(fname: str) -> Union[List, Dict]:
     """Load a YAML file."""
+    _track(('file', fname), _stamp(fname))
+
     try:
         with open(fname, encoding='utf-8') as conf_file:
             # If configuration file is empty YAML returns None
             # We convert that to an empty dict
-            return yaml.load(conf_file, Loader=SafeLineLoader) or OrderedDict()
+            return yaml.load(
+                conf_file, Loader=SafeLineCLoader or SafeLineLoader) \
+                or OrderedDict()
     except yaml.YAMLError as exc:
         _LOGGER.error(exc)
         raise HomeAssistantError(exc)
@@ -76,6 +107,105 @@ def load_yaml(fname: str) -> Union[List, Dict]:
         raise HomeAssistantError(exc)
 
 
+def load_yaml_cached(fname: str, cache_path: str) -> Union[List, Dict]:
+    """Load a YAML file, reusing the result of an earlier load.
+
+    The result is stored in cache_path together with the files,
+    directories and environment variables it was loaded from. It is reused
+    as long as none of them has changed.
+    """
+    cache = _read_cache(cache_path)
+
+    if cache is not None and cache['fname'] == fname and \
+            all(_current(key) == value
+                for key, value in cache['dependencies'].items()):
+        _LOGGER.debug("Using cached %s", fname)
+        return cache['data']
+
+    _TRACKER.dependencies = dependencies = {}
+    _TRACKER.cacheable = True
+
+    try:
+        data = load_yaml(fname)
+        cacheable = _TRACKER.cacheable
+    finally:
+        del _TRACKER.dependencies
+
+    if cacheable:
+        _write_cache(cache_path, {
+            'version': (CACHE_VERSION, __version__),
+            'fname': fname,
+            'dependencies': dependencies,
+            'data': data,
+        })
+
+    return data
+
+
+def _read_cache(cache_path: str) -> Optional[Dict]:
+    """Read a cached load, None if there is no usable one."""
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            cache = pickle.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except Exception:  # pylint: disable=broad-except
+        _LOGGER.warning("Unable to read cache %s", cache_path)
+        return None
+
+    if not isinstance(cache, dict) or \
+            cache.get('version') != (CACHE_VERSION, __version__):
+        return None
+
+    return cache
+
+
+def _write_cache(cache_path: str, cache: Dict) -> None:
+    """Write a load to the cache, replacing the previous one."""
+    tmp_path = cache_path + '.tmp'
+
+    try:
+        with open(tmp_path, 'wb') as cache_file:
+            pickle.dump(cache, cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except (OSError, pickle.PicklingError) as err:
+        _LOGGER.warning("Unable to write cache %s: %s", cache_path, err)
+
+
+def _stamp(path: str):
+    """Return the modification time and size of a path, None if missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _current(key):
+    """Return the current value of a dependency of a load."""
+    kind, name = key
+
+    if kind == 'env':
+        return os.environ.get(name)
+
+    return _stamp(name)
+
+
+def _track(key, value) -> None:
+    """Record a dependency of the running cached load."""
+    dependencies = getattr(_TRACKER, 'dependencies', None)
+
+    if dependencies is not None:
+        dependencies[key] = value
+
+
+def _track_uncacheable() -> None:
+    """Mark the running load as depending on something not trackable."""
+    if getattr(_TRACKER, 'dependencies', None) is not None:
+        _TRACKER.cacheable = False
+
+
 def dump(_dict: dict) -> str:
     """Dump YAML to a string and remove null."""
     return yaml.safe_dump(
@@ -118,6 +248,8 @@ def _is_file_valid(name: str) -> bool:
 def _find_files(directory: str, pattern: str):
     """Recursively load files in a directory."""
     for root, dirs, files in os.walk(directory, topdown=True):
+        # Adding or removing a file changes the stamp of its directory
+        _track(('dir', root), _stamp(root))
         dirs[:] = [d for d in dirs if _is_file_valid(d)]
         for basename in files:
             if _is_file_valid(basename) and fnmatch.fnmatch(basename, pattern):
@@ -212,6 +344,7 @@ def _env_var_yaml(loader: SafeLineLoader,
                   node: yaml.nodes.Node):
     """Load environment variables and embed it into the configuration YAML."""
     args = node.value.split()
+    _track(('env', args[0]), os.environ.get(args[0]))
 
     # Check for a default value
     if len(args) > 1:
@@ -226,6 +359,7 @@ def _env_var_yaml(loader: SafeLineLoader,
 def _load_secret_yaml(secret_path: str) -> Dict:
     """Load the secrets yaml from path."""
     secret_path = os.path.join(secret_path, SECRET_YAML)
+    _track(('file', secret_path), _stamp(secret_path))
     if secret_path in __SECRET_CACHE:
         return __SECRET_CACHE[secret_path]
 
@@ -266,6 +400,9 @@ def _secret_yaml(loader: SafeLineLoader,
         if not os.path.exists(secret_path) or len(secret_path) < 5:
             break  # Somehow we got past the .homeassistant config folder
 
+    # Secrets from keyring or credstash can change without notice
+    _track_uncacheable()
+
     if keyring:
         # do some keyring stuff
         pwd = keyring.get_password(_SECRET_NAMESPACE, node.value)
@@ -305,6 +442,10 @@ yaml.SafeLoader.add_constructor('!include_dir_named', _include_dir_named_yaml)
 yaml.SafeLoader.add_constructor('!include_dir_merge_named',
                                 _include_dir_merge_named_yaml)
 
+if SafeLineCLoader is not None:
+    # Share the constructors, including the ones replaced later on
+    SafeLineCLoader.yaml_constructors = yaml.SafeLoader.yaml_constructors
+
 
 # From: https://gist.github.com/miracle2k/3184458
 # pylint: disable=redefined-outer-name
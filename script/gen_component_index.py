@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Generate an updated homeassistant/component_index.json."""
+import ast
+import json
+import os
+import sys
+
+COMPONENTS_PATH = os.path.join('homeassistant', 'components')
+INDEX_PATH = os.path.join('homeassistant', 'component_index.json')
+
+# Module level constants copied to the index, None if they are not literals
+INDEX_CONSTANTS = {
+    'DEPENDENCIES': 'dependencies',
+    'REQUIREMENTS': 'requirements',
+}
+
+
+def explore_components():
+    """Find the paths of the components and their platforms."""
+    found = {}
+
+    for entry in sorted(os.listdir(COMPONENTS_PATH)):
+        path = os.path.join(COMPONENTS_PATH, entry)
+
+        if entry.startswith('_'):
+            continue
+
+        if entry.endswith('.py'):
+            found[entry[:-3]] = path
+            continue
+
+        init = os.path.join(path, '__init__.py')
+
+        if not os.path.isfile(init):
+            continue
+
+        found[entry] = init
+
+        for child in sorted(os.listdir(path)):
+            child_path = os.path.join(path, child)
+
+            if child.startswith('_'):
+                continue
+
+            if child.endswith('.py'):
+                found['{}.{}'.format(entry, child[:-3])] = child_path
+            elif os.path.isfile(os.path.join(child_path, '__init__.py')):
+                found['{}.{}'.format(entry, child)] = os.path.join(
+                    child_path, '__init__.py')
+
+    return found
+
+
+def read_constants(path):
+    """Read the literal module level constants of a module."""
+    with open(path, encoding='utf-8') as inp:
+        tree = ast.parse(inp.read(), path)
+
+    constants = {key: [] for key in INDEX_CONSTANTS.values()}
+
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1:
+            continue
+
+        target = node.targets[0]
+
+        if not isinstance(target, ast.Name) or \
+                target.id not in INDEX_CONSTANTS:
+            continue
+
+        try:
+            value = list(ast.literal_eval(node.value))
+        except ValueError:
+            # Computed on import, only known once the module is imported
+            value = None
+
+        constants[INDEX_CONSTANTS[target.id]] = value
+
+    return constants
+
+
+def gather_index():
+    """Collect the index of the components."""
+    index = {}
+
+    for name, path in explore_components().items():
+        entry = {
+            'path': os.path.relpath(path, COMPONENTS_PATH).replace(
+                os.sep, '/'),
+        }
+        entry.update(read_constants(path))
+        index[name] = entry
+
+    return index
+
+
+def index_output(index):
+    """Generate the content of the index file."""
+    return json.dumps(index, indent=1, sort_keys=True) + '\n'
+
+
+def main(validate):
+    """Main section of the script."""
+    if not os.path.isdir(COMPONENTS_PATH):
+        print('Run this from HA root dir')
+        return 1
+
+    data = index_output(gather_index())
+
+    if validate:
+        with open(INDEX_PATH, 'r') as index_file:
+            if data == index_file.read():
+                return 0
+
+        print("******* ERROR")
+        print("homeassistant/component_index.json is not up to date")
+        print("Please run script/gen_component_index.py")
+        return 1
+
+    with open(INDEX_PATH, 'w+', newline="\n") as index_file:
+        index_file.write(data)
+    return 0
+
+
+if __name__ == '__main__':
+    _VAL = sys.argv[-1] == 'validate'
+    sys.exit(main(_VAL))
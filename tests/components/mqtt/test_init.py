@@ -492,7 +492,7 @@ class TestMQTTCallbacks(unittest.TestCase):
         self.hass.data['mqtt']._mqtt_on_connect(None, None, None, 0)
         self.hass.block_till_done()
 
-        expected.append(mock.call('test/state', 1))
+        expected.append(mock.call([('test/state', 1)]))
         self.assertEqual(self.hass.data['mqtt']._mqttc.subscribe.mock_calls,
                          expected)
 
@@ -655,10 +655,145 @@ def test_mqtt_subscribes_topics_on_connect(hass):
 
     assert mqtt_client.disconnect.call_count == 0
 
-    expected = {
-        'topic/test': 0,
-        'home/sensor': 2,
-        'still/pending': 1
+    # Subscribed with a single SUBSCRIBE packet
+    assert hass.add_job.mock_calls == [mock.call(
+        hass.data['mqtt']._async_perform_subscriptions, [
+            ('home/sensor', 2),
+            ('still/pending', 1),
+            ('topic/test', 0),
+        ])]
+
+
+@asyncio.coroutine
+def test_messages_handed_to_loop_in_batches(hass):
+    """Test the loop is woken up once for a batch of messages."""
+    yield from async_mock_mqtt_client(hass)
+    calls = []
+    yield from mqtt.async_subscribe(
+        hass, 'test/+', lambda *args: calls.append(args))
+
+    with mock.patch.object(hass, 'add_job', wraps=hass.add_job) \
+            as mock_add_job:
+        for idx in range(3):
+            hass.data['mqtt']._mqtt_on_message(
+                None, None, mqtt.Message('test/{}'.format(idx), b'on'))
+        yield from hass.async_block_till_done()
+
+    assert mock_add_job.call_count == 1
+    assert [call[0] for call in calls] == ['test/0', 'test/1', 'test/2']
+
+
+@asyncio.coroutine
+def test_unchanged_retained_messages_skipped_on_reconnect(hass):
+    """Test retained messages sent again after a reconnect are skipped."""
+    yield from async_mock_mqtt_client(hass)
+    calls = []
+    yield from mqtt.async_subscribe(
+        hass, 'test/state', lambda *args: calls.append(args[1]))
+
+    def receive(payload, retain=True):
+        """Receive a message from the paho thread."""
+        hass.data['mqtt']._mqtt_on_message(
+            None, None, mqtt.Message('test/state', payload, 0, retain))
+
+    receive(b'online')
+    yield from hass.async_block_till_done()
+
+    hass.data['mqtt']._mqtt_on_connect(None, None, 0, 0)
+    receive(b'online')
+    yield from hass.async_block_till_done()
+    assert calls == ['online']
+
+    hass.data['mqtt']._mqtt_on_connect(None, None, 0, 0)
+    receive(b'offline')
+    receive(b'online', False)
+    yield from hass.async_block_till_done()
+    assert calls == ['online', 'offline', 'online']
+
+    # A live message replaces the retained one
+    hass.data['mqtt']._mqtt_on_connect(None, None, 0, 0)
+    receive(b'offline')
+    yield from hass.async_block_till_done()
+    assert calls == ['online', 'offline', 'online', 'offline']
+
+    # New subscribers get the retained message
+    hass.data['mqtt']._mqtt_on_connect(None, None, 0, 0)
+    yield from mqtt.async_subscribe(
+        hass, 'test/state', lambda *args: calls.append(args[1]))
+    receive(b'offline')
+    yield from hass.async_block_till_done()
+    assert calls[4:] == ['offline', 'offline']
+
+
+@asyncio.coroutine
+def test_message_stats(hass):
+    """Test the messages are counted per topic."""
+    yield from async_mock_mqtt_client(hass)
+
+    with mock.patch.object(hass.loop, 'time', return_value=1000):
+        for topic in ('test/a', 'test/a', 'test/b'):
+            async_fire_mqtt_message(hass, topic, 'on')
+        yield from hass.async_block_till_done()
+
+    with mock.patch.object(hass.loop, 'time', return_value=1070):
+        async_fire_mqtt_message(hass, 'test/a', 'on')
+        yield from hass.async_block_till_done()
+        stats = hass.data['mqtt'].async_get_message_stats()
+
+    assert stats == {
+        'test/a': {'count': 3, 'rate': 2 / mqtt.MESSAGE_RATE_WINDOW},
+        'test/b': {'count': 1, 'rate': 1 / mqtt.MESSAGE_RATE_WINDOW},
     }
-    calls = {call[1][1]: call[1][2] for call in hass.add_job.mock_calls}
-    assert calls == expected
+
+
+@asyncio.coroutine
+def test_asyncio_client_loop_with_embedded_broker(hass):
+    """Test the client on the event loop against the embedded broker."""
+    from homeassistant.components.mqtt import server
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    success, _ = yield from server.async_start(hass, {
+        'listeners': {'default': {
+            'type': 'tcp',
+            'bind': '127.0.0.1:{}'.format(port),
+        }},
+        'auth': {'allow-anonymous': True},
+        'plugins': ['auth_anonymous'],
+    })
+    assert success
+
+    client = mqtt.MQTT(
+        hass, '127.0.0.1', port, 'home-assistant', 60, None, None, None, None,
+        None, None, mqtt.PROTOCOL_311, None, None, None,
+        mqtt.CLIENT_LOOP_ASYNCIO)
+    hass.data[mqtt.DATA_MQTT] = client
+
+    with mock.patch.object(hass, 'async_add_job',
+                           wraps=hass.async_add_job) as mock_add_job:
+        assert (yield from client.async_connect())
+
+    # Only connecting ran in the executor
+    assert [call[1][0] for call in mock_add_job.mock_calls] == \
+        [client._mqttc.connect]
+
+    # Retained, the broker handles subscriptions after publishes
+    for idx in range(3):
+        yield from client.async_publish(
+            'test/{}'.format(idx), 'on', 0, True)
+
+    received = asyncio.Queue(loop=hass.loop)
+    yield from mqtt.async_subscribe(
+        hass, 'test/+', lambda *args: received.put_nowait(args[:2]))
+
+    messages = []
+    for _ in range(3):
+        messages.append((yield from asyncio.wait_for(
+            received.get(), 5, loop=hass.loop)))
+    assert sorted(messages) == [
+        ('test/0', 'on'), ('test/1', 'on'), ('test/2', 'on')]
+
+    yield from client.async_disconnect()
+    assert client._sock_fd is None
@@ -0,0 +1,82 @@
+"""The tests for the index of MQTT subscriptions."""
+import pytest
+
+from homeassistant.components.mqtt import Subscription
+from homeassistant.components.mqtt.topic_trie import TopicTrie
+
+
+def _matching_filters(trie, topic):
+    """Return the topic filters of the subscriptions matching a topic."""
+    return sorted(sub.topic for sub in trie.match(topic))
+
+
+@pytest.fixture
+def trie():
+    """Return an index with subscriptions to all kinds of filters."""
+    trie = TopicTrie()
+    for topic_filter in ('#', 'home/+/state', 'home/kitchen/state',
+                         'home/#', '+/+/state', 'home/kitchen/#',
+                         '$SYS/#', 'home/+'):
+        trie.add(Subscription(topic_filter, None))
+    return trie
+
+
+def test_match(trie):
+    """Test the filters matching a topic."""
+    assert _matching_filters(trie, 'home/kitchen/state') == [
+        '#', '+/+/state', 'home/#', 'home/+/state', 'home/kitchen/#',
+        'home/kitchen/state']
+    assert _matching_filters(trie, 'home/kitchen') == [
+        '#', 'home/#', 'home/+', 'home/kitchen/#']
+    assert _matching_filters(trie, 'home') == ['#', 'home/#']
+    assert _matching_filters(trie, 'homes/kitchen') == ['#']
+    assert _matching_filters(trie, 'home//state') == [
+        '#', '+/+/state', 'home/#', 'home/+/state']
+
+
+def test_match_sys_topics(trie):
+    """Test wildcards on the first level do not match $ topics."""
+    assert _matching_filters(trie, '$SYS/broker/uptime') == ['$SYS/#']
+    assert _matching_filters(trie, '$SYS/broker/state') == ['$SYS/#']
+
+
+def test_remove(trie):
+    """Test removed subscriptions no longer match."""
+    subscription = Subscription('home/kitchen/#', lambda *args: None)
+    other = Subscription('home/kitchen/#', lambda *args: None)
+    trie.add(subscription)
+    trie.add(other)
+    assert len(trie) == 10
+
+    trie.remove(subscription)
+    trie.remove(Subscription('home/kitchen/#', None))
+    assert subscription not in trie
+    assert other in trie
+    assert trie.has_topic('home/kitchen/#')
+
+    trie.remove(other)
+    assert not trie.has_topic('home/kitchen/#')
+    assert len(trie) == 7
+    assert len(list(trie)) == 7
+    assert _matching_filters(trie, 'home/kitchen/light') == ['#', 'home/#']
+
+    with pytest.raises(ValueError):
+        trie.remove(other)
+
+
+def test_remove_prunes_levels():
+    """Test the levels without subscriptions are removed."""
+    trie = TopicTrie()
+    subscriptions = [Subscription('a/+/c/#', None),
+                     Subscription('a/b', None)]
+    for subscription in subscriptions:
+        trie.add(subscription)
+
+    for subscription in subscriptions:
+        trie.remove(subscription)
+
+    assert len(trie) == 0
+    assert trie.match('a/b') == []
+    # pylint: disable=protected-access
+    assert trie._root.is_empty()
+    assert trie._exact == {}
@@ -10,7 +10,8 @@ from homeassistant.const import MATCH_ALL
 from homeassistant.components.recorder import Recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
 from homeassistant.components.recorder.util import session_scope
-from homeassistant.components.recorder.models import States, Events
+from homeassistant.components.recorder.models import (
+    Events, StateAttributes, States)
 
 from tests.common import get_test_home_assistant, init_recorder_component
 
@@ -202,3 +203,111 @@ def test_recorder_setup_failure():
         rec.join()
 
     hass.stop()
+
+
+def test_saving_state_batched(hass_recorder):
+    """Test events are committed in batches."""
+    hass = hass_recorder({'commit_interval': 30})
+    instance = hass.data[DATA_INSTANCE]
+
+    for idx in range(5):
+        hass.states.set('test.recorder_{}'.format(idx), 'on')
+    hass.block_till_done()
+
+    # The commit interval has not passed, block_till_done commits right away
+    instance.block_till_done()
+
+    with session_scope(hass=hass) as session:
+        assert session.query(States).count() == 5
+        assert session.query(Events).filter_by(
+            event_type='state_changed').count() == 5
+
+    assert instance.last_commit_events == 5
+    assert instance.last_commit_queue_depth == 0
+
+
+def test_saving_state_max_events(hass_recorder):
+    """Test a batch is committed once it reaches the maximum size."""
+    hass = hass_recorder({'commit_interval': 30, 'commit_max_events': 2})
+    instance = hass.data[DATA_INSTANCE]
+
+    for idx in range(5):
+        hass.states.set('test.recorder_{}'.format(idx), 'on')
+    hass.block_till_done()
+    instance.block_till_done()
+
+    with session_scope(hass=hass) as session:
+        assert session.query(States).count() == 5
+
+    # Two batches of two and the remaining event on flush
+    assert instance.last_commit_events == 1
+
+
+def test_saving_state_links_events(hass_recorder):
+    """Test states written in a batch reference their own events."""
+    hass = hass_recorder({'commit_interval': 30})
+
+    hass.bus.fire('test_event')
+    for idx in range(3):
+        hass.states.set('test.recorder_{}'.format(idx), 'on')
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    with session_scope(hass=hass) as session:
+        rows = session.query(States, Events).join(
+            Events, States.event_id == Events.event_id).all()
+
+        assert len(rows) == 3
+        for dbstate, dbevent in rows:
+            assert dbevent.event_type == 'state_changed'
+            assert dbevent.to_native().data['entity_id'] == dbstate.entity_id
+
+
+def test_saving_state_database_error(hass_recorder):
+    """Test a batch failing with a database error is dropped."""
+    from sqlalchemy.exc import IntegrityError
+
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+
+    with patch.object(instance, '_write_events',
+                      side_effect=IntegrityError('INSERT', {}, None)):
+        hass.states.set('test.recorder', 'on')
+        hass.block_till_done()
+        # Does not hang on the events of the failed batch
+        instance.block_till_done()
+
+    hass.states.set('test.recorder', 'off')
+    hass.block_till_done()
+    instance.block_till_done()
+
+    with session_scope(hass=hass) as session:
+        assert [state.state for state in session.query(States)] == ['off']
+
+
+def test_saving_state_shares_attributes(hass_recorder):
+    """Test states with the same attributes share one attributes row."""
+    hass = hass_recorder()
+    attributes = {'unit_of_measurement': '°C', 'friendly_name': 'Test'}
+
+    for state in ('1', '2'):
+        hass.states.set('test.recorder', state, attributes)
+        hass.block_till_done()
+        hass.data[DATA_INSTANCE].block_till_done()
+
+    hass.states.set('test.recorder', '3', {'friendly_name': 'Other'})
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    with session_scope(hass=hass) as session:
+        assert session.query(StateAttributes).count() == 2
+
+        db_states = session.query(States).order_by(States.state_id).all()
+        assert len(db_states) == 3
+        assert db_states[0].attributes is None
+        assert db_states[0].attributes_id == db_states[1].attributes_id
+        assert db_states[0].attributes_id != db_states[2].attributes_id
+        assert [(state.state, state.attributes) for state in (
+            db_state.to_native() for db_state in db_states)] == [
+                ('1', attributes), ('2', attributes),
+                ('3', {'friendly_name': 'Other'})]
@@ -7,7 +7,8 @@ from unittest.mock import patch
 from homeassistant.components import recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
 from homeassistant.components.recorder.purge import purge_old_data
-from homeassistant.components.recorder.models import States, Events
+from homeassistant.components.recorder.models import (
+    Events, StateAttributes, States)
 from homeassistant.components.recorder.util import session_scope
 from tests.common import get_test_home_assistant, init_recorder_component
 
@@ -147,6 +148,57 @@ class TestRecorderPurge(unittest.TestCase):
             # no state to protect, now we should only have 2 events left
             self.assertEqual(events.count(), 2)
 
+    def test_purge_unused_attributes(self):
+        """Test deleting attributes no longer used by any state."""
+        self._add_test_states()
+
+        with session_scope(hass=self.hass) as session:
+            session.add(StateAttributes(attributes_id=1, shared_attrs='{}'))
+            session.add(StateAttributes(attributes_id=2, shared_attrs='{}'))
+            session.query(States).filter_by(state='dontpurgeme') \
+                .update({'attributes_id': 2})
+
+        purge_old_data(self.hass.data[DATA_INSTANCE], 4, repack=False)
+
+        with session_scope(hass=self.hass) as session:
+            self.assertEqual(
+                [attrs.attributes_id
+                 for attrs in session.query(StateAttributes)], [2])
+
+    def test_purge_in_batches(self):
+        """Test purging in batches that each delete a few rows."""
+        self._add_test_events()
+        self._add_test_states()
+
+        with patch('homeassistant.components.recorder.purge.'
+                   'PURGE_BATCH_SIZE', 2):
+            # 4 states and 4 events to purge take 3 calls
+            for done in (False, False, True):
+                self.assertEqual(purge_old_data(
+                    self.hass.data[DATA_INSTANCE], 4, repack=False), done)
+
+        with session_scope(hass=self.hass) as session:
+            self.assertEqual(session.query(States).count(), 3)
+            self.assertEqual(session.query(Events).filter(
+                Events.event_type.like("EVENT_TEST%")).count(), 3)
+
+    def test_purge_service_in_batches(self):
+        """Test the recorder continues a purge until it is finished."""
+        self._add_test_events()
+        self._add_test_states()
+
+        with patch('homeassistant.components.recorder.purge.'
+                   'PURGE_BATCH_SIZE', 1):
+            self.hass.services.call('recorder', 'purge',
+                                    service_data={'keep_days': 4})
+            self.hass.block_till_done()
+            self.hass.data[DATA_INSTANCE].block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            self.assertEqual(session.query(States).count(), 3)
+            self.assertEqual(session.query(Events).filter(
+                Events.event_type.like("EVENT_TEST%")).count(), 3)
+
     def test_purge_method(self):
         """Test purge method."""
         service_data = {'keep_days': 4}
@@ -207,5 +259,5 @@ class TestRecorderPurge(unittest.TestCase):
                                         service_data=service_data)
                 self.hass.block_till_done()
                 self.hass.data[DATA_INSTANCE].block_till_done()
-                self.assertEqual(mock_logger.debug.mock_calls[4][1][0],
+                self.assertEqual(mock_logger.debug.mock_calls[5][1][0],
                                  "Vacuuming SQLite to free space")
@@ -0,0 +1,107 @@
+"""The tests for the recorder statistics."""
+# pylint: disable=protected-access
+from datetime import datetime, timedelta
+
+import pytest
+
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.models import States, Statistics
+from homeassistant.components.recorder.statistics import (
+    compile_statistics, statistics_during_period)
+from homeassistant.components.recorder.util import session_scope
+import homeassistant.util.dt as dt_util
+
+from tests.common import get_test_home_assistant, init_recorder_component
+
+
+@pytest.fixture
+def hass_recorder():
+    """HASS fixture with in-memory recorder."""
+    hass = get_test_home_assistant()
+    init_recorder_component(hass)
+    hass.start()
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    # Forget the hour compiled on start
+    with session_scope(hass=hass) as session:
+        session.query(Statistics).delete()
+
+    yield hass
+    hass.stop()
+
+
+def _add_states(hass, states):
+    """Add states of (entity_id, state, last_updated) to the database."""
+    with session_scope(hass=hass) as session:
+        for entity_id, state, last_updated in states:
+            session.add(States(
+                entity_id=entity_id,
+                domain=entity_id.split('.')[0],
+                state=state,
+                attributes='{}',
+                last_changed=last_updated,
+                last_updated=last_updated,
+            ))
+
+
+def _stats(hass, start, period='hour'):
+    """Return (entity_id, start, mean, min, max, count) of the statistics."""
+    return [
+        (stats['entity_id'], stats['start'], stats['mean'], stats['min'],
+         stats['max'], stats['count'])
+        for entity_stats in statistics_during_period(
+            hass, start, period=period).values()
+        for stats in entity_stats]
+
+
+def test_compile_hourly_statistics(hass_recorder):
+    """Test compiling the statistics of numeric sensor states."""
+    hass = hass_recorder
+    start = datetime(2018, 5, 1, 10, tzinfo=dt_util.UTC)
+    _add_states(hass, [
+        ('sensor.power', '10', start),
+        ('sensor.power', '30', start + timedelta(minutes=30)),
+        ('sensor.power', 'unavailable', start + timedelta(minutes=40)),
+        ('sensor.power', '50', start + timedelta(hours=1)),
+        ('sensor.status', 'ok', start),
+        ('light.kitchen', '1', start),
+    ])
+
+    compile_statistics(
+        hass.data[DATA_INSTANCE], start + timedelta(hours=1, minutes=5))
+
+    assert _stats(hass, start) == [
+        ('sensor.power', start, 20.0, 10.0, 30.0, 2)]
+
+    # Only the next hour is compiled next time
+    compile_statistics(
+        hass.data[DATA_INSTANCE], start + timedelta(hours=2))
+
+    assert _stats(hass, start) == [
+        ('sensor.power', start, 20.0, 10.0, 30.0, 2),
+        ('sensor.power', start + timedelta(hours=1), 50.0, 50.0, 50.0, 1)]
+
+
+def test_compile_daily_statistics(hass_recorder):
+    """Test days are compiled from their hours."""
+    hass = hass_recorder
+    day = datetime(2018, 5, 1, tzinfo=dt_util.UTC)
+    _add_states(hass, [
+        ('sensor.power', '10', day + timedelta(hours=22, minutes=10)),
+        ('sensor.power', '40', day + timedelta(hours=23, minutes=10)),
+        ('sensor.power', '70', day + timedelta(hours=23, minutes=20)),
+    ])
+
+    instance = hass.data[DATA_INSTANCE]
+    compile_statistics(instance, day + timedelta(hours=22))
+    compile_statistics(instance, day + timedelta(days=1))
+
+    assert _stats(hass, day, 'day') == [
+        ('sensor.power', day, 40.0, 10.0, 70.0, 3)]
+
+    # Statistics are kept when the states are purged
+    with session_scope(hass=hass) as session:
+        session.query(States).delete()
+        assert session.query(Statistics).filter_by(
+            entity_id='sensor.power').count() == 3
@@ -1,6 +1,7 @@
 """The tests the History component."""
 # pylint: disable=protected-access,invalid-name
 from datetime import timedelta
+import json
 import unittest
 from unittest.mock import patch, sentinel
 
@@ -8,6 +9,7 @@ from homeassistant.setup import setup_component, async_setup_component
 import homeassistant.core as ha
 import homeassistant.util.dt as dt_util
 from homeassistant.components import history, recorder
+from homeassistant.remote import JSONEncoder
 
 from tests.common import (
     init_recorder_component, mock_state_change_event, get_test_home_assistant)
@@ -176,6 +178,40 @@ class TestComponentHistory(unittest.TestCase):
             self.hass, zero, four, filters=history.Filters())
         assert states == hist
 
+    def test_stream_significant_states(self):
+        """Test streamed states match the significant states."""
+        zero, four, states = self.record_states()
+
+        for include_start_time_state in (False, True):
+            hist = history.get_significant_states(
+                self.hass, zero + timedelta(seconds=1), four,
+                filters=history.Filters(),
+                include_start_time_state=include_start_time_state)
+            expected = json.loads(json.dumps(
+                list(hist.values()), cls=JSONEncoder))
+
+            with patch('homeassistant.components.history.STREAM_CHUNK_SIZE',
+                       2):
+                streamed = json.loads(''.join(
+                    history.stream_significant_states(
+                        self.hass, zero + timedelta(seconds=1), four,
+                        filters=history.Filters(),
+                        include_start_time_state=include_start_time_state)))
+
+            def entity_id(states):
+                """Return entity id of a list of states."""
+                return states[0]['entity_id']
+
+            assert sorted(streamed, key=entity_id) == \
+                sorted(expected, key=entity_id)
+
+        # Included entities are put first
+        streamed = json.loads(''.join(history.stream_significant_states(
+            self.hass, zero, four, filters=history.Filters(),
+            entity_order=['thermostat.test', 'media_player.test2'])))
+        assert [states[0]['entity_id'] for states in streamed[:2]] == \
+            ['thermostat.test', 'media_player.test2']
+
     def test_get_significant_states_with_initial(self):
         """Test that only significant states are returned.
 
@@ -526,3 +562,127 @@ async def test_fetch_period_api(hass, aiohttp_client):
     response = await client.get(
         '/api/history/period/{}'.format(dt_util.utcnow().isoformat()))
     assert response.status == 200
+
+
+async def test_fetch_period_api_stream(hass, aiohttp_client):
+    """Test streaming the history of a period."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'history', {})
+    await hass.components.recorder.wait_connection_ready()
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('light.kitchen', 'off')
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await aiohttp_client(hass.http.app)
+    response = await client.get(
+        '/api/history/period/{}?stream'.format(
+            (dt_util.utcnow() - timedelta(hours=1)).isoformat()))
+    assert response.status == 200
+    result = await response.json()
+    assert [[state['state'] for state in states] for states in result] == \
+        [['on', 'off']]
+
+
+def test_downsample_numeric_states():
+    """Test numeric states are aggregated per bucket."""
+    start = dt_util.utcnow()
+    states = [ha.State('sensor.power', value, {'unit_of_measurement': 'W'},
+                       start + timedelta(seconds=sec),
+                       start + timedelta(seconds=sec))
+              for sec, value in ((0, 1), (20, 3), (40, 8), (70, 10))]
+
+    result = history.downsample_states(states, start, timedelta(minutes=1))
+    assert [(state.state, state.last_updated) for state in result] == [
+        ('4.0', start), ('10.0', start + timedelta(seconds=70))]
+    assert result[0].attributes == {'unit_of_measurement': 'W'}
+
+    result = history.downsample_states(
+        states, start, timedelta(minutes=1), 'max')
+    assert [state.state for state in result] == ['8.0', '10.0']
+
+
+def test_downsample_keeps_transitions():
+    """Test other states keep the transitions of each bucket."""
+    start = dt_util.utcnow()
+    states = [ha.State('light.kitchen', value, {},
+                       start + timedelta(seconds=sec),
+                       start + timedelta(seconds=sec))
+              for sec, value in ((0, 'on'), (10, 'off'), (20, 'on'),
+                                 (30, 'off'), (70, 'off'), (80, 'on'))]
+
+    result = history.downsample_states(states, start, timedelta(minutes=1))
+    assert [(state.state, state.last_updated) for state in result] == [
+        ('on', start), ('off', start + timedelta(seconds=30)),
+        ('on', start + timedelta(seconds=80))]
+
+
+async def test_fetch_period_api_max_points(hass, aiohttp_client):
+    """Test fetching a downsampled history."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'history', {})
+    await hass.components.recorder.wait_connection_ready()
+    for value in (10, 20):
+        hass.states.async_set('sensor.power', value)
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await aiohttp_client(hass.http.app)
+    start_time = (dt_util.utcnow() - timedelta(hours=1)).isoformat()
+
+    response = await client.get(
+        '/api/history/period/{}?max_points=1'.format(start_time))
+    assert response.status == 200
+    result = await response.json()
+    assert [[state['state'] for state in states] for states in result] == \
+        [['15.0']]
+
+    response = await client.get(
+        '/api/history/period/{}?max_points=0'.format(start_time))
+    assert response.status == 400
+
+    response = await client.get(
+        '/api/history/period/{}?bucket=60&aggregate=median'.format(
+            start_time))
+    assert response.status == 400
+
+
+async def test_fetch_statistics_api(hass, aiohttp_client):
+    """Test fetching the long-term statistics."""
+    from homeassistant.components.recorder.statistics import (
+        compile_statistics)
+
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'history', {})
+    await hass.components.recorder.wait_connection_ready()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    await hass.async_add_job(_delete_statistics, hass)
+    now = dt_util.utcnow()
+    hour_start = now.replace(minute=0, second=0, microsecond=0)
+
+    with patch('homeassistant.core.dt_util.utcnow',
+               return_value=hour_start - timedelta(minutes=30)):
+        hass.states.async_set('sensor.power', 10)
+        await hass.async_block_till_done()
+        await hass.async_add_job(
+            hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    await hass.async_add_job(
+        compile_statistics, hass.data[recorder.DATA_INSTANCE], now)
+
+    client = await aiohttp_client(hass.http.app)
+    response = await client.get('/api/history/statistics/{}'.format(
+        (hour_start - timedelta(hours=1)).isoformat()))
+    assert response.status == 200
+    result = await response.json()
+    assert [(stats['mean'], stats['count'])
+            for stats in result['sensor.power']] == [(10.0, 1)]
+
+    response = await client.get('/api/history/statistics?period=week')
+    assert response.status == 400
+
+
+def _delete_statistics(hass):
+    """Forget the statistics compiled when the recorder started."""
+    from homeassistant.components.recorder.models import Statistics
+
+    with recorder.session_scope(hass=hass) as session:
+        session.query(Statistics).delete()
@@ -0,0 +1,130 @@
+"""The tests for the instrumentation component."""
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.components import instrumentation
+from homeassistant.const import EVENT_HOMEASSISTANT_START
+from homeassistant.core import callback
+from homeassistant.setup import async_setup_component
+
+from tests.common import MockEntity
+
+
+@pytest.fixture
+def instrumentation_client(hass, aiohttp_client):
+    """Set up the instrumentation and return an API client."""
+    assert hass.loop.run_until_complete(
+        async_setup_component(hass, 'instrumentation', {}))
+    return hass.loop.run_until_complete(aiohttp_client(hass.http.app))
+
+
+def test_disabled_by_default(hass):
+    """Test nothing is recorded without the component."""
+    assert hass.instrumentation is None
+
+
+async def test_records_jobs(hass, instrumentation_client):
+    """Test listeners, services and executor jobs are recorded."""
+    @callback
+    def listener(event):
+        """Handle an event."""
+        pass
+
+    hass.bus.async_listen('test_event', listener)
+    hass.services.async_register('test', 'service', lambda call: None)
+
+    hass.bus.async_fire('test_event')
+    await hass.services.async_call('test', 'service', blocking=True)
+    await hass.async_add_job(lambda: None)
+    entity = MockEntity(entity_id='test.entity')
+    entity.hass = hass
+    await entity.async_update_ha_state()
+    await hass.async_block_till_done()
+
+    resp = await instrumentation_client.get(
+        instrumentation.URL_API_INSTRUMENTATION)
+    assert resp.status == 200
+    snapshot = await resp.json()
+
+    listener_name = '{}.{}'.format(__name__, listener.__qualname__)
+    assert snapshot['listener'][listener_name]['count'] == 1
+    assert snapshot['service']['test.service']['count'] == 1
+    assert snapshot['entity_update']['test.entity']['count'] == 1
+    assert snapshot['executor_wait']['count'] >= 2
+    assert sum(snapshot['executor_wait']['buckets'].values()) == \
+        snapshot['executor_wait']['count']
+
+
+async def test_loop_lag_entity(hass):
+    """Test the loop lag is sampled into an entity."""
+    with patch.object(hass.loop, 'call_at') as mock_call_at:
+        assert await async_setup_component(hass, 'instrumentation', {
+            'instrumentation': {'scan_interval': 10}})
+
+    when, sample_loop, expected = [
+        call[1] for call in mock_call_at.mock_calls
+        if len(call[1]) == 3 and call[1][1].__name__ == 'sample_loop'][0]
+    assert when == expected
+
+    with patch.object(hass.loop, 'call_at') as mock_call_at, \
+            patch.object(hass.loop, 'time', return_value=expected + 0.25):
+        sample_loop(expected)
+
+    # Next sample is scheduled an interval after this one
+    assert mock_call_at.mock_calls[0][1][0] == expected + 10.25
+
+    state = hass.states.get(instrumentation.ENTITY_ID)
+    assert state.state == '250.0'
+    assert state.attributes[instrumentation.ATTR_MAX_LOOP_LAG] == 250.0
+    assert state.attributes[instrumentation.ATTR_EXECUTOR_QUEUE] == 0
+
+
+async def test_startup_timeline(hass, instrumentation_client):
+    """Test the timeline of the startup is written and served."""
+    with patch('homeassistant.components.instrumentation.save_json') \
+            as mock_save:
+        hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
+        await hass.async_block_till_done()
+
+    path, trace = mock_save.mock_calls[0][1]
+    assert path == hass.config.path(instrumentation.STARTUP_TIMELINE_FILE)
+    assert [event['args']['name'] for event in trace['traceEvents']
+            if event['ph'] == 'M'] == ['instrumentation', 'http']
+
+    resp = await instrumentation_client.get(
+        instrumentation.URL_API_STARTUP_TIMELINE)
+    assert resp.status == 200
+    result = await resp.json()
+    assert [event['name'] for event in result['traceEvents']
+            if event.get('cat') == 'instrumentation'] == ['import', 'setup']
+
+
+async def test_websocket_snapshot(hass, hass_ws_client):
+    """Test the snapshot is available over the websocket API."""
+    assert await async_setup_component(hass, 'instrumentation', {})
+    client = await hass_ws_client(hass)
+    await client.send_json({
+        'id': 5,
+        'type': instrumentation.WS_TYPE_INSTRUMENTATION,
+    })
+
+    msg = await client.receive_json()
+    assert msg['id'] == 5
+    assert msg['success']
+    assert 'loop_lag' in msg['result']
+    assert 'executor_queue' in msg['result']
+
+
+def test_histogram():
+    """Test durations are counted in their buckets."""
+    histogram = instrumentation.Histogram()
+
+    for duration in (0.0005, 0.05, 0.05, 20):
+        histogram.add(duration)
+
+    result = histogram.as_dict()
+    assert result['count'] == 4
+    assert result['max'] == 20
+    assert result['buckets'] == {
+        '0.001': 1, '0.01': 0, '0.1': 2, '1': 0, '10': 0, '+Inf': 1}
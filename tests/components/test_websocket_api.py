@@ -6,6 +6,7 @@ from aiohttp import WSMsgType
 from async_timeout import timeout
 import pytest
 
+from homeassistant import core
 from homeassistant.core import callback
 from homeassistant.components import websocket_api as wapi
 from homeassistant.setup import async_setup_component
@@ -215,6 +216,33 @@ def test_subscribe_unsubscribe_events(hass, websocket_client):
     assert sum(hass.bus.async_listeners().values()) == init_count
 
 
+@asyncio.coroutine
+def test_subscribe_events_encoded_once(hass, websocket_client):
+    """Test an event is encoded once for all subscriptions."""
+    for iden in (5, 6):
+        yield from websocket_client.send_json({
+            'id': iden,
+            'type': wapi.TYPE_SUBSCRIBE_EVENTS,
+            'event_type': 'test_event'
+        })
+        msg = yield from websocket_client.receive_json()
+        assert msg['success']
+
+    with patch('homeassistant.core._json_encode',
+               wraps=core._json_encode) as mock_encode:
+        hass.bus.async_fire('test_event', {'hello': 'world'})
+
+        with timeout(3, loop=hass.loop):
+            msgs = []
+            for _ in range(2):
+                msgs.append((yield from websocket_client.receive_json()))
+
+    assert len(mock_encode.mock_calls) == 1
+    assert sorted(msg['id'] for msg in msgs) == [5, 6]
+    assert msgs[0]['event'] == msgs[1]['event']
+    assert msgs[0]['event']['data'] == {'hello': 'world'}
+
+
 @asyncio.coroutine
 def test_get_states(hass, websocket_client):
     """Test get_states command."""
@@ -231,6 +231,79 @@ def test_async_schedule_update_ha_state(hass):
     assert update_call is True
 
 
+@asyncio.coroutine
+def test_coalesce_state_writes(hass):
+    """Test state writes within the coalesce window are collapsed."""
+    now = 1000
+
+    class CoalescedEntity(entity.Entity):
+        """Entity coalescing its state writes."""
+
+        entity_id = 'sensor.power'
+        state_coalesce_window = 10
+        value = '10'
+        device_state_attributes = None
+
+        @property
+        def state(self):
+            """Return the state."""
+            return self.value
+
+    def write(value, attr):
+        """Update the entity at the current time."""
+        mock_entity.value = value
+        mock_entity.device_state_attributes = attr
+        yield from mock_entity.async_update_ha_state()
+
+    mock_entity = CoalescedEntity()
+    mock_entity.hass = hass
+
+    with patch.object(hass.loop, 'time', lambda: now), \
+            patch.object(hass.loop, 'call_at') as mock_call_at:
+        # First write goes out right away
+        yield from write('10', {'count': 1})
+        assert hass.states.get('sensor.power').state == '10'
+
+        now += 1
+        yield from write('10', {'count': 2})
+        now += 1
+        yield from write('10', {'count': 3})
+        assert hass.states.get('sensor.power').attributes['count'] == 1
+
+        # Latest write goes out at the end of the window
+        assert len(mock_call_at.mock_calls) == 1
+        when, write_pending = mock_call_at.mock_calls[0][1]
+        assert when == 1010
+        now = when
+        write_pending()
+        assert hass.states.get('sensor.power').attributes['count'] == 3
+
+        # A first change of the state value is not delayed
+        now += 1
+        yield from write('20', {'count': 4})
+        assert hass.states.get('sensor.power').state == '20'
+
+        # Following changes are coalesced to the latest
+        now += 1
+        yield from write('30', {'count': 5})
+        now += 1
+        yield from write('40', {'count': 6})
+        assert hass.states.get('sensor.power').state == '20'
+
+        assert len(mock_call_at.mock_calls) == 2
+        mock_call_at.mock_calls[1][1][1]()
+        state = hass.states.get('sensor.power')
+        assert state.state == '40'
+        assert state.attributes['count'] == 6
+
+        # Nothing is written after the entity is removed
+        now += 1
+        yield from write('50', {'count': 7})
+        yield from mock_entity.async_remove()
+        mock_call_at.mock_calls[2][1][1]()
+        assert hass.states.get('sensor.power') is None
+
+
 @asyncio.coroutine
 def test_async_parallel_updates_with_zero(hass):
     """Test parallel updates with 0 (disabled)."""
@@ -136,8 +136,8 @@ class TestHelpersEntityPlatform(unittest.TestCase):
         assert 1 == len(self.hass.states.entity_ids())
         assert not ent.update.called
 
-    @patch('homeassistant.helpers.entity_platform.'
-           'async_track_time_interval')
+    @patch('homeassistant.helpers.poll_scheduler.PollScheduler.'
+           'async_add_entity')
     def test_set_scan_interval_via_platform(self, mock_track):
         """Test the setting of the scan interval via platform."""
         def platform_setup(hass, config, add_devices, discovery_info=None):
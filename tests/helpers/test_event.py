@@ -10,9 +10,16 @@ import pytest
 from homeassistant.core import callback
 from homeassistant.setup import setup_component
 import homeassistant.core as ha
-from homeassistant.const import MATCH_ALL
+from homeassistant.const import (
+    EVENT_STATE_CHANGED, EVENT_TIME_CHANGED, MATCH_ALL)
 from homeassistant.helpers.event import (
+    DATA_STATE_CHANGE_ROUTER,
     async_call_later,
+    async_track_point_in_utc_time,
+    async_track_state_change,
+    async_track_template,
+    async_track_time_change,
+    async_track_utc_time_change,
     track_point_in_utc_time,
     track_point_in_time,
     track_utc_time_change,
@@ -28,7 +35,8 @@ from homeassistant.helpers.template import Template
 from homeassistant.components import sun
 import homeassistant.util.dt as dt_util
 
-from tests.common import get_test_home_assistant, fire_time_changed
+from tests.common import (
+    get_test_home_assistant, fire_time_changed, async_fire_time_changed)
 from unittest.mock import patch
 
 
@@ -663,3 +671,299 @@ def test_async_call_later(hass):
     assert p_action is action
     assert p_point == now + timedelta(seconds=3)
     assert remove is mock()
+
+
+async def test_point_in_utc_time_shares_listener(hass):
+    """Test point in time listeners share one time changed listener."""
+    now = datetime(2017, 12, 19, 15, 40, 0, tzinfo=dt_util.UTC)
+    runs = []
+
+    for delay in (3, 1, 2, 1):
+        async_track_point_in_utc_time(
+            hass, callback(lambda now, delay=delay: runs.append(delay)),
+            now + timedelta(seconds=delay))
+
+    assert hass.bus.async_listeners()[EVENT_TIME_CHANGED] == 1
+
+    async_fire_time_changed(hass, now)
+    await hass.async_block_till_done()
+    assert runs == []
+
+    async_fire_time_changed(hass, now + timedelta(seconds=2))
+    await hass.async_block_till_done()
+    assert runs == [1, 1, 2]
+
+    async_fire_time_changed(hass, now + timedelta(seconds=5))
+    await hass.async_block_till_done()
+    assert runs == [1, 1, 2, 3]
+    assert EVENT_TIME_CHANGED not in hass.bus.async_listeners()
+
+
+async def test_point_in_utc_time_cancel(hass):
+    """Test cancelling point in time listeners."""
+    now = datetime(2017, 12, 19, 15, 40, 0, tzinfo=dt_util.UTC)
+    runs = []
+
+    unsubs = [
+        async_track_point_in_utc_time(
+            hass, callback(lambda now, idx=idx: runs.append(idx)),
+            now + timedelta(seconds=idx))
+        for idx in range(10)]
+
+    for unsub in unsubs[::2]:
+        unsub()
+
+    # Cancelling twice is a no-op
+    unsubs[0]()
+
+    async_fire_time_changed(hass, now + timedelta(seconds=10))
+    await hass.async_block_till_done()
+    assert runs == [1, 3, 5, 7, 9]
+
+    # Cancelling after the action ran is a no-op
+    unsubs[1]()
+    assert EVENT_TIME_CHANGED not in hass.bus.async_listeners()
+
+
+async def test_point_in_utc_time_action_error(hass):
+    """Test a failing action does not prevent other actions from running."""
+    now = datetime(2017, 12, 19, 15, 40, 0, tzinfo=dt_util.UTC)
+    runs = []
+
+    @callback
+    def failing_action(now):
+        """Raise an error."""
+        raise ValueError
+
+    async_track_point_in_utc_time(hass, failing_action, now)
+    async_track_point_in_utc_time(
+        hass, callback(lambda now: runs.append(now)), now)
+
+    async_fire_time_changed(hass, now)
+    await hass.async_block_till_done()
+    assert runs == [now]
+
+
+async def test_time_patterns_share_listener(hass):
+    """Test time pattern listeners share one time changed listener."""
+    runs = []
+
+    async_track_utc_time_change(
+        hass, callback(lambda now: runs.append('second')), second=30)
+    unsub = async_track_utc_time_change(
+        hass, callback(lambda now: runs.append('minute')), minute=1,
+        second=0)
+
+    assert hass.bus.async_listeners()[EVENT_TIME_CHANGED] == 1
+
+    now = datetime(2017, 12, 19, 15, 0, 0, tzinfo=dt_util.UTC)
+
+    for seconds in range(0, 120, 5):
+        async_fire_time_changed(hass, now + timedelta(seconds=seconds))
+        await hass.async_block_till_done()
+
+    assert runs == ['second', 'minute', 'second']
+
+    unsub()
+    async_fire_time_changed(hass, now + timedelta(minutes=61))
+    await hass.async_block_till_done()
+    assert runs == ['second', 'minute', 'second']
+
+
+async def test_time_pattern_time_jumps(hass):
+    """Test time patterns when time jumps forward and back."""
+    runs = []
+
+    async_track_utc_time_change(
+        hass, callback(lambda now: runs.append(now)), minute=0, second=0)
+
+    now = datetime(2017, 12, 19, 15, 0, 0, tzinfo=dt_util.UTC)
+    async_fire_time_changed(hass, now)
+    await hass.async_block_till_done()
+    assert runs == [now]
+
+    # Jumping over a match does not fire
+    async_fire_time_changed(hass, now + timedelta(hours=1, seconds=1))
+    await hass.async_block_till_done()
+    assert runs == [now]
+
+    # Going back in time recalculates the next match
+    async_fire_time_changed(hass, now)
+    await hass.async_block_till_done()
+    assert runs == [now, now]
+
+    async_fire_time_changed(hass, now + timedelta(hours=2))
+    await hass.async_block_till_done()
+    assert runs == [now, now, now + timedelta(hours=2)]
+
+
+async def test_time_pattern_never_matches(hass):
+    """Test patterns that can never match do not fire or block."""
+    runs = []
+
+    for kwargs in ({'hour': 24}, {'minute': '5'}, {'second': 60},
+                   {'month': 2, 'day': 30}):
+        async_track_utc_time_change(
+            hass, callback(lambda now: runs.append(now)), **kwargs)
+
+    now = datetime(2017, 12, 19, 15, 0, 0, tzinfo=dt_util.UTC)
+
+    # Firing the same time again anchors all patterns once more
+    for _ in range(2):
+        async_fire_time_changed(hass, now)
+        await hass.async_block_till_done()
+
+    assert runs == []
+
+
+async def test_time_pattern_next_match_leap_day(hass):
+    """Test the next match jumps over years without the day."""
+    runs = []
+
+    async_track_utc_time_change(
+        hass, callback(lambda now: runs.append(now)), month=2, day=29,
+        hour=0, minute=0, second=0)
+
+    async_fire_time_changed(
+        hass, datetime(2017, 3, 1, 0, 0, 0, tzinfo=dt_util.UTC))
+    await hass.async_block_till_done()
+
+    leap_day = datetime(2020, 2, 29, 0, 0, 0, tzinfo=dt_util.UTC)
+    async_fire_time_changed(hass, leap_day - timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert runs == []
+
+    async_fire_time_changed(hass, leap_day)
+    await hass.async_block_till_done()
+    assert runs == [leap_day]
+
+
+async def test_local_time_pattern(hass):
+    """Test local time patterns are matched on local time."""
+    runs = []
+    orig_time_zone = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(dt_util.get_time_zone('US/Pacific'))
+
+    try:
+        async_track_time_change(
+            hass, callback(lambda now: runs.append(now)), hour=7, minute=0,
+            second=0)
+
+        # US/Pacific is UTC-8 in December
+        now = datetime(2017, 12, 19, 14, 0, 0, tzinfo=dt_util.UTC)
+        async_fire_time_changed(hass, now)
+        await hass.async_block_till_done()
+        assert runs == []
+
+        async_fire_time_changed(hass, now + timedelta(hours=1))
+        await hass.async_block_till_done()
+        assert len(runs) == 1
+        assert runs[0].hour == 7
+        assert runs[0] == now + timedelta(hours=1)
+    finally:
+        dt_util.set_default_time_zone(orig_time_zone)
+
+
+async def test_state_change_router(hass):
+    """Test state change trackers share one listener keyed by entity id."""
+    runs = []
+
+    unsub_light = async_track_state_change(
+        hass, ['light.Kitchen', 'light.bowl'],
+        callback(
+            lambda entity_id, old, new: runs.append(('light', entity_id))))
+    async_track_state_change(
+        hass, MATCH_ALL,
+        callback(lambda entity_id, old, new: runs.append(('all', entity_id))))
+    async_track_state_change(
+        hass, 'light.kitchen',
+        callback(lambda entity_id, old, new: runs.append(('one', entity_id))))
+
+    assert hass.bus.async_listeners()[EVENT_STATE_CHANGED] == 1
+
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('switch.kitchen', 'on')
+    await hass.async_block_till_done()
+
+    # Listeners are called in the order they were added
+    assert runs == [('light', 'light.kitchen'), ('all', 'light.kitchen'),
+                    ('one', 'light.kitchen'), ('all', 'switch.kitchen')]
+
+    runs.clear()
+    unsub_light()
+    # Removing twice is a no-op
+    unsub_light()
+
+    hass.states.async_set('light.bowl', 'on')
+    await hass.async_block_till_done()
+    assert runs == [('all', 'light.bowl')]
+
+
+async def test_state_change_router_no_entities(hass):
+    """Test trackers without entities can be removed at any time."""
+    action = callback(lambda entity_id, old, new: None)
+
+    unsub_light = async_track_state_change(hass, ('light.a',), action)
+    unsub_empty = async_track_state_change(hass, (), action)
+    unsub_light()
+    assert EVENT_STATE_CHANGED not in hass.bus.async_listeners()
+
+    unsub_empty()
+    assert EVENT_STATE_CHANGED not in hass.bus.async_listeners()
+
+
+async def test_track_template_render_dependencies(hass):
+    """Test templates are tracked on the states read by the last render."""
+    runs = []
+    router_listeners = []
+    hass.states.async_set('switch.test', 'off')
+    hass.states.async_set('light.kitchen', 'off')
+
+    tpl = Template(
+        "{% if is_state('switch.test', 'on') %}"
+        "{{ states.light | selectattr('state', 'eq', 'on') | list | count "
+        "> 1 }}{% else %}{{ is_state('sensor.test', 'on') }}{% endif %}",
+        hass)
+
+    def listeners():
+        """Return the entities and domains tracked by the router."""
+        router = hass.data[DATA_STATE_CHANGE_ROUTER]
+        return (set(router.async_listeners()),
+                set(router.async_domain_listeners()))
+
+    unsub = async_track_template(
+        hass, tpl, callback(lambda *args: runs.append(args[0])))
+    router_listeners.append(listeners())
+
+    hass.states.async_set('switch.test', 'on')
+    await hass.async_block_till_done()
+    router_listeners.append(listeners())
+
+    hass.states.async_set('light.kitchen', 'on')
+    await hass.async_block_till_done()
+    hass.states.async_set('light.bowl', 'on')
+    await hass.async_block_till_done()
+
+    assert router_listeners == [
+        ({'switch.test', 'sensor.test'}, set()),
+        ({'switch.test'}, {'light'}),
+    ]
+    assert runs == ['light.bowl']
+
+    unsub()
+    assert listeners() == (set(), set())
+
+
+async def test_track_template_without_states(hass):
+    """Test templates reading no states are rendered on every change."""
+    runs = []
+    async_track_template(
+        hass, Template('{{ now().year > 2000 }}', hass),
+        callback(lambda *args: runs.append(args[0])))
+
+    hass.states.async_set('sensor.test', 'on')
+    await hass.async_block_till_done()
+
+    assert runs == ['sensor.test']
+    assert hass.data[DATA_STATE_CHANGE_ROUTER].async_listeners() == {
+        MATCH_ALL: 1}
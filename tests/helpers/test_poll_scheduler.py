@@ -0,0 +1,128 @@
+"""Test the poll scheduler."""
+import asyncio
+from datetime import timedelta
+import logging
+from unittest.mock import patch
+
+from homeassistant.helpers.entity_component import EntityComponent
+from homeassistant.helpers.poll_scheduler import (
+    DATA_POLL_SCHEDULER, PollScheduler, async_get_poll_scheduler, poll_phase)
+import homeassistant.util.dt as dt_util
+
+from tests.common import async_fire_time_changed, MockEntity
+
+_LOGGER = logging.getLogger(__name__)
+DOMAIN = 'test_domain'
+INTERVAL = timedelta(seconds=20)
+
+
+def _mock_polled_entity(entity_id, polls, release=None):
+    """Return an entity that records its polls."""
+    entity = MockEntity(entity_id=entity_id, should_poll=True)
+
+    async def async_update():
+        """Record the poll and wait until released."""
+        polls.append(entity_id)
+        if release is not None:
+            await release.wait()
+
+    entity.async_update = async_update
+    return entity
+
+
+async def _async_add_entities(hass, entities, now):
+    """Add polled entities to a component at now."""
+    component = EntityComponent(_LOGGER, DOMAIN, hass, INTERVAL)
+
+    with patch('homeassistant.helpers.poll_scheduler.dt_util.utcnow',
+               return_value=now):
+        await component.async_add_entities(entities)
+
+    return component
+
+
+def test_poll_phase():
+    """Test the phases are stable and spread over the interval."""
+    phases = {poll_phase('sensor.power_{}'.format(idx), INTERVAL)
+              for idx in range(10)}
+
+    assert len(phases) == 10
+    assert all(timedelta(0) <= phase < INTERVAL for phase in phases)
+    assert poll_phase('sensor.power_1', INTERVAL) == \
+        poll_phase('sensor.power_1', INTERVAL)
+    assert poll_phase('sensor.power_1', timedelta(0)) == timedelta(0)
+
+
+async def test_poll_at_phase(hass):
+    """Test an entity is polled at its phase of every interval."""
+    polls = []
+    now = dt_util.utcnow()
+    phase = poll_phase('test_domain.phase', INTERVAL)
+    await _async_add_entities(
+        hass, [_mock_polled_entity('test_domain.phase', polls)], now)
+
+    async_fire_time_changed(hass, now + phase - timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert polls == []
+
+    async_fire_time_changed(hass, now + phase)
+    await hass.async_block_till_done()
+    assert polls == ['test_domain.phase']
+
+    async_fire_time_changed(hass, now + phase + INTERVAL)
+    await hass.async_block_till_done()
+    assert polls == ['test_domain.phase', 'test_domain.phase']
+
+    stats = async_get_poll_scheduler(hass).async_get_stats()
+    assert stats['test_domain.test_domain']['polls'] == 2
+    assert stats['test_domain.test_domain']['overruns'] == 0
+
+
+async def _async_run_loop(hass):
+    """Let the polls run until they wait to be released."""
+    for _ in range(10):
+        await asyncio.sleep(0, loop=hass.loop)
+
+
+async def test_poll_overrun(hass):
+    """Test a poll is skipped while the previous one still runs."""
+    polls = []
+    release = asyncio.Event(loop=hass.loop)
+    now = dt_util.utcnow()
+    await _async_add_entities(
+        hass, [_mock_polled_entity('test_domain.slow', polls, release)], now)
+
+    async_fire_time_changed(hass, now + INTERVAL)
+    await _async_run_loop(hass)
+    async_fire_time_changed(hass, now + 2 * INTERVAL)
+    await _async_run_loop(hass)
+
+    assert polls == ['test_domain.slow']
+    stats = async_get_poll_scheduler(hass).async_get_stats()
+    assert stats['test_domain.test_domain']['polls'] == 0
+    assert stats['test_domain.test_domain']['overruns'] == 1
+
+    release.set()
+    await hass.async_block_till_done()
+    stats = async_get_poll_scheduler(hass).async_get_stats()
+    assert stats['test_domain.test_domain']['polls'] == 1
+
+
+async def test_poll_budget(hass):
+    """Test the number of polls running at once is limited."""
+    polls = []
+    release = asyncio.Event(loop=hass.loop)
+    now = dt_util.utcnow()
+    hass.data[DATA_POLL_SCHEDULER] = PollScheduler(hass, 2)
+    await _async_add_entities(hass, [
+        _mock_polled_entity('test_domain.budget_{}'.format(idx), polls,
+                            release)
+        for idx in range(3)], now)
+
+    async_fire_time_changed(hass, now + INTERVAL)
+    await _async_run_loop(hass)
+    assert len(polls) == 2
+
+    release.set()
+    await hass.async_block_till_done()
+    assert len(polls) == 3
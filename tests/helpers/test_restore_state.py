@@ -29,11 +29,11 @@ def test_caching_data(hass):
         State('input_boolean.b2', 'on'),
     ]
 
-    with patch('homeassistant.helpers.restore_state.last_recorder_run',
+    with patch('homeassistant.components.history.last_recorder_run',
                return_value=MagicMock(end=dt_util.utcnow())), \
-            patch('homeassistant.helpers.restore_state.get_states',
+            patch('homeassistant.components.history.get_states',
                   return_value=states), \
-            patch('homeassistant.helpers.restore_state.wait_connection_ready',
+            patch('homeassistant.components.recorder.wait_connection_ready',
                   return_value=mock_coro(True)):
         state = yield from async_get_last_state(hass, 'input_boolean.b1')
 
@@ -62,11 +62,11 @@ def test_hass_running(hass):
         State('input_boolean.b2', 'on'),
     ]
 
-    with patch('homeassistant.helpers.restore_state.last_recorder_run',
+    with patch('homeassistant.components.history.last_recorder_run',
                return_value=MagicMock(end=dt_util.utcnow())), \
-            patch('homeassistant.helpers.restore_state.get_states',
+            patch('homeassistant.components.history.get_states',
                   return_value=states), \
-            patch('homeassistant.helpers.restore_state.wait_connection_ready',
+            patch('homeassistant.components.recorder.wait_connection_ready',
                   return_value=mock_coro(True)):
         state = yield from async_get_last_state(hass, 'input_boolean.b1')
     assert state is None
@@ -80,11 +80,11 @@ def test_not_connected(hass):
 
     states = [State('input_boolean.b1', 'on')]
 
-    with patch('homeassistant.helpers.restore_state.last_recorder_run',
+    with patch('homeassistant.components.history.last_recorder_run',
                return_value=MagicMock(end=dt_util.utcnow())), \
-            patch('homeassistant.helpers.restore_state.get_states',
+            patch('homeassistant.components.history.get_states',
                   return_value=states), \
-            patch('homeassistant.helpers.restore_state.wait_connection_ready',
+            patch('homeassistant.components.recorder.wait_connection_ready',
                   return_value=mock_coro(False)):
         state = yield from async_get_last_state(hass, 'input_boolean.b1')
     assert state is None
@@ -98,11 +98,11 @@ def test_no_last_run_found(hass):
 
     states = [State('input_boolean.b1', 'on')]
 
-    with patch('homeassistant.helpers.restore_state.last_recorder_run',
+    with patch('homeassistant.components.history.last_recorder_run',
                return_value=None), \
-            patch('homeassistant.helpers.restore_state.get_states',
+            patch('homeassistant.components.history.get_states',
                   return_value=states), \
-            patch('homeassistant.helpers.restore_state.wait_connection_ready',
+            patch('homeassistant.components.recorder.wait_connection_ready',
                   return_value=mock_coro(True)):
         state = yield from async_get_last_state(hass, 'input_boolean.b1')
     assert state is None
@@ -120,11 +120,11 @@ def test_cache_timeout(hass):
     def timeout_coro():
         raise asyncio.TimeoutError()
 
-    with patch('homeassistant.helpers.restore_state.last_recorder_run',
+    with patch('homeassistant.components.history.last_recorder_run',
                return_value=MagicMock(end=dt_util.utcnow())), \
-            patch('homeassistant.helpers.restore_state.get_states',
+            patch('homeassistant.components.history.get_states',
                   return_value=states), \
-            patch('homeassistant.helpers.restore_state.wait_connection_ready',
+            patch('homeassistant.components.recorder.wait_connection_ready',
                   return_value=timeout_coro()):
         state = yield from async_get_last_state(hass, 'input_boolean.b1')
     assert state is None
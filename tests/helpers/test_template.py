@@ -6,6 +6,8 @@ import random
 import math
 from unittest.mock import patch
 
+import jinja2
+
 from homeassistant.components import group
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import template
@@ -1019,3 +1021,93 @@ def test_length_of_states(hass):
 
     tpl = template.Template('{{ states.sensor | length }}', hass)
     assert tpl.async_render() == '2'
+
+
+def test_render_to_info(hass):
+    """Test the states read by a render are recorded."""
+    hass.states.async_set('sensor.test', '23')
+    hass.states.async_set('light.kitchen', 'on', {'brightness': 100})
+
+    info = template.Template(
+        "{{ states.sensor.test.state }} {{ states('Light.Kitchen') }} "
+        "{{ is_state('switch.a', 'on') }} "
+        "{{ state_attr('light.kitchen', 'brightness') }} "
+        "{{ states.climate | list | count }}", hass).async_render_to_info()
+
+    assert info.result == '23 on False 100 0'
+    assert info.exception is None
+    assert info.entities == {'sensor.test', 'light.kitchen', 'switch.a'}
+    assert info.domains == {'climate'}
+    assert not info.all_states
+
+    info = template.Template(
+        '{{ states | count }}', hass).async_render_to_info()
+    assert info.all_states
+
+    info = template.Template(
+        '{{ states.sensor.missing.state.lower() }}',
+        hass).async_render_to_info()
+    assert isinstance(info.exception, TemplateError)
+    assert info.entities == {'sensor.missing'}
+
+    # Nothing is recorded outside of a render to info
+    assert template.Template(
+        '{{ states.sensor.test.state }}', hass).async_render() == '23'
+    assert template._RENDER_INFO not in hass.data or \
+        hass.data[template._RENDER_INFO] is None
+
+
+def test_compiled_code_is_shared(hass):
+    """Test templates with the same source share their compiled code."""
+    first = template.Template('{{ value_json.temperature }}', hass)
+    second = template.Template('{{ value_json.temperature }}', hass)
+
+    first.ensure_valid()
+    second.ensure_valid()
+    assert first._compiled_code is second._compiled_code
+
+    assert first.async_render_with_possible_json_value(
+        '{"temperature": 21}') == '21'
+    assert second.async_render_with_possible_json_value(
+        '{"temperature": 22}') == '22'
+
+
+def test_memoized_render(hass):
+    """Test a memoized template renders again after a read state changed."""
+    hass.states.async_set('sensor.test', '23')
+    tpl = template.Template(
+        '{{ states.sensor.test.state }} {{ is_state("switch.a", "on") }}',
+        hass, memoize=True)
+
+    with patch.object(jinja2.Template, 'render',
+                      autospec=True,
+                      side_effect=jinja2.Template.render) as mock_render:
+        assert tpl.async_render() == '23 False'
+        assert tpl.async_render() == '23 False'
+        assert len(mock_render.mock_calls) == 1
+
+        info = tpl.async_render_to_info()
+        assert info.result == '23 False'
+        assert info.entities == {'sensor.test', 'switch.a'}
+        assert len(mock_render.mock_calls) == 1
+
+        # Writing an unchanged state keeps the state object
+        hass.states.async_set('sensor.test', '23')
+        assert tpl.async_render() == '23 False'
+        assert len(mock_render.mock_calls) == 1
+
+        hass.states.async_set('switch.a', 'on')
+        assert tpl.async_render() == '23 True'
+        assert len(mock_render.mock_calls) == 2
+
+        # Renders with variables are not memoized
+        assert tpl.async_render({'extra': 1}) == '23 True'
+        assert len(mock_render.mock_calls) == 3
+
+
+def test_memoized_render_without_states(hass):
+    """Test templates reading no states or a domain are not memoized."""
+    for source in ('{{ 1 + 1 }}', '{{ states.sensor | list | count }}'):
+        tpl = template.Template(source, hass, memoize=True)
+        tpl.async_render()
+        assert tpl._memo is None
@@ -220,6 +220,8 @@ class TestConfig(unittest.TestCase):
                 {'customize': 'bla'},
                 {'customize': {'light.sensor': 100}},
                 {'customize': {'entity_id': []}},
+                {'executors': {'unknown': 2}},
+                {'executors': {'database': 0}},
         ):
             with pytest.raises(MultipleInvalid):
                 config_util.CORE_CONFIG_SCHEMA(value)
@@ -234,6 +236,9 @@ class TestConfig(unittest.TestCase):
                     'hidden': True,
                 },
             },
+            'executors': {
+                'database': 2,
+            },
         })
 
     def test_customize_dict_schema(self):
@@ -422,6 +427,7 @@ class TestConfig(unittest.TestCase):
                 CONF_UNIT_SYSTEM: CONF_UNIT_SYSTEM_IMPERIAL,
                 'time_zone': 'America/New_York',
                 'whitelist_external_dirs': '/tmp',
+                'executors': {'database': 2},
             }), self.hass.loop).result()
 
         assert self.hass.config.latitude == 60
@@ -432,6 +438,7 @@ class TestConfig(unittest.TestCase):
         assert self.hass.config.time_zone.zone == 'America/New_York'
         assert len(self.hass.config.whitelist_external_dirs) == 2
         assert '/tmp' in self.hass.config.whitelist_external_dirs
+        assert self.hass.executor_sizes['database'] == 2
 
     def test_loading_configuration_temperature_unit(self):
         """Test backward compatibility when loading core config."""
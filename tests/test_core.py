@@ -1,6 +1,7 @@
 """Test to verify that Home Assistant core works."""
 # pylint: disable=protected-access
 import asyncio
+import json
 import logging
 import os
 import unittest
@@ -268,6 +269,21 @@ class TestEvent(unittest.TestCase):
         }
         self.assertEqual(expected, event.as_dict())
 
+    def test_as_json(self):
+        """Test the event is encoded once."""
+        now = dt_util.utcnow()
+        event = ha.Event('some_type', {'some': 'attr'},
+                         ha.EventOrigin.local, now)
+        encoded = event.as_json()
+
+        self.assertEqual({
+            'event_type': 'some_type',
+            'data': {'some': 'attr'},
+            'origin': 'LOCAL',
+            'time_fired': now.isoformat(),
+        }, json.loads(encoded))
+        self.assertIs(encoded, event.as_json())
+
 
 class TestEventBus(unittest.TestCase):
     """Test EventBus methods."""
@@ -453,6 +469,15 @@ class TestState(unittest.TestCase):
         state = ha.State('domain.hello', 'world', {'some': 'attr'})
         self.assertEqual(state, ha.State.from_dict(state.as_dict()))
 
+    def test_json_conversion(self):
+        """Test the state is encoded once."""
+        state = ha.State('domain.hello', 'world', {'some': 'attr'})
+        encoded = state.as_json()
+
+        self.assertEqual(
+            state, ha.State.from_dict(json.loads(encoded)))
+        self.assertIs(encoded, state.as_json())
+
     def test_dict_conversion_with_wrong_data(self):
         """Test conversion with wrong data."""
         self.assertIsNone(ha.State.from_dict(None))
@@ -511,6 +536,32 @@ class TestStateMachine(unittest.TestCase):
         states = sorted(state.entity_id for state in self.states.all())
         self.assertEqual(['light.bowl', 'switch.ac'], states)
 
+    def test_all_domain_filter(self):
+        """Test listing the states of a domain."""
+        self.states.set('light.Kitchen', 'off')
+        self.states.set('light.Bowl', 'off')
+
+        states = sorted((state.entity_id, state.state)
+                        for state in self.states.all('Light'))
+        self.assertEqual(
+            [('light.bowl', 'off'), ('light.kitchen', 'off')], states)
+
+        self.states.remove('light.bowl')
+        self.states.remove('light.kitchen')
+        self.assertEqual([], self.states.all('light'))
+        self.assertEqual([], self.states.entity_ids('light'))
+        self.assertEqual(['switch.ac'], self.states.entity_ids('switch'))
+
+    def test_state_change_shares_attributes(self):
+        """Test a state change keeps the unchanged attribute mapping."""
+        self.states.set('light.bowl', 'on', {'brightness': 100})
+        old_state = self.states.get('light.bowl')
+        self.states.set('light.bowl', 'off', {'brightness': 100})
+        new_state = self.states.get('light.bowl')
+
+        self.assertEqual('off', new_state.state)
+        self.assertIs(old_state.attributes, new_state.attributes)
+
     def test_remove(self):
         """Test remove method."""
         events = []
@@ -954,3 +1005,27 @@ def test_track_task_functions(loop):
         assert hass._track_task
     finally:
         yield from hass.async_stop()
+
+
+@asyncio.coroutine
+def test_async_add_executor_job(loop):
+    """Test jobs run in a separate executor per workload."""
+    hass = ha.HomeAssistant(loop=loop)
+    hass.executor_sizes[ha.EXECUTOR_DATABASE] = 1
+    try:
+        result = yield from hass.async_add_executor_job(
+            ha.EXECUTOR_DATABASE, lambda value: value * 2, 21)
+        assert result == 42
+
+        executor = hass.executors[ha.EXECUTOR_DATABASE]
+        assert executor is not hass.executor
+        assert executor._max_workers == 1
+        assert list(hass.executors) == [ha.EXECUTOR_DATABASE]
+
+        yield from hass.async_add_executor_job(
+            ha.EXECUTOR_DATABASE, lambda: None)
+        assert hass.executors[ha.EXECUTOR_DATABASE] is executor
+    finally:
+        yield from hass.async_stop()
+
+    assert executor._shutdown
@@ -1,7 +1,9 @@
 """Test to verify that we can load components."""
 # pylint: disable=protected-access
 import asyncio
+import importlib
 import unittest
+from unittest.mock import patch
 
 import pytest
 
@@ -124,3 +126,32 @@ async def test_custom_component_name(hass):
     # Test custom components is mounted
     from custom_components.test_package import TEST
     assert TEST == 5
+
+
+def test_component_index():
+    """Test the index lists the built-in components and platforms."""
+    index = loader.get_component_index()
+
+    assert index['http']['path'] == 'http/__init__.py'
+    assert index['light.hue'] == {
+        'path': 'light/hue.py',
+        'dependencies': ['hue'],
+        'requirements': [],
+    }
+    assert 'custom_components' not in index
+
+
+async def test_component_not_in_index_not_imported(hass):
+    """Test only components that exist are imported."""
+    with patch('importlib.import_module') as mock_import:
+        assert loader.get_component(hass, 'non_existing') is None
+        assert loader.get_component(hass, 'light.non_existing') is None
+
+    assert not mock_import.called
+
+    with patch('importlib.import_module',
+               wraps=importlib.import_module) as mock_import:
+        assert loader.get_component(hass, 'light.test') is not None
+
+    assert [call[1][0] for call in mock_import.mock_calls] == [
+        'custom_components.light.test']
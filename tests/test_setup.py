@@ -459,3 +459,61 @@ def test_platform_no_warn_slow(hass):
             hass, 'test_component1', {})
         assert result
         assert not mock_call.called
+
+
+async def test_setup_components_timeline(hass):
+    """Test components are set up after their dependencies and timed."""
+    loader.set_component(hass, 'comp_dep', MockModule('comp_dep'))
+    loader.set_component(
+        hass, 'comp', MockModule('comp', dependencies=['comp_dep']))
+
+    await setup.async_setup_components(hass, {'comp'}, {})
+
+    assert 'comp' in hass.config.components
+    assert 'comp_dep' in hass.config.components
+
+    timeline = setup.async_get_setup_timeline(hass)
+    phases = [(name, phase) for name, phase, _, _ in timeline.events]
+    assert phases == [
+        ('comp', setup.PHASE_IMPORT),
+        ('comp_dep', setup.PHASE_IMPORT),
+        ('comp_dep', setup.PHASE_SETUP),
+        ('comp', setup.PHASE_SETUP),
+    ]
+
+    trace = timeline.as_chrome_trace()['traceEvents']
+    assert [event['args']['name'] for event in trace
+            if event['ph'] == 'M'] == ['comp', 'comp_dep']
+    assert all(event['dur'] >= 0 and event['ts'] >= 0
+               for event in trace if event['ph'] == 'X')
+
+
+async def test_requirements_installed_while_dependencies_set_up(hass):
+    """Test requirements do not wait for the dependencies to be set up."""
+    installed = asyncio.Event(loop=hass.loop)
+
+    async def async_setup_dep(hass, config):
+        """Wait for the requirements of the dependent component."""
+        await installed.wait()
+        return True
+
+    async def mock_process_requirements(hass, name, requirements):
+        """Install the requirements."""
+        installed.set()
+        return True
+
+    hass.config.skip_pip = False
+    loader.set_component(
+        hass, 'comp_dep', MockModule('comp_dep', async_setup=async_setup_dep))
+    loader.set_component(hass, 'comp', MockModule(
+        'comp', dependencies=['comp_dep'], requirements=['package==0.0.1']))
+
+    with mock.patch('homeassistant.requirements.async_process_requirements',
+                    side_effect=mock_process_requirements):
+        assert await asyncio.wait_for(
+            setup.async_setup_component(hass, 'comp', {}), 5,
+            loop=hass.loop)
+
+    phases = [(name, phase) for name, phase, _, _
+              in setup.async_get_setup_timeline(hass).events]
+    assert ('comp', setup.PHASE_REQUIREMENTS) in phases
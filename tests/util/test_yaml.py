@@ -426,3 +426,75 @@ def test_duplicate_key(caplog):
     with patch_yaml_files(files):
         load_yaml_config_file(YAML_CONFIG_FILE)
     assert 'contains duplicate key' in caplog.text
+
+
+def test_line_annotations():
+    """Test loaded objects know the file and line they come from."""
+    files = {YAML_CONFIG_FILE: 'key:\n  - value\nnested:\n  key: value'}
+    with patch_yaml_files(files):
+        data = yaml.load_yaml(YAML_CONFIG_FILE)
+
+    assert data.__config_file__ == YAML_CONFIG_FILE
+    assert data['key'].__line__ == 1
+    assert data['nested'].__line__ == 3
+    assert data['nested'].__config_file__ == YAML_CONFIG_FILE
+
+
+def _write(path, content):
+    """Write a file of the cached configuration."""
+    with open(path, 'w') as outfile:
+        outfile.write(content)
+
+
+def test_load_yaml_cached(tmpdir):
+    """Test the cache is used until a file it was loaded from changes."""
+    config_path = str(tmpdir.join(YAML_CONFIG_FILE))
+    cache_path = str(tmpdir.join('.cache'))
+    tmpdir.mkdir('sensors')
+    _write(config_path, 'light: !include light.yaml\n'
+                        'sensor: !include_dir_list sensors\n'
+                        'password: !env_var TEST_YAML_CACHE default\n')
+    _write(str(tmpdir.join('light.yaml')), '- platform: hue\n')
+    _write(str(tmpdir.join('sensors', 'one.yaml')), 'platform: one\n')
+
+    def load(expect_parse):
+        """Load the configuration and check if it was parsed."""
+        with patch('homeassistant.util.yaml.yaml.load',
+                   wraps=yaml.yaml.load) as mock_load:
+            data = yaml.load_yaml_cached(config_path, cache_path)
+        assert mock_load.called == expect_parse
+        return data
+
+    data = load(True)
+    assert load(False) == data
+
+    cached = load(False)
+    assert cached['light'].__config_file__ == config_path
+    assert cached['light'].__line__ == 0
+    assert cached['sensor'][0].__config_file__ == \
+        str(tmpdir.join('sensors', 'one.yaml'))
+    assert cached['password'] == 'default'
+
+    _write(str(tmpdir.join('light.yaml')),
+           '- platform: hue\n- platform: lifx\n')
+    assert len(load(True)['light']) == 2
+    load(False)
+
+    _write(str(tmpdir.join('sensors', 'two.yaml')), 'platform: two\n')
+    assert len(load(True)['sensor']) == 2
+    load(False)
+
+    with patch.dict(os.environ, {'TEST_YAML_CACHE': 'secret'}):
+        assert load(True)['password'] == 'secret'
+        load(False)
+
+
+def test_load_yaml_cached_unreadable_cache(tmpdir):
+    """Test a broken cache is ignored."""
+    config_path = str(tmpdir.join(YAML_CONFIG_FILE))
+    cache_path = str(tmpdir.join('.cache'))
+    _write(config_path, 'key: value\n')
+    _write(cache_path, 'not a pickle')
+
+    assert yaml.load_yaml_cached(config_path, cache_path) == {'key': 'value'}
+    assert yaml.load_yaml_cached(config_path, cache_path) == {'key': 'value'}